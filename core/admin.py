@@ -1,14 +1,128 @@
+from collections import Counter
+
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin
-from .models import User, BloodInventory, SOSAlert
+from django.core.paginator import Paginator
+from django.db import connection, transaction
+from django.db.models import F, Value
+from django.db.models.functions import Lower
+from django.utils.functional import cached_property
+from .models import User, BloodInventory, SOSAlert, SOSAlertArchive
+from .shortages import check_hospital
+from .alertclusters import record_alerts_closed, record_pending_change
+from .rollups import alert_key, apply_deltas as apply_rollup_deltas, rollup_key
+from .stockgrid import record_stock_change, stock_change, stock_snapshot
+
+
+class EstimatedCountPaginator(Paginator):
+    """Paginator that trusts the planner's row estimate for big unfiltered lists.
+
+    An exact ``COUNT(*)`` over millions of rows costs more than rendering the
+    page itself. Filtered or searched lists, and small tables, still count
+    exactly.
+    """
+    ESTIMATE_ABOVE = 100_000
+
+    @cached_property
+    def count(self):
+        query = getattr(self.object_list, 'query', None)
+        if query is not None and not query.where:
+            estimate = estimated_row_count(self.object_list.model)
+            if estimate and estimate > self.ESTIMATE_ABOVE:
+                return estimate
+        return super().count
+
+
+def estimated_row_count(model):
+    table = model._meta.db_table
+    with connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            cursor.execute("SELECT reltuples::bigint FROM pg_class WHERE relname = %s", [table])
+            row = cursor.fetchone()
+            return row[0] if row and row[0] > 0 else None
+        if connection.vendor == 'sqlite':
+            # Only present once ANALYZE has run; the first stat field is the row count.
+            cursor.execute("SELECT name FROM sqlite_master WHERE type = 'table' AND name = 'sqlite_stat1'")
+            if cursor.fetchone() is None:
+                return None
+            cursor.execute("SELECT stat FROM sqlite_stat1 WHERE tbl = %s LIMIT 1", [table])
+            row = cursor.fetchone()
+            return int(row[0].split()[0]) if row else None
+    return None
+
+
+def forget_alerts(*querysets):
+    """Take the alerts in ``querysets`` out of the demand rollups and map clusters.
+
+    Call in the same transaction as their deletion; the rows are locked so a
+    concurrent status change can't move them in between.
+    """
+    deltas = Counter()
+    closed = []
+    for alerts in querysets:
+        rows = alerts.select_for_update().order_by('pk').values_list(
+            'created_at', 'blood_type', 'latitude', 'longitude', 'status',
+        )
+        for created_at, blood_type, latitude, longitude, status in rows:
+            deltas[rollup_key(created_at, blood_type, latitude, longitude, status)] -= 1
+            if status == 'pending' and alerts.model is SOSAlert:
+                closed.append((latitude, longitude))
+    apply_rollup_deltas(deltas)
+    record_alerts_closed(closed)
+
+
+class BloodTypeFilter(admin.SimpleListFilter):
+    # The default field filter lists choices with SELECT DISTINCT over the
+    # whole table; the blood types are a fixed set.
+    title = 'blood type'
+    parameter_name = 'blood_type__exact'
+
+    def lookups(self, request, model_admin):
+        return [(blood_type, blood_type) for blood_type in BloodInventory.FIELD_FOR_BLOOD_TYPE]
+
+    def queryset(self, request, queryset):
+        if self.value():
+            return queryset.filter(blood_type=self.value())
+        return queryset
+
+
+class LowerExactSearchMixin:
+    """Admin search that matches usernames/emails exactly, ignoring case.
+
+    ``icontains`` searches can't use an index and scan the whole table; these
+    go through the ``Lower()`` unique indexes on User. ``lower_search_users``
+    names the User foreign key to match through (``None`` for User itself).
+    A numeric term also matches the primary key.
+    """
+    show_full_result_count = False
+    lower_search_users = None
+
+    def get_search_results(self, request, queryset, search_term):
+        term = search_term.strip()
+        if not term:
+            return queryset, False
+        term_lower = Lower(Value(term))
+        users = User.objects.annotate(username_lower=Lower('username'), email_lower=Lower('email'))
+        user_ids = (
+            users.filter(username_lower=term_lower).values('pk')
+            .union(users.exclude(email='').filter(email_lower=term_lower).values('pk'))
+        )
+        field = f'{self.lower_search_users}__in' if self.lower_search_users else 'pk__in'
+        matches = queryset.filter(**{field: list(user_ids.values_list('pk', flat=True))})
+        if term.isdigit():
+            matches = matches | queryset.filter(pk=int(term))
+        return matches, False
+
 
 # 1. Register the Custom User Model
 @admin.register(User)
-class CustomUserAdmin(UserAdmin):
+class CustomUserAdmin(LowerExactSearchMixin, UserAdmin):
     # Add our custom fields to the admin list view
     list_display = ('username', 'role', 'first_name', 'address', 'is_staff')
     list_filter = ('role', 'is_staff', 'is_superuser')
-    
+    search_help_text = "Exact username or email (any case), or user id."
+    paginator = EstimatedCountPaginator
+
     # Add our custom fields to the "Edit User" page
     fieldsets = UserAdmin.fieldsets + (
         ('LifeLine Info', {'fields': ('role', 'address', 'latitude', 'longitude')}),
@@ -17,22 +131,134 @@ class CustomUserAdmin(UserAdmin):
         ('LifeLine Info', {'fields': ('role', 'address', 'latitude', 'longitude')}),
     )
 
+    def save_model(self, request, obj, form, change):
+        # Role and location edits move the user on or off the stock grid.
+        with stock_change(obj.pk):
+            super().save_model(request, obj, form, change)
+            if not change:
+                record_stock_change(None, stock_snapshot(obj, None))
+
+    def delete_model(self, request, obj):
+        # The user's inventory and SOS alerts are deleted with them.
+        with stock_change(obj.pk):
+            forget_alerts(SOSAlert.objects.filter(requester=obj), SOSAlertArchive.objects.filter(requester=obj))
+            super().delete_model(request, obj)
+
+    def delete_queryset(self, request, queryset):
+        user_ids = list(queryset.values_list('pk', flat=True))
+        with stock_change(*user_ids):
+            forget_alerts(
+                SOSAlert.objects.filter(requester__in=user_ids),
+                SOSAlertArchive.objects.filter(requester__in=user_ids),
+            )
+            super().delete_queryset(request, queryset)
+
 # 2. Register Blood Inventory
 @admin.register(BloodInventory)
-class BloodInventoryAdmin(admin.ModelAdmin):
+class BloodInventoryAdmin(LowerExactSearchMixin, admin.ModelAdmin):
     list_display = ('hospital', 'updated_at', 'total_stock')
-    search_fields = ('hospital__username', 'hospital__first_name')
+    list_select_related = ('hospital',)
+    search_fields = ('hospital__username',)
+    search_help_text = "Exact hospital username or email (any case)."
+    lower_search_users = 'hospital'
+    raw_id_fields = ('hospital',)
 
-    # Helper to show total units in the list
+    def get_queryset(self, request):
+        # Summed in SQL so the column can be sorted on.
+        fields = list(BloodInventory.FIELD_FOR_BLOOD_TYPE.values())
+        total = F(fields[0])
+        for field in fields[1:]:
+            total = total + F(field)
+        return super().get_queryset(request).annotate(total_stock_units=total)
+
+    @admin.display(description='Total stock', ordering='total_stock_units')
     def total_stock(self, obj):
-        return (obj.a_positive + obj.a_negative + 
-                obj.b_positive + obj.b_negative + 
-                obj.ab_positive + obj.ab_negative + 
-                obj.o_positive + obj.o_negative)
+        return obj.total_stock_units
+
+    def save_model(self, request, obj, form, change):
+        # Keep the regional stock grid in step with edits made here,
+        # including moving an inventory to another hospital.
+        previous = None
+        if change:
+            previous = BloodInventory.objects.filter(pk=obj.pk).values_list('hospital_id', flat=True).first()
+        with stock_change(previous, obj.hospital_id):
+            super().save_model(request, obj, form, change)
+        check_hospital(obj.hospital, obj)
+        if previous is not None and previous != obj.hospital_id:
+            # The previous hospital is left without an inventory.
+            check_hospital(User.objects.get(pk=previous))
+
+    def delete_model(self, request, obj):
+        with stock_change(obj.hospital_id):
+            super().delete_model(request, obj)
+        check_hospital(obj.hospital)
+
+    def delete_queryset(self, request, queryset):
+        hospital_ids = list(queryset.values_list('hospital_id', flat=True))
+        with stock_change(*hospital_ids):
+            super().delete_queryset(request, queryset)
+        for hospital in User.objects.filter(pk__in=hospital_ids):
+            check_hospital(hospital)
 
 # 3. Register SOS Alerts
 @admin.register(SOSAlert)
-class SOSAlertAdmin(admin.ModelAdmin):
+class SOSAlertAdmin(LowerExactSearchMixin, admin.ModelAdmin):
     list_display = ('blood_type', 'status', 'requester', 'created_at')
-    list_filter = ('status', 'blood_type')
-    search_fields = ('requester__username',)
\ No newline at end of file
+    list_filter = ('status', BloodTypeFilter)
+    list_select_related = ('requester',)
+    search_fields = ('requester__username',)
+    search_help_text = "Exact requester username or email (any case), or alert id."
+    lower_search_users = 'requester'
+    paginator = EstimatedCountPaginator
+    raw_id_fields = ('requester', 'responder', 'preferred_hospital', 'donor_responder')
+
+    def save_model(self, request, obj, form, change):
+        # Move the demand rollups and map clusters by what this edit changed.
+        with transaction.atomic():
+            stored = SOSAlert.objects.select_for_update().filter(pk=obj.pk).first() if change else None
+            super().save_model(request, obj, form, change)
+            deltas = Counter({alert_key(obj, obj.status): 1})
+            if stored is not None:
+                deltas[alert_key(stored, stored.status)] -= 1
+                if stored.status == 'pending':
+                    record_alerts_closed([(stored.latitude, stored.longitude)])
+            apply_rollup_deltas(deltas)
+            record_pending_change(obj, None)
+
+    def delete_model(self, request, obj):
+        with transaction.atomic():
+            forget_alerts(SOSAlert.objects.filter(pk=obj.pk))
+            super().delete_model(request, obj)
+
+    def delete_queryset(self, request, queryset):
+        with transaction.atomic():
+            forget_alerts(queryset)
+            super().delete_queryset(request, queryset)
+
+
+# 4. Archived SOS Alerts (read-only)
+@admin.register(SOSAlertArchive)
+class SOSAlertArchiveAdmin(LowerExactSearchMixin, admin.ModelAdmin):
+    list_display = ('id', 'blood_type', 'status', 'requester', 'created_at', 'archived_at')
+    list_filter = ('status', BloodTypeFilter)
+    list_select_related = ('requester',)
+    search_fields = ('requester__username',)
+    search_help_text = "Exact requester username or email (any case), or alert id."
+    lower_search_users = 'requester'
+    paginator = EstimatedCountPaginator
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def delete_model(self, request, obj):
+        with transaction.atomic():
+            forget_alerts(SOSAlertArchive.objects.filter(pk=obj.pk))
+            super().delete_model(request, obj)
+
+    def delete_queryset(self, request, queryset):
+        with transaction.atomic():
+            forget_alerts(queryset)
+            super().delete_queryset(request, queryset)
@@ -0,0 +1,111 @@
+import math
+from collections import defaultdict
+
+from asgiref.sync import sync_to_async
+from django.db import IntegrityError, transaction
+from django.db.models import F
+
+from .clustering import MAX_CLUSTER_ZOOM, cell_degrees
+from .conditional import ALERTS, bump
+from .models import AlertClusterCell, SOSAlert
+
+# Zooms with their own precomputed grid; odd zooms reuse the one below,
+# whose cells are twice as wide on screen.
+CLUSTER_ZOOMS = tuple(range(0, MAX_CLUSTER_ZOOM, 2))
+
+
+def grid_zoom(zoom):
+    return max(z for z in CLUSTER_ZOOMS if z <= max(zoom, 0))
+
+
+def _add_point(deltas, latitude, longitude, sign):
+    if latitude is None or longitude is None:
+        return
+    for zoom in CLUSTER_ZOOMS:
+        size = cell_degrees(zoom)
+        cell = deltas[(zoom, math.floor(latitude / size), math.floor(longitude / size))]
+        cell[0] += sign
+        cell[1] += sign * latitude
+        cell[2] += sign * longitude
+
+
+def apply_deltas(deltas):
+    """Add each ``{(zoom, row, col): [count, lat_sum, lon_sum]}`` to its cell, creating cells as needed."""
+    for (zoom, row, col), (count, latitude_sum, longitude_sum) in deltas.items():
+        if not count:
+            continue
+        lookup = {'zoom': zoom, 'row': row, 'col': col}
+        updates = {
+            'count': F('count') + count,
+            'latitude_sum': F('latitude_sum') + latitude_sum,
+            'longitude_sum': F('longitude_sum') + longitude_sum,
+        }
+        if AlertClusterCell.objects.filter(**lookup).update(**updates):
+            continue
+        try:
+            with transaction.atomic():
+                AlertClusterCell.objects.create(
+                    count=count, latitude_sum=latitude_sum, longitude_sum=longitude_sum, **lookup
+                )
+        except IntegrityError:
+            # Another request created the cell first.
+            AlertClusterCell.objects.filter(**lookup).update(**updates)
+
+
+def _new_deltas():
+    return defaultdict(lambda: [0, 0.0, 0.0])
+
+
+def record_pending_change(alert, old_status):
+    """Count ``alert`` in or out of the clusters when it enters or leaves 'pending'."""
+    was_pending, is_pending = old_status == 'pending', alert.status == 'pending'
+    if was_pending == is_pending:
+        return
+    deltas = _new_deltas()
+    _add_point(deltas, alert.latitude, alert.longitude, 1 if is_pending else -1)
+    apply_deltas(deltas)
+
+
+arecord_pending_change = sync_to_async(record_pending_change)
+
+
+def record_alerts_closed(points):
+    """Drop many formerly pending alerts, given as ``(latitude, longitude)`` pairs."""
+    deltas = _new_deltas()
+    for latitude, longitude in points:
+        _add_point(deltas, latitude, longitude, -1)
+    apply_deltas(deltas)
+
+
+def pending_clusters(zoom, bounds):
+    """Precomputed clusters of pending alerts inside ``(south, west, north, east)``."""
+    zoom = grid_zoom(zoom)
+    size = cell_degrees(zoom)
+    south, west, north, east = bounds
+    cells = AlertClusterCell.objects.filter(
+        zoom=zoom,
+        count__gt=0,
+        row__range=(math.floor(south / size), math.floor(north / size)),
+        col__range=(math.floor(west / size), math.floor(east / size)),
+    ).values_list('count', 'latitude_sum', 'longitude_sum')
+    return [
+        {'latitude': latitude_sum / count, 'longitude': longitude_sum / count, 'count': count}
+        for count, latitude_sum, longitude_sum in cells
+    ]
+
+
+def rebuild():
+    """Recompute every cell from the pending alerts. Returns the number of cells written."""
+    deltas = _new_deltas()
+    pending = SOSAlert.objects.filter(status='pending', latitude__isnull=False, longitude__isnull=False)
+    for latitude, longitude in pending.values_list('latitude', 'longitude').iterator(chunk_size=2000):
+        _add_point(deltas, latitude, longitude, 1)
+    with transaction.atomic():
+        AlertClusterCell.objects.all().delete()
+        AlertClusterCell.objects.bulk_create([
+            AlertClusterCell(zoom=zoom, row=row, col=col, count=count,
+                             latitude_sum=latitude_sum, longitude_sum=longitude_sum)
+            for (zoom, row, col), (count, latitude_sum, longitude_sum) in deltas.items()
+        ], batch_size=1000)
+        bump(ALERTS)
+    return len(deltas)
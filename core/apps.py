@@ -4,3 +4,11 @@ from django.apps import AppConfig
 class CoreConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'core'
+
+    def ready(self):
+        from django.db.models.signals import post_migrate
+
+        from . import backends, conditional, donorsearch
+        backends.connect_signals()
+        conditional.connect_signals()
+        post_migrate.connect(donorsearch.install_after_migrate, sender=self)
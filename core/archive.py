@@ -0,0 +1,73 @@
+import time
+
+from django.db import connection, transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from .conditional import ALERTS, bump
+from .models import SOSAlert, SOSAlertArchive, SOSRoute
+
+RESOLVED_STATUSES = ('accepted', 'declined', 'expired')
+
+
+def archive_resolved_alerts(cutoff, batch_size=1000, sleep=0.0, dry_run=False, progress=None):
+    """Move accepted/declined/expired alerts created before ``cutoff`` to the archive.
+
+    Works in primary-key ranges of ``batch_size`` rows. Each range is copied
+    with one ``INSERT ... SELECT`` and removed with one ``DELETE`` inside its
+    own transaction, so locks stay short and an interrupted run simply picks
+    up where it stopped next time. Returns the number of rows moved.
+    """
+    eligible = SOSAlert.objects.filter(status__in=RESOLVED_STATUSES, created_at__lt=cutoff)
+    if dry_run:
+        return eligible.count()
+
+    qn = connection.ops.quote_name
+    hot_table = qn(SOSAlert._meta.db_table)
+    archive_table = qn(SOSAlertArchive._meta.db_table)
+    columns = [SOSAlertArchive._meta.get_field(name).column for name in SOSAlertArchive.history_columns()]
+    column_sql = ', '.join(qn(column) for column in columns)
+    status_sql = ', '.join(['%s'] * len(RESOLVED_STATUSES))
+    created_at = SOSAlert._meta.get_field('created_at')
+    archived_at = SOSAlertArchive._meta.get_field('archived_at')
+    predicate = (
+        f"{qn('id')} > %s AND {qn('id')} <= %s "
+        f"AND {qn('status')} IN ({status_sql}) AND {qn('created_at')} < %s"
+    )
+    insert_sql = (
+        f"INSERT INTO {archive_table} ({column_sql}, {qn(archived_at.column)}) "
+        f"SELECT {column_sql}, %s FROM {hot_table} WHERE {predicate}"
+    )
+    delete_sql = f"DELETE FROM {hot_table} WHERE {predicate}"
+    # Routing shortlists only matter while an alert is live; drop them with it.
+    delete_routes_sql = (
+        f"DELETE FROM {qn(SOSRoute._meta.db_table)} WHERE {qn('alert_id')} IN "
+        f"(SELECT {qn('id')} FROM {hot_table} WHERE {predicate})"
+    )
+    cutoff_value = created_at.get_db_prep_value(cutoff, connection)
+
+    moved = 0
+    last_id = 0
+    while True:
+        remaining = eligible.filter(id__gt=last_id)
+        upper = next(iter(remaining.order_by('id').values_list('id', flat=True)[batch_size - 1:batch_size]), None)
+        if upper is None:
+            upper = remaining.aggregate(Max('id'))['id__max']
+            if upper is None:
+                break
+
+        params = [last_id, upper, *RESOLVED_STATUSES, cutoff_value]
+        with transaction.atomic():
+            with connection.cursor() as cursor:
+                cursor.execute(insert_sql, [archived_at.get_db_prep_value(timezone.now(), connection), *params])
+                cursor.execute(delete_routes_sql, params)
+                cursor.execute(delete_sql, params)
+                moved += cursor.rowcount
+            bump(ALERTS)
+
+        last_id = upper
+        if progress:
+            progress(moved, last_id)
+        if sleep:
+            time.sleep(sleep)
+    return moved
@@ -0,0 +1,104 @@
+"""Front-end bundles.
+
+Each bundle concatenates static files in order into ``static/bundles/``
+(``build_assets`` writes them into ``core/static/bundles``, which is not
+checked in). Templates include them with ``{% bundle 'site.js' %}``: one
+tag per bundle when ``LIFELINE_ASSET_BUNDLES`` is on, the individual
+source files otherwise so development needs no build step.
+
+``collectstatic`` then gives every file a content-hashed name, which
+WhiteNoise serves as immutable, plus ``.gz`` and ``.br`` copies.
+"""
+import posixpath
+import re
+from pathlib import Path
+
+from django.contrib.staticfiles import finders
+
+BUNDLE_DIR = 'bundles'
+OUTPUT_DIR = Path(__file__).resolve().parent / 'static' / BUNDLE_DIR
+
+BUNDLES = {
+    # Every page.
+    'site.css': [
+        'health/css/bootstrap.min.css',
+        'health/css/font-awesome.min.css',
+        'health/css/animate.css',
+        'health/css/owl.carousel.css',
+        'health/css/owl.theme.default.min.css',
+        'health/css/tooplate-style.css',
+    ],
+    'site.js': [
+        'health/js/jquery.js',
+        'health/js/bootstrap.min.js',
+        'health/js/jquery.sticky.js',
+        'health/js/jquery.stellar.min.js',
+        'health/js/wow.min.js',
+        'health/js/smoothscroll.js',
+        'health/js/owl.carousel.min.js',
+        'health/js/custom.js',
+    ],
+    # Only pages with a map (templates/_leaflet.html).
+    'map.css': ['vendor/leaflet/leaflet.css'],
+    'map.js': ['vendor/leaflet/leaflet.js'],
+}
+
+# Shipped minified with a licence banner the minifier would strip.
+PREMINIFIED = {'health/js/jquery.js', 'vendor/leaflet/leaflet.js'}
+
+CSS_URL = re.compile(r'''url\(\s*(['"]?)(.*?)\1\s*\)''')
+CSS_IMPORT = re.compile(r'@import\s+[^;]+;')
+# A source's map no longer lines up once it is concatenated.
+SOURCE_MAP = re.compile(r'^[ \t]*(?://|/\*)# sourceMappingURL=.*$', re.MULTILINE)
+
+
+def _rebase_css(css, source):
+    """Point relative ``url()``s in ``source`` at the same files from ``bundles/``."""
+    source_dir = posixpath.dirname(source)
+
+    def rebase(match):
+        quote, target = match.groups()
+        if not target or target.startswith(('data:', 'http:', 'https:', '//', '/', '#')):
+            return match.group(0)
+        resolved = posixpath.normpath(posixpath.join(source_dir, target))
+        return f'url({quote}{posixpath.relpath(resolved, BUNDLE_DIR)}{quote})'
+
+    return CSS_URL.sub(rebase, css)
+
+
+def build_bundle(name):
+    """Concatenate and minify one bundle. Returns ``(text, source_bytes)``."""
+    import rcssmin
+    import rjsmin
+
+    parts, imports, source_bytes = [], [], 0
+    for source in BUNDLES[name]:
+        path = finders.find(source)
+        if path is None:
+            raise FileNotFoundError(f"Static file {source!r} in bundle {name!r} not found.")
+        text = Path(path).read_text(encoding='utf-8')
+        source_bytes += len(text.encode('utf-8'))
+        text = SOURCE_MAP.sub('', text)
+        if name.endswith('.css'):
+            text = _rebase_css(text, source)
+            # @import only works at the top of a stylesheet.
+            imports.extend(CSS_IMPORT.findall(text))
+            text = CSS_IMPORT.sub('', text)
+            if source not in PREMINIFIED:
+                text = rcssmin.cssmin(text, keep_bang_comments=True)
+        elif source not in PREMINIFIED:
+            text = rjsmin.jsmin(text, keep_bang_comments=True)
+        parts.append(text.strip())
+    separator = '\n' if name.endswith('.css') else ';\n'
+    return '\n'.join(imports + [separator.join(parts)]) + '\n', source_bytes
+
+
+def build_all():
+    """Write every bundle to ``OUTPUT_DIR``. Returns ``[(name, source_bytes, bundle_bytes)]``."""
+    OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
+    written = []
+    for name in BUNDLES:
+        text, source_bytes = build_bundle(name)
+        (OUTPUT_DIR / name).write_text(text, encoding='utf-8')
+        written.append((name, source_bytes, len(text.encode('utf-8'))))
+    return written
@@ -0,0 +1,111 @@
+"""Authentication backend.
+
+Besides matching usernames ignoring case, the backend keeps users in the
+shared cache so a signed-in request doesn't fetch its ``User`` row before
+the view runs. Each cached user is stored with its user's version stamp.
+Any change to the row (a save or delete, or a bulk write that calls
+``invalidate_users``) restamps the version once the transaction commits.
+A cached copy whose stamp no longer matches is reloaded. Entry and stamp
+are read in one cache call.
+"""
+import time
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.backends import ModelBackend
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Value
+from django.db.models.functions import Lower
+from django.db.models.signals import post_delete, post_save
+
+UserModel = get_user_model()
+
+USER_KEY = 'lifeline:user:{}'
+USER_VERSION_KEY = 'lifeline:user-version:{}'
+
+
+def _stamp_users(user_ids):
+    now = time.time_ns()
+    cache.set_many({USER_VERSION_KEY.format(user_id): now for user_id in user_ids}, None)
+
+
+def invalidate_users(user_ids, using=None):
+    """Drop the cached copies of ``user_ids`` once the current transaction commits."""
+    user_ids = list(user_ids)
+    if user_ids:
+        transaction.on_commit(lambda: _stamp_users(user_ids), using=using)
+
+
+def _user_changed(sender, instance, **kwargs):
+    invalidate_users([instance.pk], using=kwargs.get('using'))
+
+
+def connect_signals():
+    uid = 'lifeline-user-cache'
+    post_save.connect(_user_changed, sender=UserModel, weak=False, dispatch_uid=uid)
+    post_delete.connect(_user_changed, sender=UserModel, weak=False, dispatch_uid=uid)
+
+
+def _cached(found, user_id):
+    """The cached user if its stamp is current, and the current stamp (None if unset)."""
+    version = found.get(USER_VERSION_KEY.format(user_id))
+    entry = found.get(USER_KEY.format(user_id))
+    if version is not None and entry is not None and entry[0] == version:
+        return entry[1], version
+    return None, version
+
+
+class CaseInsensitiveModelBackend(ModelBackend):
+    """ModelBackend that matches the username ignoring case.
+
+    The lookup filters on ``Lower('username')`` so it is answered from the
+    functional unique index rather than scanning the table.
+    """
+
+    def authenticate(self, request, username=None, password=None, **kwargs):
+        if username is None:
+            username = kwargs.get(UserModel.USERNAME_FIELD)
+        if username is None or password is None:
+            return None
+        try:
+            user = UserModel._default_manager.annotate(username_lower=Lower('username')).get(
+                username_lower=Lower(Value(username))
+            )
+        except UserModel.DoesNotExist:
+            # Hash anyway so unknown usernames take as long as wrong passwords.
+            UserModel().set_password(password)
+            return None
+        if user.check_password(password) and self.user_can_authenticate(user):
+            return user
+        return None
+
+    def get_user(self, user_id):
+        timeout = settings.LIFELINE_USER_CACHE_SECONDS
+        if not timeout:
+            return super().get_user(user_id)
+        user, version = _cached(cache.get_many([USER_KEY.format(user_id), USER_VERSION_KEY.format(user_id)]), user_id)
+        if user is None:
+            if version is None:
+                # First use, or the stamp was evicted: start a new one.
+                version = time.time_ns()
+                cache.add(USER_VERSION_KEY.format(user_id), version, None)
+            user = super().get_user(user_id)
+            if user is not None:
+                cache.set(USER_KEY.format(user_id), (version, user), timeout)
+        return user
+
+    async def aget_user(self, user_id):
+        timeout = settings.LIFELINE_USER_CACHE_SECONDS
+        if not timeout:
+            return await super().aget_user(user_id)
+        found = await cache.aget_many([USER_KEY.format(user_id), USER_VERSION_KEY.format(user_id)])
+        user, version = _cached(found, user_id)
+        if user is None:
+            if version is None:
+                version = time.time_ns()
+                await cache.aadd(USER_VERSION_KEY.format(user_id), version, None)
+            user = await super().aget_user(user_id)
+            if user is not None:
+                await cache.aset(USER_KEY.format(user_id), (version, user), timeout)
+        return user
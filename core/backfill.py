@@ -0,0 +1,134 @@
+"""Chunked, resumable data backfills.
+
+A backfill walks the rows that still need work in primary-key order,
+``batch_size`` at a time, and commits each chunk in its own short
+transaction so no single statement locks a whole table. With a
+``BackfillCheckpoint`` table available, the highest primary key done is
+committed along with each chunk and an interrupted run resumes after it.
+
+Use it from management commands (``run_backfill <name>``) or from a
+``RunPython`` data migration, which must then be ``atomic = False``::
+
+    def forwards(apps, schema_editor):
+        run_backfill(MyBackfill(), apps=apps, using=schema_editor.connection.alias)
+
+Only migrations after ``core.0022`` (the checkpoint table) should do
+this; older migrations stay self-contained. ``get_queryset`` must only
+select rows that still need work, so a rerun is always safe.
+"""
+import logging
+import time
+
+from django.apps import apps as global_apps
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, transaction
+from django.db.models import F, Max
+from django.utils import timezone
+
+from .backends import invalidate_users
+from .conditional import PEOPLE, bump
+
+logger = logging.getLogger(__name__)
+
+
+class Backfill:
+    """One named data fix. Subclasses set ``name`` and implement both hooks."""
+    name = None
+
+    def get_queryset(self, apps):
+        """Rows still needing work. Use ``apps.get_model`` so this also runs in migrations."""
+        raise NotImplementedError
+
+    def process(self, chunk):
+        """Apply the change to ``chunk`` (a queryset); return the rows changed."""
+        raise NotImplementedError
+
+
+class BlankDonorAvailability(Backfill):
+    """Donors saved with no availability at all are available.
+
+    ``pending`` is left alone: it is live state, set while a donor has
+    accepted an SOS.
+    """
+    name = 'blank_donor_availability'
+
+    def get_queryset(self, apps):
+        User = apps.get_model('core', 'User')
+        return User.objects.filter(role='donor', donor_availability='')
+
+    def process(self, chunk):
+        invalidate_users(chunk.values_list('pk', flat=True), using=chunk.db)
+        bump(PEOPLE, using=chunk.db)
+        return chunk.update(donor_availability='available')
+
+
+BACKFILLS = {backfill.name: backfill for backfill in (BlankDonorAvailability,)}
+
+
+def _checkpoints(apps, using):
+    try:
+        model = apps.get_model('core', 'BackfillCheckpoint')
+    except LookupError:
+        return None
+    return model.objects.using(using)
+
+
+def _log_progress(name, rows, last_pk, max_pk, elapsed):
+    logger.info(
+        "%s: %d row(s) up to pk %d of %d (%.0f rows/s)",
+        name, rows, last_pk, max_pk, rows / elapsed if elapsed else rows,
+    )
+
+
+def run_backfill(backfill, apps=global_apps, using=DEFAULT_DB_ALIAS, batch_size=None, sleep=None,
+                 restart=False, progress=_log_progress):
+    """Run ``backfill`` to completion. Returns the number of rows changed in this run.
+
+    ``progress(name, rows, last_pk, max_pk, elapsed_seconds)`` is called
+    after every chunk. ``sleep`` seconds are waited between chunks to leave
+    room for other writers (and replicas) to keep up. A backfill whose
+    checkpoint says it completed does nothing unless ``restart`` is set.
+    """
+    batch_size = max(1, batch_size or settings.LIFELINE_BACKFILL_BATCH_SIZE)
+    sleep = settings.LIFELINE_BACKFILL_SLEEP_SECONDS if sleep is None else sleep
+    queryset = backfill.get_queryset(apps).using(using)
+    checkpoints = _checkpoints(apps, using)
+
+    last_pk = 0
+    checkpoint = None
+    if checkpoints is not None:
+        checkpoint, _ = checkpoints.get_or_create(name=backfill.name)
+        if restart:
+            checkpoint.last_pk, checkpoint.rows = 0, 0
+            checkpoint.started_at, checkpoint.completed_at = timezone.now(), None
+            checkpoint.save()
+        elif checkpoint.completed_at:
+            return 0
+        last_pk = checkpoint.last_pk
+
+    max_pk = queryset.aggregate(max_pk=Max('pk'))['max_pk'] or 0
+    started = time.monotonic()
+    rows = 0
+    while last_pk < max_pk:
+        # The chunk ends at the batch_size-th row still needing work, so
+        # chunks stay full however sparse those rows are.
+        upper = next(iter(
+            queryset.filter(pk__gt=last_pk).order_by('pk')
+            .values_list('pk', flat=True)[batch_size - 1:batch_size]
+        ), max_pk)
+        with transaction.atomic(using=using):
+            changed = backfill.process(queryset.filter(pk__gt=last_pk, pk__lte=upper)) or 0
+            if checkpoints is not None:
+                checkpoints.filter(pk=checkpoint.pk).update(
+                    last_pk=upper, rows=F('rows') + changed, updated_at=timezone.now(),
+                )
+        rows += changed
+        last_pk = upper
+        if progress:
+            progress(backfill.name, rows, last_pk, max_pk, time.monotonic() - started)
+        if sleep and last_pk < max_pk:
+            time.sleep(sleep)
+
+    if checkpoints is not None:
+        checkpoints.filter(pk=checkpoint.pk).update(completed_at=timezone.now(), updated_at=timezone.now())
+    return rows
@@ -0,0 +1,74 @@
+"""Grid clustering of map points for viewport APIs.
+
+Points are bucketed into square cells sized from the map zoom, so a
+viewport never holds more than a few dozen cells whatever the data volume.
+"""
+from django.db.models import Avg, Count, F, Min
+from django.db.models.functions import Floor
+
+# Cells per 256px map tile edge: 4 gives roughly 64px clusters on screen.
+CELLS_PER_TILE = 4
+# From this zoom on, points are always returned individually.
+MAX_CLUSTER_ZOOM = 15
+# Viewports with at most this many points are not clustered either.
+MAX_MARKERS = 200
+
+
+def parse_bbox(value):
+    """``"south,west,north,east"`` -> tuple of floats, or None if malformed."""
+    try:
+        bounds = tuple(float(v) for v in (value or '').split(','))
+    except ValueError:
+        return None
+    if len(bounds) != 4 or bounds[0] > bounds[2] or bounds[1] > bounds[3]:
+        return None
+    return bounds
+
+
+def parse_zoom(value, default=0):
+    try:
+        return max(0, min(int(value), 22))
+    except (TypeError, ValueError):
+        return default
+
+
+def cell_degrees(zoom):
+    return 360.0 / (2 ** zoom) / CELLS_PER_TILE
+
+
+def in_bbox(queryset, bounds, lat_field='latitude', lon_field='longitude'):
+    south, west, north, east = bounds
+    return queryset.filter(**{
+        f'{lat_field}__range': (south, north),
+        f'{lon_field}__range': (west, east),
+    })
+
+
+def cluster(queryset, zoom, lat_field='latitude', lon_field='longitude'):
+    """Group ``queryset`` rows into grid cells in one aggregate query.
+
+    Returns ``[{'latitude', 'longitude', 'count', 'id'}, ...]`` where the
+    position is the mean of the cell's points and ``id`` is the smallest
+    primary key in it (handy when ``count`` is 1).
+    """
+    size = cell_degrees(zoom)
+    rows = (
+        queryset.annotate(
+            cell_row=Floor(F(lat_field) / size),
+            cell_col=Floor(F(lon_field) / size),
+        )
+        .values('cell_row', 'cell_col')
+        .annotate(points=Count('pk'), mean_lat=Avg(lat_field), mean_lon=Avg(lon_field), first_id=Min('pk'))
+        .order_by()
+    )
+    return [
+        {'latitude': row['mean_lat'], 'longitude': row['mean_lon'], 'count': row['points'], 'id': row['first_id']}
+        for row in rows
+    ]
+
+
+def should_cluster(queryset, zoom):
+    """Cluster unless zoomed right in or the viewport is already sparse."""
+    if zoom >= MAX_CLUSTER_ZOOM:
+        return False
+    return queryset[:MAX_MARKERS + 1].count() > MAX_MARKERS
@@ -0,0 +1,127 @@
+"""Conditional GETs for authenticated pages and JSON endpoints.
+
+Every write stamps the data version it touches (``ALERTS``, ``PEOPLE``,
+``STOCK``) in the shared cache with the time of the change, once its
+transaction commits. Model saves and deletes do this through signals;
+bulk ``update``/``bulk_create``/raw SQL writers call ``bump`` themselves.
+
+``versioned_etag`` builds an ``etag_func`` for Django's ``condition``
+decorator from those stamps, so a matching ``If-None-Match`` is answered
+with 304 before the view runs a query or renders a template::
+
+    @cache_control(private=True, no_cache=True)
+    @condition(etag_func=versioned_etag(PEOPLE))
+    def donor_list(request): ...
+"""
+import hashlib
+import time
+
+from django.conf import settings
+from django.contrib.messages import get_messages
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+
+from .replicas import replica_configured
+
+ALERTS = 'alerts'
+PEOPLE = 'people'
+STOCK = 'stock'
+
+VERSION_KEY = 'lifeline:version:{}'
+
+
+def versions(*names):
+    """The last-change stamp (ns since the epoch) of each version in ``names``.
+
+    A stamp missing from the cache (first use, eviction, restart) starts at
+    now, so a lost stamp can never bring back an ETag handed out before.
+    """
+    keys = [VERSION_KEY.format(name) for name in names]
+    stamps = cache.get_many(keys)
+    for key in keys:
+        if key not in stamps:
+            cache.add(key, time.time_ns(), None)
+            stamps[key] = cache.get(key)
+    return [stamps[key] for key in keys]
+
+
+def _stamp(names):
+    now = time.time_ns()
+    cache.set_many({VERSION_KEY.format(name): now for name in names}, None)
+
+
+def bump(*names, using=None):
+    """Mark ``names`` as changed once the current transaction commits.
+
+    Stamping on commit means a reader never tags the old rows with the new
+    version.
+    """
+    transaction.on_commit(lambda: _stamp(names), using=using)
+
+
+def _recent_change(stamps):
+    window = settings.LIFELINE_REPLICA_PIN_SECONDS * 1_000_000_000
+    return time.time_ns() - max(stamps) < window
+
+
+def versioned_etag(*names, vary=None):
+    """An ``etag_func`` for ``condition`` over the ``names`` versions.
+
+    The tag also covers the path and query, the user, their session and
+    CSRF secret (a new login never gets a page with a stale token back) and
+    ``LIFELINE_RELEASE``. ``vary(request)`` returns anything else the
+    response depends on. No tag, so always a full response, while flash
+    messages are waiting to be shown or while a read replica may not have
+    caught up with the latest change yet.
+    """
+    def etag_func(request, *args, **kwargs):
+        if not settings.LIFELINE_CONDITIONAL_GET or get_messages(request):
+            return None
+        stamps = versions(*names)
+        if replica_configured() and _recent_change(stamps):
+            return None
+        session = getattr(request, 'session', None)
+        parts = [
+            settings.LIFELINE_RELEASE,
+            request.get_full_path(),
+            request.user.pk,
+            session.session_key if session is not None else None,
+            request.META.get('CSRF_COOKIE'),
+            *stamps,
+        ]
+        if vary is not None:
+            parts.extend(vary(request))
+        return hashlib.blake2b(repr(parts).encode(), digest_size=16).hexdigest()
+    return etag_func
+
+
+def payload_etag(content):
+    """A strong ETag for a response body that doesn't come from our tables."""
+    return '"%s"' % hashlib.blake2b(content, digest_size=16).hexdigest()
+
+
+def _user_changed(sender, instance, update_fields=None, **kwargs):
+    # Logging in only touches last_login, which no page shows.
+    if update_fields is not None and set(update_fields) <= {'last_login'}:
+        return
+    bump(PEOPLE, using=kwargs.get('using'))
+
+
+def connect_signals():
+    from .models import BloodInventory, SOSAlert, StockThreshold, User
+
+    def bumper(*names):
+        def receiver(sender, **kwargs):
+            bump(*names, using=kwargs.get('using'))
+        return receiver
+
+    for model, receiver in (
+        (SOSAlert, bumper(ALERTS)),
+        (User, _user_changed),
+        (BloodInventory, bumper(STOCK)),
+        (StockThreshold, bumper(STOCK)),
+    ):
+        uid = f'lifeline-version-{model._meta.label_lower}'
+        post_save.connect(receiver, sender=model, weak=False, dispatch_uid=uid)
+        post_delete.connect(receiver, sender=model, weak=False, dispatch_uid=uid)
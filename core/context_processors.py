@@ -0,0 +1,14 @@
+from django.conf import settings
+
+
+def fragment_cache(request):
+    """Timeout and key version for the ``{% cache %}`` fragments in templates.
+
+    A timeout of 0 (the default outside the production profile) renders the
+    fragments fresh every time. ``fragment_version`` goes into every
+    fragment key so a new release never serves fragments from the last one.
+    """
+    return {
+        'fragment_cache_seconds': settings.LIFELINE_TEMPLATE_FRAGMENT_SECONDS,
+        'fragment_version': settings.LIFELINE_RELEASE,
+    }
@@ -0,0 +1,209 @@
+"""Donor directory search.
+
+Text search over name, username and address is answered from an index:
+an FTS5 table kept in sync by triggers on SQLite, a trigram GIN index on
+PostgreSQL. ``install`` creates either; migration 0023 runs it and so does
+every ``migrate`` afterwards, because SQLite drops a table's triggers when
+a migration rebuilds it. Other databases fall back to ``icontains``.
+
+Results are ordered by name and paged by keyset: the cursor is the last
+row's ``(first_name, username, id)``, so each page is one range scan of
+``core_user_role_name_idx`` however deep the reader goes.
+"""
+import base64
+import binascii
+import json
+import math
+import re
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connections
+from django.db.migrations.recorder import MigrationRecorder
+from django.db.models import F, FloatField, Q, Value
+from django.db.models.expressions import RawSQL
+from django.db.models.functions import Cos, Power, Radians, Sqrt
+from django.utils import timezone
+
+from .models import User
+from .projections import DonorSearchRow, project
+
+FTS_TABLE = 'core_user_fts'
+FTS_COLUMNS = ('username', 'first_name', 'last_name', 'address')
+TRIGRAM_INDEX = 'core_user_donor_search_trgm'
+TRIGRAM_EXPRESSION = (
+    "(username || ' ' || first_name || ' ' || last_name || ' ' || coalesce(address, ''))"
+)
+ORDERING = ('first_name', 'username', 'id')
+# The migration that first creates the index.
+INSTALLED_BY = ('core', '0023_donor_search')
+
+_columns = ', '.join(FTS_COLUMNS)
+_old = ', '.join(f'old.{column}' for column in FTS_COLUMNS)
+_new = ', '.join(f'new.{column}' for column in FTS_COLUMNS)
+SQLITE_INSTALL = [
+    f"CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_insert AFTER INSERT ON core_user "
+    f"WHEN new.role = 'donor' BEGIN "
+    f"INSERT INTO {FTS_TABLE}(rowid, {_columns}) VALUES (new.id, {_new}); END",
+    f"CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_delete AFTER DELETE ON core_user "
+    f"WHEN old.role = 'donor' BEGIN "
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, {_columns}) VALUES ('delete', old.id, {_old}); END",
+    f"CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_update AFTER UPDATE OF role, {_columns} ON core_user BEGIN "
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, {_columns}) "
+    f"SELECT 'delete', old.id, {_old} WHERE old.role = 'donor'; "
+    f"INSERT INTO {FTS_TABLE}(rowid, {_columns}) SELECT new.id, {_new} WHERE new.role = 'donor'; END",
+]
+SQLITE_POPULATE = (
+    f"INSERT INTO {FTS_TABLE}(rowid, {_columns}) SELECT id, {_columns} FROM core_user WHERE role = 'donor'"
+)
+
+
+def install(connection):
+    """Create the search index for ``connection`` if it is missing (idempotent)."""
+    with connection.cursor() as cursor:
+        if connection.vendor == 'sqlite':
+            cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = %s", [FTS_TABLE])
+            created = cursor.fetchone() is None
+            if created:
+                cursor.execute(
+                    f"CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5({_columns}, content='core_user', "
+                    f"content_rowid='id', tokenize='unicode61 remove_diacritics 2', prefix='2 3')"
+                )
+            for sql in SQLITE_INSTALL:
+                cursor.execute(sql)
+            if created:
+                cursor.execute(SQLITE_POPULATE)
+        elif connection.vendor == 'postgresql':
+            cursor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+            cursor.execute(
+                f"CREATE INDEX IF NOT EXISTS {TRIGRAM_INDEX} ON core_user "
+                f"USING gin ({TRIGRAM_EXPRESSION} gin_trgm_ops) WHERE role = 'donor'"
+            )
+
+
+def uninstall(connection):
+    with connection.cursor() as cursor:
+        if connection.vendor == 'sqlite':
+            for name in ('insert', 'delete', 'update'):
+                cursor.execute(f'DROP TRIGGER IF EXISTS {FTS_TABLE}_{name}')
+            cursor.execute(f'DROP TABLE IF EXISTS {FTS_TABLE}')
+        elif connection.vendor == 'postgresql':
+            cursor.execute(f'DROP INDEX IF EXISTS {TRIGRAM_INDEX}')
+
+
+def rebuild(connection):
+    """Re-index every donor (after restoring a dump taken without the triggers, say)."""
+    install(connection)
+    if connection.vendor == 'sqlite':
+        with connection.cursor() as cursor:
+            cursor.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('delete-all')")
+            cursor.execute(SQLITE_POPULATE)
+
+
+def install_after_migrate(sender, using, **kwargs):
+    """post_migrate receiver: put back triggers a table rebuild dropped."""
+    connection = connections[using]
+    if INSTALLED_BY in MigrationRecorder(connection).applied_migrations():
+        install(connection)
+
+
+def _terms(text):
+    return re.findall(r'\w+', text.lower())
+
+
+def text_filter(text, vendor):
+    """A filter matching donors whose name, username or address has every word of ``text``.
+
+    Words match as prefixes on SQLite and as substrings elsewhere.
+    """
+    terms = _terms(text)
+    if not terms:
+        return Q()
+    if vendor == 'sqlite':
+        match = ' '.join(f'"{term}"*' for term in terms)
+        return Q(pk__in=RawSQL(f'SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s', [match]))
+    if vendor == 'postgresql':
+        patterns = ['%' + re.sub(r'([\\%_])', r'\\\1', term) + '%' for term in terms]
+        where = ' AND '.join([f'{TRIGRAM_EXPRESSION} ILIKE %s'] * len(patterns))
+        return Q(pk__in=RawSQL(f"SELECT id FROM core_user WHERE role = 'donor' AND {where}", patterns))
+    q = Q()
+    for term in terms:
+        q &= (
+            Q(username__icontains=term) | Q(first_name__icontains=term)
+            | Q(last_name__icontains=term) | Q(address__icontains=term)
+        )
+    return q
+
+
+def distance_expression(latitude, longitude):
+    """Kilometres from the point, by the same approximation as ``routing.distance_km``."""
+    x = Radians(F('longitude') - longitude) * Cos(Radians((F('latitude') + latitude) / 2))
+    y = Radians(F('latitude') - latitude)
+    return 6371 * Sqrt(Power(x, 2) + Power(y, 2))
+
+
+def encode_cursor(row):
+    values = [getattr(row, name) for name in ORDERING]
+    return base64.urlsafe_b64encode(json.dumps(values).encode()).decode().rstrip('=')
+
+
+def decode_cursor(value):
+    """``(first_name, username, id)`` from ``encode_cursor``, or None if malformed."""
+    try:
+        first_name, username, pk = json.loads(base64.urlsafe_b64decode(value + '=' * (-len(value) % 4)))
+    except (binascii.Error, TypeError, ValueError, UnicodeDecodeError):
+        return None
+    if not (isinstance(first_name, str) and isinstance(username, str) and isinstance(pk, int)):
+        return None
+    return first_name, username, pk
+
+
+def search_donors(text='', blood_group='', availability='', eligible=False, origin=None, within_km=None,
+                  after=None, limit=None):
+    """One page of donors. Returns ``(rows, next_cursor)``; ``next_cursor`` is None on the last page.
+
+    ``origin`` is the searcher's ``(latitude, longitude)``: rows carry
+    ``distance_km`` from it, and ``within_km`` keeps only donors that close.
+    ``eligible`` keeps available donors whose last donation is at least
+    ``LIFELINE_DONATION_INTERVAL_DAYS`` ago. ``after`` is a cursor.
+    """
+    limit = limit or settings.LIFELINE_DONOR_PAGE_SIZE
+    donors = User.objects.filter(role='donor')
+    donors = donors.filter(text_filter(text, connections[donors.db].vendor))
+    if blood_group:
+        donors = donors.filter(blood_group=blood_group)
+    if availability:
+        donors = donors.filter(donor_availability=availability)
+    if eligible:
+        last_allowed = timezone.localdate() - timedelta(days=settings.LIFELINE_DONATION_INTERVAL_DAYS)
+        donors = donors.filter(donor_availability='available').filter(
+            Q(last_donation_date__isnull=True) | Q(last_donation_date__lte=last_allowed)
+        )
+
+    if origin is None:
+        donors = donors.annotate(distance_km=Value(None, output_field=FloatField()))
+    else:
+        latitude, longitude = origin
+        donors = donors.annotate(distance_km=distance_expression(latitude, longitude))
+        if within_km:
+            # Bounding box first so the geo index narrows the rows to measure.
+            lat_delta = within_km / 111.0
+            lon_delta = within_km / (111.0 * max(math.cos(math.radians(latitude)), 0.01))
+            donors = donors.filter(
+                latitude__range=(latitude - lat_delta, latitude + lat_delta),
+                longitude__range=(longitude - lon_delta, longitude + lon_delta),
+                distance_km__lte=within_km,
+            )
+
+    if after is not None:
+        first_name, username, pk = after
+        # The leading >= lets the database start an index range scan there.
+        donors = donors.filter(first_name__gte=first_name).filter(
+            Q(first_name__gt=first_name)
+            | Q(username__gt=username)
+            | Q(username=username, id__gt=pk)
+        )
+    rows = project(donors.order_by(*ORDERING)[:limit + 1], DonorSearchRow)
+    if len(rows) > limit:
+        return rows[:limit], encode_cursor(rows[limit - 1])
+    return rows, None
@@ -0,0 +1,75 @@
+from collections import Counter
+
+from django.db import transaction
+from django.utils import timezone
+
+from .alertclusters import record_alerts_closed
+from .conditional import ALERTS, bump
+from .models import SOSAlert
+from .rollups import apply_deltas, rollup_key
+
+
+def _update_in_batches(queryset, batch_size, on_batch=None, **changes):
+    """Apply ``changes`` to ``queryset`` a batch of primary keys at a time.
+
+    Each UPDATE re-checks ``status='pending'`` so an alert a hospital answers
+    between the id lookup and the write is left alone. ``on_batch`` runs in
+    the same transaction, just before the UPDATE.
+    """
+    updated = 0
+    last_id = 0
+    while True:
+        ids = list(queryset.filter(id__gt=last_id).order_by('id').values_list('id', flat=True)[:batch_size])
+        if not ids:
+            return updated
+        with transaction.atomic():
+            batch = SOSAlert.objects.filter(id__in=ids, status='pending')
+            if on_batch:
+                on_batch(batch)
+            updated += batch.update(**changes)
+            bump(ALERTS)
+        last_id = ids[-1]
+
+
+def _record_expired(batch):
+    deltas = Counter()
+    points = []
+    for row in batch.select_for_update().values_list('created_at', 'blood_type', 'latitude', 'longitude'):
+        deltas[rollup_key(*row, 'pending')] -= 1
+        deltas[rollup_key(*row, 'expired')] += 1
+        points.append(row[2:])
+    apply_deltas(deltas)
+    record_alerts_closed(points)
+
+
+def escalate_unanswered_alerts(cutoff, batch_size=500, dry_run=False):
+    """Broadcast pending alerts aimed at one hospital that hasn't answered since ``cutoff``."""
+    stale = SOSAlert.objects.filter(
+        status='pending',
+        preferred_hospital__isnull=False,
+        escalated_at__isnull=True,
+        created_at__lt=cutoff,
+    )
+    if dry_run:
+        return stale.count()
+    return _update_in_batches(
+        stale,
+        batch_size,
+        preferred_hospital=None,
+        escalated_at=timezone.now(),
+    )
+
+
+def expire_stale_alerts(cutoff, reason, batch_size=500, dry_run=False):
+    """Mark pending alerts created before ``cutoff`` as expired with ``reason``."""
+    stale = SOSAlert.objects.filter(status='pending', created_at__lt=cutoff)
+    if dry_run:
+        return stale.count()
+    return _update_in_batches(
+        stale,
+        batch_size,
+        on_batch=_record_expired,
+        status='expired',
+        expired_at=timezone.now(),
+        expiry_reason=reason[:255],
+    )
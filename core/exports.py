@@ -0,0 +1,165 @@
+import csv
+import json
+import zlib
+from datetime import datetime, time
+from itertools import islice
+
+from django.db.models import F
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+from .models import BloodInventory, SOSAlert, SOSAlertArchive
+
+EXPORT_CHUNK_SIZE = 2000
+
+SOS_EXPORT_FIELDS = (
+    'id', 'created_at', 'status', 'donor_status', 'blood_type', 'patient_name', 'note',
+    'latitude', 'longitude', 'requester_username', 'requester_name', 'responder_name',
+    'preferred_hospital_name', 'donor_responder_name', 'expired_at', 'expiry_reason', 'feedback',
+)
+
+INVENTORY_EXPORT_FIELDS = (
+    'hospital_username', 'hospital_name', 'address',
+    'a_positive', 'a_negative', 'b_positive', 'b_negative',
+    'ab_positive', 'ab_negative', 'o_positive', 'o_negative',
+    'total', 'updated_at',
+)
+
+
+def parse_day(value, end_of_day=False):
+    """Turn ``YYYY-MM-DD`` into an aware datetime at the start (or end) of that day.
+
+    Returns None for anything else, including well-formed but impossible
+    dates such as ``2026-02-30``.
+    """
+    try:
+        day = parse_date(value or '')
+    except ValueError:
+        return None
+    if day is None:
+        return None
+    return timezone.make_aware(datetime.combine(day, time.max if end_of_day else time.min))
+
+
+def _display_name(first_name, username):
+    return first_name or username or ''
+
+
+def sos_rows(start=None, end=None, status=None, include_archived=False):
+    """Yield one dict per SOS alert with the related users' names joined in.
+
+    Reads via ``.values().iterator()`` so rows are streamed from the database
+    cursor in fixed-size chunks and never held in memory together.
+    """
+    sources = [SOSAlert.objects.all()]
+    if include_archived:
+        sources.append(SOSAlertArchive.objects.all())
+
+    for alerts in sources:
+        if start:
+            alerts = alerts.filter(created_at__gte=start)
+        if end:
+            alerts = alerts.filter(created_at__lte=end)
+        if status:
+            alerts = alerts.filter(status=status)
+        rows = alerts.order_by('id').values(
+            'id', 'created_at', 'status', 'donor_status', 'blood_type', 'patient_name', 'note',
+            'latitude', 'longitude', 'preferred_hospital_name', 'expired_at', 'expiry_reason', 'feedback',
+            requester_username=F('requester__username'),
+            requester_first_name=F('requester__first_name'),
+            responder_first_name=F('responder__first_name'),
+            responder_username=F('responder__username'),
+            donor_first_name=F('donor_responder__first_name'),
+            donor_username=F('donor_responder__username'),
+        )
+        for row in rows.iterator(chunk_size=EXPORT_CHUNK_SIZE):
+            row['requester_name'] = _display_name(row.pop('requester_first_name'), row['requester_username'])
+            row['responder_name'] = _display_name(row.pop('responder_first_name'), row.pop('responder_username'))
+            row['donor_responder_name'] = _display_name(row.pop('donor_first_name'), row.pop('donor_username'))
+            yield row
+
+
+def inventory_rows(start=None, end=None):
+    inventories = BloodInventory.objects.all()
+    if start:
+        inventories = inventories.filter(updated_at__gte=start)
+    if end:
+        inventories = inventories.filter(updated_at__lte=end)
+    rows = inventories.order_by('id').values(
+        'a_positive', 'a_negative', 'b_positive', 'b_negative',
+        'ab_positive', 'ab_negative', 'o_positive', 'o_negative', 'updated_at',
+        hospital_username=F('hospital__username'),
+        hospital_first_name=F('hospital__first_name'),
+        address=F('hospital__address'),
+    )
+    for row in rows.iterator(chunk_size=EXPORT_CHUNK_SIZE):
+        row['hospital_name'] = _display_name(row.pop('hospital_first_name'), row['hospital_username'])
+        row['total'] = sum(row[field] for field in INVENTORY_EXPORT_FIELDS[3:11])
+        yield row
+
+
+class _Echo:
+    """File-like object whose ``write`` just hands the line back to csv.writer."""
+
+    def write(self, value):
+        return value
+
+
+def _serialize(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+
+def csv_lines(rows, fields):
+    writer = csv.writer(_Echo())
+    yield writer.writerow(fields)
+    for row in rows:
+        yield writer.writerow([_serialize(row.get(field)) for field in fields])
+
+
+def jsonl_lines(rows, fields):
+    for row in rows:
+        yield json.dumps({field: _serialize(row.get(field)) for field in fields}) + '\n'
+
+
+def encode(lines, compress=False, lines_per_chunk=256):
+    """Join text lines into UTF-8 chunks, optionally gzip-compressing on the fly."""
+    compressor = zlib.compressobj(wbits=zlib.MAX_WBITS | 16) if compress else None  # gzip container
+    lines = iter(lines)
+    while True:
+        batch = list(islice(lines, lines_per_chunk))
+        if not batch:
+            break
+        data = ''.join(batch).encode('utf-8')
+        if compressor:
+            data = compressor.compress(data)
+        if data:
+            yield data
+    if compressor:
+        yield compressor.flush()
+
+
+EXPORTS = {
+    'sos': (sos_rows, SOS_EXPORT_FIELDS),
+    'inventory': (inventory_rows, INVENTORY_EXPORT_FIELDS),
+}
+
+WRITERS = {
+    'csv': (csv_lines, 'text/csv'),
+    'jsonl': (jsonl_lines, 'application/x-ndjson'),
+}
+
+
+def export_stream(kind, fmt='csv', compress=False, **filters):
+    """Return ``(byte_chunks, content_type, file_extension)`` for an export.
+
+    ``filters`` go to the row source: ``start``/``end`` for both kinds, plus
+    ``status`` and ``include_archived`` for ``sos``.
+    """
+    row_source, fields = EXPORTS[kind]
+    writer, content_type = WRITERS[fmt]
+    chunks = encode(writer(row_source(**filters), fields), compress=compress)
+    if compress:
+        return chunks, 'application/gzip', f'{fmt}.gz'
+    return chunks, content_type, fmt
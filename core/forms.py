@@ -1,7 +1,28 @@
+import csv
+import io
+
 from django import forms
+from django.conf import settings
 from django.contrib.auth.forms import AuthenticationForm
+from django.db.models import Value
+from django.db.models.functions import Lower
+
+from .models import BloodInventory, StockThreshold, User
+
 
-from .models import BloodInventory, User
+def _taken(field, value, instance=None):
+    """Whether another account already uses ``value`` for ``field``, ignoring case.
+
+    Filters on ``Lower(field)`` so the check is answered from the functional
+    unique index; blank emails sit outside that index and never clash. The
+    database lowercases both sides, exactly as the index does.
+    """
+    qs = User.objects.exclude(**{field: ''}).annotate(value_lower=Lower(field)).filter(
+        value_lower=Lower(Value(value))
+    )
+    if instance and instance.pk:
+        qs = qs.exclude(pk=instance.pk)
+    return qs.exists()
 
 
 class LoginForm(AuthenticationForm):
@@ -80,10 +101,7 @@ class SignUpForm(forms.ModelForm):
             return username
         if not username.isalnum():
             raise forms.ValidationError("Username must contain only letters and numbers.")
-        qs = User.objects.filter(username__iexact=username)
-        if self.instance and self.instance.pk:
-            qs = qs.exclude(pk=self.instance.pk)
-        if qs.exists():
+        if _taken('username', username, self.instance):
             raise forms.ValidationError("This username is already taken.")
         return username
 
@@ -91,10 +109,7 @@ class SignUpForm(forms.ModelForm):
         email = (self.cleaned_data.get('email') or '').strip()
         if not email:
             raise forms.ValidationError("Email is required.")
-        qs = User.objects.filter(email__iexact=email)
-        if self.instance and self.instance.pk:
-            qs = qs.exclude(pk=self.instance.pk)
-        if qs.exists():
+        if _taken('email', email, self.instance):
             raise forms.ValidationError("An account with this email already exists.")
         return email
 
@@ -136,6 +151,12 @@ class HospitalCreationForm(forms.ModelForm):
             'first_name': forms.TextInput(attrs={'placeholder': 'Official Hospital Name', 'class': 'form-control'}),
         }
 
+    def clean_username(self):
+        username = (self.cleaned_data.get('username') or '').strip()
+        if username and _taken('username', username):
+            raise forms.ValidationError("This username is already taken.")
+        return username
+
     def clean_password(self):
         password = self.cleaned_data.get('password')
         if not password or len(password) != 4 or not password.isdigit():
@@ -170,6 +191,21 @@ class InventoryForm(forms.ModelForm):
         }
 
 
+class StockThresholdForm(forms.ModelForm):
+    """Minimum units per blood type; blank fields use LIFELINE_LOW_STOCK_UNITS."""
+
+    class Meta:
+        model = StockThreshold
+        exclude = ('hospital',)
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        for field in self.fields.values():
+            field.widget.attrs.update({
+                'min': 0, 'class': 'form-control', 'placeholder': settings.LIFELINE_LOW_STOCK_UNITS,
+            })
+
+
 class HospitalUpdateForm(forms.ModelForm):
     password = forms.CharField(
         label="Reset Password (optional)",
@@ -203,10 +239,7 @@ class HospitalUpdateForm(forms.ModelForm):
         if not username.isalnum():
             raise forms.ValidationError("Username must contain only letters and numbers.")
 
-        qs = User.objects.filter(username=username)
-        if self.instance and self.instance.pk:
-            qs = qs.exclude(pk=self.instance.pk)
-        if qs.exists():
+        if _taken('username', username, self.instance):
             raise forms.ValidationError("This username is already taken.")
         return username
 
@@ -232,3 +265,39 @@ class DonorProfileForm(forms.ModelForm):
             'last_donation_date': forms.DateInput(attrs={'type': 'date', 'class': 'form-control'}),
             'address': forms.TextInput(attrs={'class': 'form-control'}),
         }
+
+    def clean_email(self):
+        email = (self.cleaned_data.get('email') or '').strip()
+        if email and _taken('email', email, self.instance):
+            raise forms.ValidationError("An account with this email already exists.")
+        return email
+
+
+class DonorImportForm(forms.Form):
+    csv_file = forms.FileField(
+        label="Donor CSV",
+        widget=forms.ClearableFileInput(attrs={'accept': '.csv,text/csv', 'class': 'form-control'}),
+    )
+
+    def clean_csv_file(self):
+        """Refuse files too big to import before the request times out."""
+        upload = self.cleaned_data['csv_file']
+        max_rows = settings.LIFELINE_IMPORT_UPLOAD_MAX_ROWS
+        too_big = forms.ValidationError(
+            f"Uploads are limited to {max_rows} donors; import larger files with the "
+            f"import_donors management command."
+        )
+        # No donor row comes close to 1 KB, so a bigger file has too many rows.
+        if upload.size > (max_rows + 1) * 1024:
+            raise too_big
+        stream = io.TextIOWrapper(upload.file, encoding='utf-8-sig', newline='')
+        try:
+            rows = sum(1 for _ in csv.reader(stream)) - 1  # minus the header
+        except (UnicodeDecodeError, csv.Error):
+            raise forms.ValidationError("The file is not a UTF-8 CSV.")
+        finally:
+            stream.detach()
+        upload.file.seek(0)
+        if rows > max_rows:
+            raise too_big
+        return upload
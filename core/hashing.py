@@ -0,0 +1,17 @@
+"""Password hashing helpers for process pools.
+
+Kept free of model imports so spawned worker processes can unpickle
+``hash_passwords`` before the app registry is ready.
+"""
+import os
+
+
+def init_worker(settings_module):
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', settings_module)
+    import django
+    django.setup()
+
+
+def hash_passwords(passwords):
+    from django.contrib.auth.hashers import make_password
+    return [make_password(password) for password in passwords]
@@ -0,0 +1,170 @@
+"""Coalesced writes for high-frequency user location updates.
+
+Fixes that move a user less than ``LIFELINE_LOCATION_MIN_DISTANCE_M`` are
+dropped. The rest are kept in the cache (latest fix per user wins) and
+written to ``User`` with one ``bulk_update`` every
+``LIFELINE_LOCATION_FLUSH_SECONDS``. Users waiting to be flushed are queued
+through numbered slots taken with an atomic ``incr``, so several workers
+can buffer into the same shared cache.
+
+Buffering is on only with ``LIFELINE_LOCATION_BUFFER`` (the default with a
+shared cache). A per-process cache would lose fixes whenever a worker is
+recycled and hide them from other workers and ``flush_locations``, so
+without one each kept fix is saved straight away.
+"""
+import time
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+
+from .backends import invalidate_users
+from .conditional import PEOPLE, bump
+from .models import User
+from .routing import distance_km
+
+PENDING_KEY = 'lifeline:location:pending:{}'
+QUEUED_KEY = 'lifeline:location:queued:{}'
+SLOT_KEY = 'lifeline:location:slot:{}'
+SEQUENCE_KEY = 'lifeline:location:seq'
+FLUSHED_KEY = 'lifeline:location:flushed'
+STALLED_KEY = 'lifeline:location:stalled'
+LAST_FLUSH_KEY = 'lifeline:location:last-flush'
+FLUSH_LOCK_KEY = 'lifeline:location:flush-lock'
+# Slot value left for a flushed user while an earlier slot is still unwritten.
+SLOT_DONE = 0
+# Buffered fixes survive plenty of missed flushes before the cache drops them.
+BUFFER_TIMEOUT = 24 * 60 * 60
+
+
+def pending_location(user_id):
+    """The buffered ``(latitude, longitude)`` for a user, or None."""
+    pending = cache.get(PENDING_KEY.format(user_id))
+    return pending[:2] if pending else None
+
+
+def apply_pending_location(user):
+    """Overlay the user's buffered fix so they read their own writes before a flush."""
+    pending = pending_location(user.pk)
+    if pending:
+        user.latitude, user.longitude = pending
+    return user
+
+
+def _next_slot():
+    try:
+        return cache.incr(SEQUENCE_KEY)
+    except ValueError:
+        cache.add(SEQUENCE_KEY, 0, None)
+        return cache.incr(SEQUENCE_KEY)
+
+
+def record_location(user, latitude, longitude):
+    """Buffer (or save) a new fix for ``user``.
+
+    Returns False when it is too close to the last known position to be
+    worth keeping.
+    """
+    last = pending_location(user.pk) or (user.latitude, user.longitude)
+    if None not in last:
+        moved_m = distance_km(last[0], last[1], latitude, longitude) * 1000
+        if moved_m < settings.LIFELINE_LOCATION_MIN_DISTANCE_M:
+            return False
+    if not settings.LIFELINE_LOCATION_BUFFER:
+        user.latitude, user.longitude = latitude, longitude
+        user.save(update_fields=['latitude', 'longitude'])
+        return True
+    cache.set(PENDING_KEY.format(user.pk), (latitude, longitude, time.time()), BUFFER_TIMEOUT)
+    # Queue the user once until the next flush, however many fixes arrive.
+    if cache.add(QUEUED_KEY.format(user.pk), 1, BUFFER_TIMEOUT):
+        cache.set(SLOT_KEY.format(_next_slot()), user.pk, BUFFER_TIMEOUT)
+    return True
+
+
+def _queued_users(slots):
+    return {user_id for user_id in slots.values() if user_id != SLOT_DONE}
+
+
+def _write(user_ids):
+    if not user_ids:
+        return 0
+    # Un-queue first: a fix arriving after this point queues the user again
+    # instead of being folded into a write that already read its position.
+    cache.delete_many([QUEUED_KEY.format(user_id) for user_id in user_ids])
+    pending = cache.get_many([PENDING_KEY.format(user_id) for user_id in user_ids])
+    fixes = {}
+    for user_id in user_ids:
+        fix = pending.get(PENDING_KEY.format(user_id))
+        if fix:
+            fixes[user_id] = fix
+    users = [User(pk=user_id, latitude=fix[0], longitude=fix[1]) for user_id, fix in fixes.items()]
+    User.objects.bulk_update(users, ['latitude', 'longitude'], batch_size=500)
+    invalidate_users(user.pk for user in users)
+    bump(PEOPLE)
+    # Keep serving the buffered fix for read-your-writes a little longer;
+    # the database has it now. A newer fix that arrived meanwhile is still
+    # waiting for the next flush and keeps its full timeout.
+    written = {PENDING_KEY.format(user_id): fix for user_id, fix in fixes.items()}
+    current = cache.get_many(list(written))
+    for key, fix in written.items():
+        if current.get(key) == fix:
+            cache.touch(key, 2 * settings.LIFELINE_LOCATION_FLUSH_SECONDS)
+    return len(users)
+
+
+def flush_locations(batch_size=1000):
+    """Write every buffered fix to the database. Returns the number of users updated.
+
+    Only one worker flushes at a time; the others return 0 straight away.
+    """
+    if not cache.add(FLUSH_LOCK_KEY, 1, 300):
+        return 0
+    try:
+        last = cache.get(SEQUENCE_KEY, 0)
+        first = cache.get(FLUSHED_KEY, 0) + 1
+        updated = 0
+        read = []
+        missing = []
+        for start in range(first, last + 1, batch_size):
+            numbers = range(start, min(start + batch_size, last + 1))
+            slots = cache.get_many([SLOT_KEY.format(n) for n in numbers])
+            # A slot can be numbered but not written yet by a worker
+            # mid-record_location; look again once the rest is done.
+            read.extend(n for n in numbers if SLOT_KEY.format(n) in slots)
+            missing.extend(n for n in numbers if SLOT_KEY.format(n) not in slots)
+            updated += _write(_queued_users(slots))
+        unwritten = []
+        if missing:
+            slots = cache.get_many([SLOT_KEY.format(n) for n in missing])
+            read.extend(n for n in missing if SLOT_KEY.format(n) in slots)
+            unwritten = [n for n in missing if SLOT_KEY.format(n) not in slots]
+            updated += _write(_queued_users(slots))
+        # Still missing a whole flush after it was first seen missing: the
+        # worker died before writing it, so stop waiting for it.
+        if unwritten and unwritten[0] == cache.get(STALLED_KEY):
+            unwritten = unwritten[1:]
+        flushed = last
+        if unwritten:
+            # Resume from the first unwritten slot so it isn't skipped. Slots
+            # after it stay behind as done markers, so the next flush can
+            # tell them from slots that were never written.
+            cache.set(STALLED_KEY, unwritten[0], None)
+            flushed = unwritten[0] - 1
+        cache.delete_many([SLOT_KEY.format(n) for n in read if n <= flushed])
+        cache.set_many({SLOT_KEY.format(n): SLOT_DONE for n in read if n > flushed}, BUFFER_TIMEOUT)
+        cache.set(FLUSHED_KEY, flushed, None)
+        cache.set(LAST_FLUSH_KEY, time.time(), None)
+        return updated
+    finally:
+        cache.delete(FLUSH_LOCK_KEY)
+
+
+def flush_if_due():
+    """Flush from a request when the last flush is older than the flush interval."""
+    if time.time() - cache.get(LAST_FLUSH_KEY, 0) >= settings.LIFELINE_LOCATION_FLUSH_SECONDS:
+        return flush_locations()
+    return 0
+
+
+arecord_location = sync_to_async(record_location)
+aflush_if_due = sync_to_async(flush_if_due)
@@ -0,0 +1,41 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from core.archive import archive_resolved_alerts
+
+
+class Command(BaseCommand):
+    help = "Move accepted/declined/expired SOS alerts older than the archive age into the archive table. Safe to run on cron."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--older-than-days',
+            type=int,
+            default=settings.LIFELINE_SOS_ARCHIVE_AFTER_DAYS,
+            help="Archive resolved alerts created more than this many days ago.",
+        )
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--sleep', type=float, default=0.0, help="Seconds to pause between batches.")
+        parser.add_argument('--dry-run', action='store_true', help="Only count the alerts that would be archived.")
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(days=options['older_than_days'])
+
+        def progress(moved, last_id):
+            if options['verbosity'] > 1:
+                self.stdout.write(f"  archived {moved} alert(s) up to id {last_id}")
+
+        moved = archive_resolved_alerts(
+            cutoff,
+            batch_size=max(1, options['batch_size']),
+            sleep=options['sleep'],
+            dry_run=options['dry_run'],
+            progress=progress,
+        )
+        if options['dry_run']:
+            self.stdout.write(f"{moved} alert(s) created before {cutoff:%Y-%m-%d} would be archived.")
+        else:
+            self.stdout.write(self.style.SUCCESS(f"Archived {moved} alert(s) created before {cutoff:%Y-%m-%d}."))
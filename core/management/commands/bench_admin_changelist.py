@@ -0,0 +1,115 @@
+import random
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.db.models import Q
+from django.test import Client
+
+from core.models import BloodInventory, SOSAlert, User
+
+
+class Command(BaseCommand):
+    help = (
+        "Time Django admin changelist pages against a large synthetic SOS alert table, "
+        "next to the count, filter and substring search queries they used to run. All rows are rolled back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--alerts', type=int, default=1_000_000)
+        parser.add_argument('--requesters', type=int, default=10_000)
+        parser.add_argument('--hospitals', type=int, default=2_000)
+        parser.add_argument('--repeat', type=int, default=10)
+        parser.add_argument('--batch-size', type=int, default=10_000)
+        parser.add_argument('--seed', type=int, default=1)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        blood_types = list(BloodInventory.FIELD_FOR_BLOOD_TYPE)
+        statuses = ['pending', 'accepted', 'declined', 'expired']
+        batch = options['batch_size']
+
+        with transaction.atomic():
+            started = time.monotonic()
+            User.objects.bulk_create([
+                User(username=f'benchpatient{n}', email=f'benchpatient{n}@example.com', password='!', role='patient')
+                for n in range(options['requesters'])
+            ], batch_size=batch)
+            hospitals = User.objects.bulk_create([
+                User(username=f'benchhospital{n}', email=f'benchhospital{n}@example.com', password='!', role='hospital')
+                for n in range(options['hospitals'])
+            ], batch_size=batch)
+            BloodInventory.objects.bulk_create([
+                BloodInventory(hospital=hospital, **{
+                    field: rng.randint(0, 30) for field in BloodInventory.FIELD_FOR_BLOOD_TYPE.values()
+                })
+                for hospital in hospitals
+            ], batch_size=batch)
+            requester_ids = list(User.objects.filter(username__startswith='benchpatient').values_list('pk', flat=True))
+            total = options['alerts']
+            for start in range(0, total, batch):
+                SOSAlert.objects.bulk_create([
+                    SOSAlert(
+                        requester_id=rng.choice(requester_ids), blood_type=rng.choice(blood_types),
+                        status=rng.choice(statuses), patient_name='Bench',
+                    )
+                    for _ in range(start, min(start + batch, total))
+                ])
+            with connection.cursor() as cursor:
+                cursor.execute('ANALYZE')
+            self.stdout.write(f"Inserted {total} alert(s) in {time.monotonic() - started:.1f}s.")
+
+            admin_user = User.objects.create(
+                username='benchadmin', email='benchadmin@example.com', role='admin',
+                is_staff=True, is_superuser=True,
+            )
+            client = Client()
+            client.force_login(admin_user)
+
+            def page(url):
+                def fetch():
+                    response = client.get(url)
+                    assert response.status_code == 200, (url, response.status_code)
+                return fetch
+
+            def timed(fn, repeat):
+                timings = []
+                for _ in range(repeat):
+                    began = time.perf_counter()
+                    fn()
+                    timings.append((time.perf_counter() - began) * 1000)
+                return statistics.median(timings)
+
+            repeat = options['repeat']
+            cases = [
+                ("alerts, first page", page('/admin/core/sosalert/')),
+                ("alerts, page 500", page('/admin/core/sosalert/?p=500')),
+                ("alerts, status=pending", page('/admin/core/sosalert/?status__exact=pending')),
+                ("alerts, requester search", page('/admin/core/sosalert/?q=BenchPatient42')),
+                ("users, first page", page('/admin/core/user/')),
+                ("users, email search", page('/admin/core/user/?q=benchpatient42@EXAMPLE.com')),
+                ("inventory, sorted by total stock", page('/admin/core/bloodinventory/?o=-3')),
+            ]
+            results = [(label, timed(fn, repeat)) for label, fn in cases]
+
+            # What the changelists ran before on every page: an exact count
+            # of the whole table, a SELECT DISTINCT over it for the blood
+            # type filter, and icontains searches that scan the user table.
+            before = [
+                ("exact COUNT(*) of alerts", lambda: SOSAlert.objects.count()),
+                ("blood_type filter DISTINCT", lambda: list(
+                    SOSAlert.objects.values_list('blood_type', flat=True).distinct().order_by('blood_type')
+                )),
+                ("user icontains search", lambda: list(
+                    User.objects.filter(
+                        Q(username__icontains='nomatch') | Q(first_name__icontains='nomatch')
+                        | Q(last_name__icontains='nomatch') | Q(email__icontains='nomatch')
+                    )[:100]
+                )),
+            ]
+            results += [(f"{label} (before)", timed(fn, max(3, repeat // 3))) for label, fn in before]
+            transaction.set_rollback(True)
+
+        for label, ms in results:
+            self.stdout.write(f"  {label + ':':<45} median {ms:8.2f} ms")
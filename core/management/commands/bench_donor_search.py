@@ -0,0 +1,84 @@
+import random
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.db.models import Q
+
+from core.donorsearch import decode_cursor, encode_cursor, search_donors
+from core.models import User
+from core.projections import DonorRow, project
+
+FIRST_NAMES = ['Aarav', 'Diya', 'Ishaan', 'Kavya', 'Rohan', 'Saanvi', 'Vihaan', 'Ananya', 'Arjun', 'Meera']
+STREETS = ['MG Road', 'Park Street', 'Linking Road', 'Brigade Road', 'Anna Salai', 'Chowringhee']
+
+
+def timed(run, repeat):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        run()
+        timings.append((time.perf_counter() - started) * 1000)
+    return statistics.median(timings)
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare the old donor list (every donor, blood group filter only) with indexed search and "
+        "keyset pages from core.donorsearch. All rows are rolled back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--donors', type=int, default=100_000)
+        parser.add_argument('--repeat', type=int, default=5)
+        parser.add_argument('--seed', type=int, default=1)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        total, repeat = options['donors'], options['repeat']
+        blood_groups = [value for value, _ in User.BLOOD_GROUP_CHOICES]
+        origin = (19.07, 72.87)
+
+        with transaction.atomic():
+            User.objects.bulk_create([
+                User(
+                    username=f'benchdonor{n}', email=f'benchdonor{n}@example.com', password='!',
+                    first_name=f'{rng.choice(FIRST_NAMES)} {n}', role='donor',
+                    blood_group=rng.choice(blood_groups),
+                    donor_availability=rng.choice(['available', 'available', 'pending']),
+                    address=f'{rng.randint(1, 400)} {rng.choice(STREETS)}',
+                    latitude=origin[0] + rng.uniform(-5, 5), longitude=origin[1] + rng.uniform(-5, 5),
+                )
+                for n in range(total)
+            ], batch_size=1000)
+            with connection.cursor() as cursor:
+                cursor.execute('ANALYZE' if connection.vendor in ('sqlite', 'postgresql') else 'SELECT 1')
+
+            # A cursor from deep in the list, as a reader paging far down gets.
+            deep = User.objects.filter(role='donor').order_by('first_name', 'username', 'id')[total // 2]
+            deep_cursor = decode_cursor(encode_cursor(deep))
+            # One donor's number: matches almost nothing, so a scan reads every row.
+            rare = str(total // 3)
+            everyone = User.objects.filter(role='donor').order_by('first_name', 'username')
+
+            cases = [
+                ("old: every donor", lambda: project(everyone.all(), DonorRow)),
+                ("old: blood group O-", lambda: project(everyone.filter(blood_group='O-'), DonorRow)),
+                (f"old-style icontains '{rare}'", lambda: project(everyone.filter(
+                    Q(username__icontains=rare) | Q(first_name__icontains=rare)
+                    | Q(address__icontains=rare))[:50], DonorRow)),
+                ("page 1", lambda: search_donors(origin=origin)),
+                ("page deep in the list", lambda: search_donors(origin=origin, after=deep_cursor)),
+                ("blood group O-, page 1", lambda: search_donors(blood_group='O-', origin=origin)),
+                (f"search '{rare}'", lambda: search_donors(rare, origin=origin)),
+                ("search 'park'", lambda: search_donors('park', origin=origin)),
+                ("search 'kavya park'", lambda: search_donors('kavya park', origin=origin)),
+                ("eligible within 25 km", lambda: search_donors(eligible=True, origin=origin, within_km=25)),
+            ]
+            results = [(label, timed(run, repeat)) for label, run in cases]
+            transaction.set_rollback(True)
+
+        self.stdout.write(f"{total} donors ({connection.vendor}), median of {repeat}:")
+        for label, ms in results:
+            self.stdout.write(f"  {label + ':':<32} {ms:9.1f} ms")
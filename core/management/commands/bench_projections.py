@@ -0,0 +1,82 @@
+import gc
+import random
+import statistics
+import time
+import tracemalloc
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from core.models import BloodInventory, SOSAlert, User
+from core.projections import AdminAlertRow, DonorRow, project
+
+
+def measure(load, repeat):
+    """Median load time in ms and the memory held by the loaded rows, in KiB."""
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        load()
+        timings.append((time.perf_counter() - started) * 1000)
+    gc.collect()
+    tracemalloc.start()
+    rows = load()
+    held = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del rows
+    return statistics.median(timings), held / 1024
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare loading list-view rows as full model instances with the __slots__ projection "
+        "rows (core.projections), per 10k rows. All rows are rolled back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=10_000)
+        parser.add_argument('--repeat', type=int, default=5)
+        parser.add_argument('--seed', type=int, default=1)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        total, repeat = options['rows'], options['repeat']
+        blood_types = list(BloodInventory.FIELD_FOR_BLOOD_TYPE)
+        # A real hash: full User rows carry it into every list.
+        password = make_password('bench-password')
+
+        with transaction.atomic():
+            donors = User.objects.bulk_create([
+                User(
+                    username=f'benchdonor{n}', email=f'benchdonor{n}@example.com', password=password,
+                    first_name=f'Donor {n}', role='donor', blood_group=rng.choice(blood_types),
+                    donor_availability='available', address=f'{n} Bench Street',
+                )
+                for n in range(total)
+            ], batch_size=1000)
+            SOSAlert.objects.bulk_create([
+                SOSAlert(
+                    requester=rng.choice(donors), responder=rng.choice(donors), blood_type=rng.choice(blood_types),
+                    patient_name=f'Patient {n}', note='Bench alert', status='accepted',
+                )
+                for n in range(total)
+            ], batch_size=1000)
+
+            donor_qs = User.objects.filter(username__startswith='benchdonor').order_by('first_name', 'username')
+            alert_qs = SOSAlert.objects.filter(patient_name__startswith='Patient ').order_by('-created_at')
+            cases = [
+                ("donor_list: User instances", lambda: list(donor_qs.all())),
+                ("donor_list: .only() instances", lambda: list(donor_qs.only(*DonorRow.fields))),
+                ("donor_list: DonorRow", lambda: project(donor_qs, DonorRow)),
+                ("admin alerts: select_related instances",
+                 lambda: list(alert_qs.select_related('requester', 'responder'))),
+                ("admin alerts: AdminAlertRow", lambda: project(alert_qs, AdminAlertRow)),
+            ]
+            results = [(label, *measure(load, repeat)) for label, load in cases]
+            transaction.set_rollback(True)
+
+        scale = 10_000 / total
+        self.stdout.write(f"Per 10k rows ({total} loaded):")
+        for label, ms, kib in results:
+            self.stdout.write(f"  {label + ':':<42} {ms * scale:8.1f} ms  {kib * scale / 1024:7.2f} MiB")
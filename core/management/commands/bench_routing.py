@@ -0,0 +1,82 @@
+import random
+import statistics
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connection, reset_queries, transaction
+
+from core.models import BloodInventory, SOSAlert, User
+from core.routing import rank_hospitals, route_alert
+
+
+class Command(BaseCommand):
+    help = "Time SOS routing against a synthetic set of hospitals. All rows are rolled back afterwards."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--hospitals', type=int, default=5000)
+        parser.add_argument('--alerts', type=int, default=200)
+        parser.add_argument('--spread', type=float, default=2.0, help="Degrees around the centre hospitals are scattered over.")
+        parser.add_argument('--seed', type=int, default=1)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        centre_lat, centre_lon, spread = 28.61, 77.21, options['spread']
+        blood_types = list(BloodInventory.FIELD_FOR_BLOOD_TYPE)
+
+        with transaction.atomic():
+            hospitals = User.objects.bulk_create([
+                User(
+                    username=f'benchhospital{i}', email=f'benchhospital{i}@example.com', role='hospital',
+                    latitude=centre_lat + rng.uniform(-spread, spread),
+                    longitude=centre_lon + rng.uniform(-spread, spread),
+                )
+                for i in range(options['hospitals'])
+            ], batch_size=1000)
+            BloodInventory.objects.bulk_create([
+                BloodInventory(hospital=hospital, **{
+                    field: rng.choice((0, 0, 1, 3, 8, 20)) for field in BloodInventory.FIELD_FOR_BLOOD_TYPE.values()
+                })
+                for hospital in hospitals
+            ], batch_size=1000)
+            requester = User.objects.create(username='benchpatient', email='benchpatient@example.com', role='patient')
+
+            timings, shortlists, queries = [], [], []
+            debug, settings.DEBUG = settings.DEBUG, True
+            try:
+                for _ in range(options['alerts']):
+                    alert = SOSAlert.objects.create(
+                        requester=requester,
+                        blood_type=rng.choice(blood_types),
+                        latitude=centre_lat + rng.uniform(-spread, spread),
+                        longitude=centre_lon + rng.uniform(-spread, spread),
+                    )
+                    reset_queries()
+                    started = time.perf_counter()
+                    routes = route_alert(alert)
+                    timings.append((time.perf_counter() - started) * 1000)
+                    queries.append(len(connection.queries))
+                    shortlists.append(len(routes))
+            finally:
+                settings.DEBUG = debug
+
+            started = time.perf_counter()
+            rank_hospitals('O-', centre_lat, centre_lon, radius_km=spread * 111)
+            full_scan_ms = (time.perf_counter() - started) * 1000
+            transaction.set_rollback(True)
+
+        timings.sort()
+        self.stdout.write(
+            f"{options['alerts']} alert(s) over {options['hospitals']} hospital(s), "
+            f"radius {settings.LIFELINE_ROUTING_RADIUS_KM} km:"
+        )
+        self.stdout.write(
+            f"  route_alert: median {statistics.median(timings):.2f} ms, "
+            f"p95 {timings[int(len(timings) * 0.95) - 1]:.2f} ms, "
+            f"{statistics.mean(queries):.1f} queries/alert"
+        )
+        self.stdout.write(
+            f"  routed {sum(1 for n in shortlists if n)} of {len(shortlists)} alert(s), "
+            f"mean shortlist {statistics.mean(shortlists):.2f}"
+        )
+        self.stdout.write(f"  ranking every hospital (no bounding box benefit): {full_scan_ms:.1f} ms")
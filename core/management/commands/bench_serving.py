@@ -0,0 +1,138 @@
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import threading
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.test import Client
+
+from core.models import User
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def slow_overpass_handler(delay):
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            self.rfile.read(int(self.headers.get('Content-Length') or 0))
+            time.sleep(delay)
+            body = json.dumps({'elements': [
+                {'type': 'node', 'id': 1, 'lat': 28.61, 'lon': 77.21, 'tags': {'name': 'Bench Hospital'}},
+            ]}).encode('utf-8')
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    return Handler
+
+
+class Command(BaseCommand):
+    help = "Measure osm_nearby_hospitals throughput behind a slow Overpass upstream in WSGI and ASGI serving modes."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=200)
+        parser.add_argument('--concurrency', type=int, default=50)
+        parser.add_argument('--upstream-delay', type=float, default=0.5, help="Seconds the fake Overpass waits per call.")
+        parser.add_argument('--workers', type=int, default=1)
+        parser.add_argument('--threads', type=int, default=8, help="gthread threads per worker in WSGI mode.")
+        parser.add_argument('--modes', nargs='+', choices=('wsgi', 'asgi'), default=['wsgi', 'asgi'])
+
+    def handle(self, *args, **options):
+        upstream = ThreadingHTTPServer(('127.0.0.1', 0), slow_overpass_handler(options['upstream_delay']))
+        upstream.daemon_threads = True
+        threading.Thread(target=upstream.serve_forever, daemon=True).start()
+        upstream_url = f"http://127.0.0.1:{upstream.server_address[1]}/api/interpreter"
+
+        user, _ = User.objects.get_or_create(username='benchserving', defaults={'role': 'user'})
+        client = Client()
+        client.force_login(user)
+        cookie = f"{settings.SESSION_COOKIE_NAME}={client.cookies[settings.SESSION_COOKIE_NAME].value}"
+
+        self.stdout.write(
+            f"{options['requests']} requests, concurrency {options['concurrency']}, "
+            f"upstream delay {options['upstream_delay']:.2f}s, {options['workers']} worker(s)"
+        )
+        try:
+            for mode in options['modes']:
+                port = free_port()
+                env = dict(
+                    os.environ,
+                    PORT=str(port),
+                    LIFELINE_SERVE_MODE=mode,
+                    WEB_CONCURRENCY=str(options['workers']),
+                    GUNICORN_THREADS=str(options['threads']),
+                    GUNICORN_ACCESS_LOG='',
+                    GUNICORN_LOG_LEVEL='warning',
+                    LIFELINE_OVERPASS_URL=upstream_url,
+                    LIFELINE_RATE_LIMIT_ENABLED='0',
+                )
+                server = subprocess.Popen(
+                    [sys.executable, '-m', 'gunicorn', '-c', str(settings.BASE_DIR / 'gunicorn.conf.py')],
+                    cwd=settings.BASE_DIR,
+                    env=env,
+                )
+                try:
+                    base = f"http://127.0.0.1:{port}"
+                    self._wait_until_ready(base)
+                    self._report(mode, self._load(base, cookie, options))
+                finally:
+                    server.terminate()
+                    server.wait(timeout=30)
+        finally:
+            upstream.shutdown()
+
+    def _wait_until_ready(self, base, deadline=30):
+        started = time.monotonic()
+        while time.monotonic() - started < deadline:
+            try:
+                with urllib.request.urlopen(f"{base}/healthz", timeout=1):
+                    return
+            except OSError:
+                time.sleep(0.2)
+        raise CommandError(f"Server at {base} did not become healthy within {deadline}s.")
+
+    def _load(self, base, cookie, options):
+        url = f"{base}/api/osm/hospitals/?latitude=28.61&longitude=77.21&radius=1000"
+
+        def fetch(_):
+            request = urllib.request.Request(url, headers={'Cookie': cookie})
+            started = time.perf_counter()
+            try:
+                with urllib.request.urlopen(request, timeout=120) as resp:
+                    ok = resp.status == 200 and json.loads(resp.read()).get('ok')
+            except Exception:
+                ok = False
+            return ok, time.perf_counter() - started
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=options['concurrency']) as pool:
+            results = list(pool.map(fetch, range(options['requests'])))
+        elapsed = time.perf_counter() - started
+        return elapsed, results
+
+    def _report(self, mode, measurement):
+        elapsed, results = measurement
+        latencies = sorted(latency for _, latency in results)
+        ok = sum(1 for success, _ in results if success)
+        p95 = latencies[int(len(latencies) * 0.95) - 1] if latencies else 0
+        self.stdout.write(
+            f"{mode:>5}: {ok}/{len(results)} ok, {len(results) / elapsed:7.1f} req/s, "
+            f"p50 {statistics.median(latencies) * 1000:7.0f} ms, p95 {p95 * 1000:7.0f} ms"
+        )
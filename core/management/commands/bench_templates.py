@@ -0,0 +1,91 @@
+import statistics
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.template import Context, Engine
+from django.template.backends.django import get_installed_libraries
+from django.test import Client
+from django.test.signals import template_rendered
+from django.test.utils import setup_test_environment, teardown_test_environment
+
+from core.models import User
+
+LOADERS = [
+    'django.template.loaders.filesystem.Loader',
+    'django.template.loaders.app_directories.Loader',
+]
+
+
+def engine(cached, debug):
+    return Engine(
+        dirs=settings.TEMPLATES[0]['DIRS'],
+        debug=debug,
+        loaders=[('django.template.loaders.cached.Loader', LOADERS)] if cached else LOADERS,
+        libraries=get_installed_libraries(),
+    )
+
+
+class Command(BaseCommand):
+    help = (
+        "Time rendering each page's template: re-parsed from disk on every render (DEBUG-style), "
+        "with the cached loader, and with the cached loader plus {% cache %} fragments."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repeat', type=int, default=200)
+
+    def capture_contexts(self):
+        """Render each page once through its view and keep the template name and context."""
+        pages = [(None, 'login', '/login/'), (None, 'signup', '/signup/')]
+        for role in ('user', 'hospital', 'admin', 'donor'):
+            user = User.objects.filter(role=role, is_active=True).first()
+            if user is None:
+                raise CommandError(f"Needs at least one active {role!r} account to render its dashboard.")
+            pages.append((user, f'{role} dashboard', '/'))
+        pages.append((User.objects.filter(role='user').first(), 'donor list', '/donors/'))
+
+        captured = []
+
+        def grab(sender, template, context, **kwargs):
+            if not captured or captured[-1][0] is None:
+                captured[-1] = (template.name, context.flatten())
+
+        setup_test_environment()
+        template_rendered.connect(grab)
+        try:
+            for user, label, url in pages:
+                client = Client()
+                if user is not None:
+                    client.force_login(user)
+                captured.append((None, None))
+                response = client.get(url)
+                if response.status_code != 200:
+                    raise CommandError(f"{url} returned {response.status_code}.")
+                yield label, *captured[-1]
+        finally:
+            template_rendered.disconnect(grab)
+            teardown_test_environment()
+
+    def handle(self, *args, **options):
+        repeat = options['repeat']
+        modes = [
+            ("re-parse", engine(cached=False, debug=True), 0),
+            ("cached loader", engine(cached=True, debug=False), 0),
+            ("cached + fragments", engine(cached=True, debug=False), 600),
+        ]
+        self.stdout.write(f"{'page':<20}" + "".join(f"{label:>22}" for label, _, _ in modes) + "   (median ms per render)")
+        for label, name, context in self.capture_contexts():
+            row = []
+            for _, template_engine, fragment_seconds in modes:
+                values = {**context, 'fragment_cache_seconds': fragment_seconds, 'fragment_version': 'bench'}
+                cache.clear()
+                template_engine.get_template(name).render(Context(values))  # warm loader and fragments
+                timings = []
+                for _ in range(repeat):
+                    started = time.perf_counter()
+                    template_engine.get_template(name).render(Context(values))
+                    timings.append((time.perf_counter() - started) * 1000)
+                row.append(statistics.median(timings))
+            self.stdout.write(f"{label:<20}" + "".join(f"{ms:>22.3f}" for ms in row))
@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+
+from core.assets import OUTPUT_DIR, build_all
+
+
+class Command(BaseCommand):
+    help = "Bundle and minify the front-end assets into core/static/bundles. Run before collectstatic."
+
+    def handle(self, *args, **options):
+        for name, source_bytes, bundle_bytes in build_all():
+            self.stdout.write(f"  {name:<10} {source_bytes / 1024:8.1f} KiB -> {bundle_bytes / 1024:8.1f} KiB")
+        self.stdout.write(self.style.SUCCESS(f"Wrote bundles to {OUTPUT_DIR}."))
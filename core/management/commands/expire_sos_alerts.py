@@ -0,0 +1,58 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from core.expiry import escalate_unanswered_alerts, expire_stale_alerts
+
+
+class Command(BaseCommand):
+    help = (
+        "Escalate pending SOS alerts their chosen hospital never answered, and expire "
+        "pending alerts nobody answered. Idempotent; safe to run on cron."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--escalate-after-minutes',
+            type=int,
+            default=settings.LIFELINE_SOS_ESCALATE_AFTER_MINUTES,
+            help="Send alerts aimed at one hospital to every hospital after this many minutes (0 disables).",
+        )
+        parser.add_argument(
+            '--expire-after-hours',
+            type=int,
+            default=settings.LIFELINE_SOS_EXPIRE_AFTER_HOURS,
+            help="Expire alerts still pending after this many hours.",
+        )
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument('--dry-run', action='store_true', help="Only count the alerts that would change.")
+
+    def handle(self, *args, **options):
+        now = timezone.now()
+        batch_size = max(1, options['batch_size'])
+        dry_run = options['dry_run']
+
+        escalated = 0
+        if options['escalate_after_minutes'] > 0:
+            escalated = escalate_unanswered_alerts(
+                now - timedelta(minutes=options['escalate_after_minutes']),
+                batch_size=batch_size,
+                dry_run=dry_run,
+            )
+
+        hours = options['expire_after_hours']
+        expired = expire_stale_alerts(
+            now - timedelta(hours=hours),
+            reason=f"No hospital responded within {hours} hour(s).",
+            batch_size=batch_size,
+            dry_run=dry_run,
+        )
+
+        if dry_run:
+            self.stdout.write(f"Would escalate {escalated} alert(s) to all hospitals and expire {expired} alert(s).")
+        else:
+            self.stdout.write(self.style.SUCCESS(
+                f"Escalated {escalated} alert(s) to all hospitals and expired {expired} alert(s)."
+            ))
@@ -0,0 +1,42 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.exports import EXPORTS, WRITERS, export_stream, parse_day
+
+
+class Command(BaseCommand):
+    help = "Stream SOS alert or blood inventory history as CSV or JSON lines, optionally gzip-compressed."
+
+    def add_arguments(self, parser):
+        parser.add_argument('kind', choices=sorted(EXPORTS))
+        parser.add_argument('--format', dest='fmt', choices=sorted(WRITERS), default='csv')
+        parser.add_argument('--gzip', action='store_true')
+        parser.add_argument('--output', '-o', help="File to write (default: stdout).")
+        parser.add_argument('--start', help="Only rows on or after this date (YYYY-MM-DD).")
+        parser.add_argument('--end', help="Only rows on or before this date (YYYY-MM-DD).")
+        parser.add_argument('--status', help="SOS only: filter by hospital status.")
+        parser.add_argument('--history', action='store_true', help="SOS only: include archived alerts.")
+
+    def handle(self, *args, **options):
+        filters = {
+            'start': parse_day(options['start']),
+            'end': parse_day(options['end'], end_of_day=True),
+        }
+        if options['start'] and filters['start'] is None:
+            raise CommandError("--start must be YYYY-MM-DD.")
+        if options['end'] and filters['end'] is None:
+            raise CommandError("--end must be YYYY-MM-DD.")
+        if options['kind'] == 'sos':
+            filters['status'] = options['status']
+            filters['include_archived'] = options['history']
+
+        chunks, _, _ = export_stream(options['kind'], options['fmt'], compress=options['gzip'], **filters)
+        if options['output']:
+            with open(options['output'], 'wb') as out:
+                for chunk in chunks:
+                    out.write(chunk)
+        else:
+            for chunk in chunks:
+                sys.stdout.buffer.write(chunk)
+            sys.stdout.buffer.flush()
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from core.locations import flush_locations
+
+
+class Command(BaseCommand):
+    help = "Write buffered user location updates to the database."
+
+    def handle(self, *args, **options):
+        updated = flush_locations()
+        self.stdout.write(self.style.SUCCESS(f"Flushed locations for {updated} user(s)."))
@@ -0,0 +1,16 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from core.alertclusters import rebuild
+
+
+class Command(BaseCommand):
+    help = "Recompute the precomputed map clusters of pending SOS alerts."
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        written = rebuild()
+        self.stdout.write(self.style.SUCCESS(
+            f"Rebuilt {written} alert cluster cell(s) in {time.monotonic() - started:.1f}s."
+        ))
@@ -0,0 +1,21 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+
+from core.donorsearch import rebuild
+
+
+class Command(BaseCommand):
+    help = "Re-index every donor for the donor directory search."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--database', default=DEFAULT_DB_ALIAS)
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        with transaction.atomic(using=options['database']):
+            rebuild(connections[options['database']])
+        self.stdout.write(self.style.SUCCESS(
+            f"Rebuilt the donor search index in {time.monotonic() - started:.1f}s."
+        ))
@@ -0,0 +1,16 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from core.stockgrid import rebuild
+
+
+class Command(BaseCommand):
+    help = "Recompute the regional blood stock grid from hospitals and their inventory."
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        written = rebuild()
+        self.stdout.write(self.style.SUCCESS(
+            f"Rebuilt {written} stock grid cell(s) in {time.monotonic() - started:.1f}s."
+        ))
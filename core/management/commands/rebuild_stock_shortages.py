@@ -0,0 +1,16 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from core.shortages import rebuild
+
+
+class Command(BaseCommand):
+    help = "Recompute low-stock shortages from hospital inventory and minimums. No alerts are sent."
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        written = rebuild()
+        self.stdout.write(self.style.SUCCESS(
+            f"Found {written} shortage(s) in {time.monotonic() - started:.1f}s."
+        ))
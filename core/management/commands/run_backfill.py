@@ -0,0 +1,49 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from core.backfill import BACKFILLS, run_backfill
+from core.models import BackfillCheckpoint
+
+
+class Command(BaseCommand):
+    help = (
+        "Run a named data backfill in committed primary-key chunks, resuming from its "
+        "checkpoint if an earlier run was interrupted."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('name', nargs='?', help="Backfill to run; omit to list them with their progress.")
+        parser.add_argument('--batch-size', type=int, default=None, help="Rows per chunk (LIFELINE_BACKFILL_BATCH_SIZE).")
+        parser.add_argument('--sleep', type=float, default=None, help="Seconds to pause between chunks (LIFELINE_BACKFILL_SLEEP_SECONDS).")
+        parser.add_argument('--restart', action='store_true', help="Ignore the checkpoint and start from the first row.")
+
+    def handle(self, *args, **options):
+        name = options['name']
+        if not name:
+            checkpoints = {c.name: c for c in BackfillCheckpoint.objects.filter(name__in=list(BACKFILLS))}
+            for backfill_name in sorted(BACKFILLS):
+                checkpoint = checkpoints.get(backfill_name)
+                if checkpoint is None:
+                    state = "never run"
+                elif checkpoint.completed_at:
+                    state = f"completed {checkpoint.completed_at:%Y-%m-%d %H:%M}, {checkpoint.rows} row(s)"
+                else:
+                    state = f"interrupted at pk {checkpoint.last_pk}, {checkpoint.rows} row(s)"
+                self.stdout.write(f"{backfill_name}: {state}")
+            return
+        if name not in BACKFILLS:
+            raise CommandError(f"Unknown backfill {name!r}. Choose from: {', '.join(sorted(BACKFILLS))}.")
+
+        def progress(backfill_name, rows, last_pk, max_pk, elapsed):
+            self.stdout.write(
+                f"  {backfill_name}: {rows} row(s), pk {last_pk}/{max_pk} "
+                f"({rows / elapsed if elapsed else rows:.0f} rows/s)"
+            )
+
+        rows = run_backfill(
+            BACKFILLS[name](),
+            batch_size=options['batch_size'],
+            sleep=options['sleep'],
+            restart=options['restart'],
+            progress=progress if options['verbosity'] > 0 else None,
+        )
+        self.stdout.write(self.style.SUCCESS(f"{name}: updated {rows} row(s)."))
@@ -1,13 +1,177 @@
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection
+from django.db.migrations.executor import MigrationExecutor
+from django.http import JsonResponse
 from django.utils.cache import add_never_cache_headers
 
+from .replicas import PIN_COOKIE, SAFE_METHODS, replica_configured
+
+
+class HealthCheckMiddleware:
+    """Answer /healthz and /readyz before sessions, auth and CSRF run.
+
+    Must sit at the top of MIDDLEWARE so probes never touch the session
+    table or render a template.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    LIVENESS_PATHS = {'/healthz', '/healthz/'}
+    READINESS_PATHS = {'/readyz', '/readyz/'}
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.started_at = time.monotonic()
+        # Once every migration is applied it stays applied for the life of
+        # the process, so the (relatively slow) migration plan is only
+        # computed until it first comes back empty.
+        self.migrations_applied = None
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if request.path in self.LIVENESS_PATHS:
+            return self.liveness()
+        if request.path in self.READINESS_PATHS:
+            return self.readiness()
+        return self.get_response(request)
+
+    async def __acall__(self, request):
+        if request.path in self.LIVENESS_PATHS:
+            return self.liveness()
+        if request.path in self.READINESS_PATHS:
+            return await sync_to_async(self.readiness)()
+        return await self.get_response(request)
+
+    def liveness(self):
+        return self._respond({
+            'status': 'ok',
+            'uptime_seconds': self._uptime(),
+            'migrations_applied': self.migrations_applied,
+        })
+
+    def readiness(self):
+        checks = {
+            'database': self._check_database(),
+            'cache': self._check_cache(),
+        }
+        if checks['database']:
+            checks['migrations'] = self._check_migrations()
+        else:
+            checks['migrations'] = False
+        ready = all(checks.values())
+        return self._respond(
+            {
+                'status': 'ok' if ready else 'unavailable',
+                'uptime_seconds': self._uptime(),
+                'migrations_applied': self.migrations_applied,
+                'checks': checks,
+            },
+            status=200 if ready else 503,
+        )
+
+    def _uptime(self):
+        return round(time.monotonic() - self.started_at, 1)
+
+    def _check_database(self):
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute('SELECT 1')
+                cursor.fetchone()
+        except Exception:
+            return False
+        return True
+
+    def _check_cache(self):
+        try:
+            cache.set('lifeline:readyz', 1, 10)
+            return cache.get('lifeline:readyz') == 1
+        except Exception:
+            return False
+
+    def _check_migrations(self):
+        if self.migrations_applied:
+            return True
+        try:
+            executor = MigrationExecutor(connection)
+            plan = executor.migration_plan(executor.loader.graph.leaf_nodes())
+        except Exception:
+            return False
+        self.migrations_applied = not plan
+        return self.migrations_applied
+
+    def _respond(self, payload, status=200):
+        response = JsonResponse(payload, status=status)
+        add_never_cache_headers(response)
+        return response
+
 
 class DisableClientCacheMiddleware:
+    """Keep signed-in pages out of browser and proxy caches.
+
+    Views that set their own ``Cache-Control`` (the conditional GETs in
+    ``core.conditional``) keep it.
+    """
+
+    sync_capable = True
+    async_capable = True
+
     def __init__(self, get_response):
         self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
 
     def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
         response = self.get_response(request)
-        if request.user.is_authenticated:
+        if request.user.is_authenticated and not response.has_header('Cache-Control'):
             add_never_cache_headers(response)
         return response
 
+    async def __acall__(self, request):
+        response = await self.get_response(request)
+        user = await request.auser()
+        if user.is_authenticated and not response.has_header('Cache-Control'):
+            add_never_cache_headers(response)
+        return response
+
+
+class ReplicaPinMiddleware:
+    """Keep a browser reading from the primary for a while after it writes.
+
+    Any request with an unsafe method (POST, PUT, ...) sets a short-lived
+    cookie that ``core.replicas.read_replica`` honours. A no-op when no
+    replica is configured.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        return self.pin(request, self.get_response(request))
+
+    async def __acall__(self, request):
+        return self.pin(request, await self.get_response(request))
+
+    def pin(self, request, response):
+        if request.method not in SAFE_METHODS and replica_configured():
+            response.set_cookie(
+                PIN_COOKIE, '1',
+                max_age=settings.LIFELINE_REPLICA_PIN_SECONDS,
+                httponly=True, samesite='Lax', secure=request.is_secure(),
+            )
+        return response
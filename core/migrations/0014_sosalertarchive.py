@@ -0,0 +1,65 @@
+# Generated by Django 5.2.18 on 2026-10-19 00:32
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0013_sosalert_feedback'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SOSAlertArchive',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('patient_name', models.CharField(default='Unknown', max_length=100)),
+                ('blood_type', models.CharField(max_length=5)),
+                ('note', models.TextField(blank=True)),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('accepted', 'Accepted'), ('declined', 'Declined')], max_length=10)),
+                ('created_at', models.DateTimeField()),
+                ('latitude', models.FloatField(null=True)),
+                ('longitude', models.FloatField(null=True)),
+                ('preferred_hospital_name', models.CharField(blank=True, default='', max_length=255)),
+                ('donor_status', models.CharField(choices=[('pending', 'Pending'), ('accepted', 'Accepted'), ('declined', 'Declined')], default='pending', max_length=10)),
+                ('feedback', models.TextField(blank=True, default='')),
+                ('archived_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='sosalert',
+            index=models.Index(fields=['status', 'created_at'], name='core_sos_status_created_idx'),
+        ),
+        migrations.AddField(
+            model_name='sosalertarchive',
+            name='donor_responder',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddField(
+            model_name='sosalertarchive',
+            name='preferred_hospital',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddField(
+            model_name='sosalertarchive',
+            name='requester',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddField(
+            model_name='sosalertarchive',
+            name='responder',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddIndex(
+            model_name='sosalertarchive',
+            index=models.Index(fields=['requester', 'created_at'], name='core_sosarch_requester_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='sosalertarchive',
+            index=models.Index(fields=['created_at'], name='core_sosarch_created_idx'),
+        ),
+    ]
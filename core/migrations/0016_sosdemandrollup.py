@@ -0,0 +1,60 @@
+# Generated by Django 5.2.18 on 2026-10-19 00:34
+
+from django.db import migrations, models
+from django.conf import settings
+
+import math
+from collections import Counter
+
+
+def count_existing_alerts(apps, schema_editor):
+    # New alerts and status changes add deltas to these rows, so they must
+    # start out counting the alerts already in the database.
+    SOSAlert = apps.get_model('core', 'SOSAlert')
+    SOSAlertArchive = apps.get_model('core', 'SOSAlertArchive')
+    SOSDemandRollup = apps.get_model('core', 'SOSDemandRollup')
+    db = schema_editor.connection.alias
+    size = getattr(settings, 'LIFELINE_ROLLUP_CELL_DEGREES', 0.5)
+    counts = Counter()
+    for model in (SOSAlert, SOSAlertArchive):
+        rows = model.objects.using(db).values_list('created_at', 'blood_type', 'latitude', 'longitude', 'status')
+        for created_at, blood_type, latitude, longitude, status in rows.iterator(chunk_size=5000):
+            cell = ''
+            if latitude is not None and longitude is not None:
+                cell = f"{math.floor(latitude / size) * size:.2f},{math.floor(longitude / size) * size:.2f}"
+            bucket = created_at.replace(minute=0, second=0, microsecond=0)
+            counts[(bucket, blood_type or '', cell, status)] += 1
+    SOSDemandRollup.objects.using(db).bulk_create([
+        SOSDemandRollup(bucket=bucket, blood_type=blood_type, geo_cell=cell, outcome=outcome, count=count)
+        for (bucket, blood_type, cell, outcome), count in counts.items()
+    ], batch_size=1000)
+
+
+def noop_reverse(apps, schema_editor):
+    pass
+
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0015_sosalert_expiry'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SOSDemandRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('bucket', models.DateTimeField()),
+                ('blood_type', models.CharField(max_length=5)),
+                ('geo_cell', models.CharField(blank=True, default='', max_length=24)),
+                ('outcome', models.CharField(choices=[('pending', 'Pending'), ('accepted', 'Accepted'), ('declined', 'Declined'), ('expired', 'Expired')], max_length=10)),
+                ('count', models.IntegerField(default=0)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('bucket', 'blood_type', 'geo_cell', 'outcome'), name='core_sosrollup_unique_key')],
+            },
+        ),
+        migrations.RunPython(count_existing_alerts, noop_reverse),
+    ]
@@ -0,0 +1,61 @@
+# Generated by Django 5.2.18 on 2026-10-19 00:44
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('core', '0016_sosdemandrollup'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SOSRoute',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('rank', models.PositiveSmallIntegerField()),
+                ('score', models.FloatField()),
+                ('distance_km', models.FloatField()),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+            options={
+                'ordering': ('alert', 'rank'),
+            },
+        ),
+        migrations.AlterModelOptions(
+            name='user',
+            options={},
+        ),
+        migrations.AddField(
+            model_name='sosalert',
+            name='routed_until',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(fields=['role', 'latitude', 'longitude'], name='core_user_role_geo_idx'),
+        ),
+        migrations.AddField(
+            model_name='sosroute',
+            name='alert',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='routes', to='core.sosalert'),
+        ),
+        migrations.AddField(
+            model_name='sosroute',
+            name='hospital',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='sos_routes', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddIndex(
+            model_name='sosroute',
+            index=models.Index(fields=['hospital', 'alert'], name='core_sosroute_hospital_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='sosroute',
+            constraint=models.UniqueConstraint(fields=('alert', 'hospital'), name='core_sosroute_unique_hospital'),
+        ),
+    ]
@@ -0,0 +1,72 @@
+# Generated by Django 5.2.18 on 2026-10-19 00:48
+
+from django.db import migrations, models
+
+import math
+from collections import Counter, defaultdict
+
+# (level, cell size in degrees) as in core.stockgrid.GRID_LEVELS.
+GRID_LEVELS = ((0, 4.0), (1, 1.0), (2, 0.25))
+STOCK_FIELDS = (
+    'a_positive', 'a_negative', 'b_positive', 'b_negative',
+    'ab_positive', 'ab_negative', 'o_positive', 'o_negative',
+)
+
+
+def count_existing_hospitals(apps, schema_editor):
+    # Later edits move hospitals between cells by deltas, so the cells must
+    # start out holding the hospitals and stock already in the database.
+    User = apps.get_model('core', 'User')
+    StockGridCell = apps.get_model('core', 'StockGridCell')
+    db = schema_editor.connection.alias
+    cells = defaultdict(Counter)
+    hospitals = User.objects.using(db).filter(
+        role='hospital', latitude__isnull=False, longitude__isnull=False,
+    ).values_list('latitude', 'longitude', *[f'inventory__{field}' for field in STOCK_FIELDS])
+    for latitude, longitude, *stock in hospitals.iterator(chunk_size=2000):
+        for level, size in GRID_LEVELS:
+            cell = cells[(level, math.floor(latitude / size), math.floor(longitude / size))]
+            cell['hospitals'] += 1
+            for field, units in zip(STOCK_FIELDS, stock):
+                cell[field] += units or 0
+    StockGridCell.objects.using(db).bulk_create([
+        StockGridCell(level=level, row=row, col=col, **counts)
+        for (level, row, col), counts in cells.items()
+    ], batch_size=1000)
+
+
+def noop_reverse(apps, schema_editor):
+    pass
+
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0017_sos_routing'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StockGridCell',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('level', models.PositiveSmallIntegerField()),
+                ('row', models.IntegerField()),
+                ('col', models.IntegerField()),
+                ('hospitals', models.IntegerField(default=0)),
+                ('a_positive', models.IntegerField(default=0)),
+                ('a_negative', models.IntegerField(default=0)),
+                ('b_positive', models.IntegerField(default=0)),
+                ('b_negative', models.IntegerField(default=0)),
+                ('ab_positive', models.IntegerField(default=0)),
+                ('ab_negative', models.IntegerField(default=0)),
+                ('o_positive', models.IntegerField(default=0)),
+                ('o_negative', models.IntegerField(default=0)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('level', 'row', 'col'), name='core_stockgrid_unique_cell')],
+            },
+        ),
+        migrations.RunPython(count_existing_hospitals, noop_reverse),
+    ]
@@ -0,0 +1,64 @@
+# Generated by Django 5.2.18 on 2026-10-19 00:51
+
+from django.db import migrations, models
+
+import math
+from collections import defaultdict
+
+# Every other zoom below core.clustering.MAX_CLUSTER_ZOOM (15), with cells
+# 1/CELLS_PER_TILE (4) of a map tile wide, as in core.alertclusters.
+CLUSTER_ZOOMS = tuple(range(0, 15, 2))
+CELLS_PER_TILE = 4
+
+
+def count_pending_alerts(apps, schema_editor):
+    # Alerts leave the clusters by deltas when answered or expired, so the
+    # cells must start out holding the alerts already pending.
+    SOSAlert = apps.get_model('core', 'SOSAlert')
+    AlertClusterCell = apps.get_model('core', 'AlertClusterCell')
+    db = schema_editor.connection.alias
+    cells = defaultdict(lambda: [0, 0.0, 0.0])
+    pending = SOSAlert.objects.using(db).filter(status='pending', latitude__isnull=False, longitude__isnull=False)
+    for latitude, longitude in pending.values_list('latitude', 'longitude').iterator(chunk_size=2000):
+        for zoom in CLUSTER_ZOOMS:
+            size = 360.0 / (2 ** zoom) / CELLS_PER_TILE
+            cell = cells[(zoom, math.floor(latitude / size), math.floor(longitude / size))]
+            cell[0] += 1
+            cell[1] += latitude
+            cell[2] += longitude
+    AlertClusterCell.objects.using(db).bulk_create([
+        AlertClusterCell(zoom=zoom, row=row, col=col, count=count,
+                         latitude_sum=latitude_sum, longitude_sum=longitude_sum)
+        for (zoom, row, col), (count, latitude_sum, longitude_sum) in cells.items()
+    ], batch_size=1000)
+
+
+def noop_reverse(apps, schema_editor):
+    pass
+
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0018_stockgridcell'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AlertClusterCell',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('zoom', models.PositiveSmallIntegerField()),
+                ('row', models.IntegerField()),
+                ('col', models.IntegerField()),
+                ('count', models.IntegerField(default=0)),
+                ('latitude_sum', models.FloatField(default=0)),
+                ('longitude_sum', models.FloatField(default=0)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('zoom', 'row', 'col'), name='core_alertcluster_unique_cell')],
+            },
+        ),
+        migrations.RunPython(count_pending_alerts, noop_reverse),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 5.2.18 on 2026-10-19 00:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0019_alertclustercell'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='sosalert',
+            name='idempotency_key',
+            field=models.CharField(blank=True, max_length=64, null=True),
+        ),
+        migrations.AddConstraint(
+            model_name='sosalert',
+            constraint=models.UniqueConstraint(fields=('requester', 'idempotency_key'), name='core_sos_unique_idempotency_key'),
+        ),
+    ]
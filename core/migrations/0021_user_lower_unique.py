@@ -0,0 +1,47 @@
+# Generated by Django 5.2.18 on 2026-10-19 00:55
+
+import django.db.models.functions.text
+from django.db import migrations, models
+from django.db.models import Count
+from django.db.models.functions import Lower
+
+
+def check_case_duplicates(apps, schema_editor):
+    # Signup has always rejected case-insensitive duplicates, but accounts
+    # made elsewhere (admin, shell) may not have been. Name them instead of
+    # failing on an opaque IntegrityError; they need merging or renaming.
+    User = apps.get_model('core', 'User')
+    problems = []
+    for field, users in (('username', User.objects.all()), ('email', User.objects.exclude(email=''))):
+        duplicates = (
+            users.annotate(value_lower=Lower(field))
+            .values('value_lower')
+            .annotate(n=Count('id'))
+            .filter(n__gt=1)
+            .values_list('value_lower', flat=True)[:20]
+        )
+        problems.extend(f"{field} {value!r}" for value in duplicates)
+    if problems:
+        raise RuntimeError(
+            "Resolve accounts that differ only by letter case before migrating: " + ", ".join(problems)
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('core', '0020_sosalert_idempotency_key'),
+    ]
+
+    operations = [
+        migrations.RunPython(check_case_duplicates, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='user',
+            constraint=models.UniqueConstraint(django.db.models.functions.text.Lower('username'), name='core_user_username_lower_uniq'),
+        ),
+        migrations.AddConstraint(
+            model_name='user',
+            constraint=models.UniqueConstraint(django.db.models.functions.text.Lower('email'), condition=models.Q(('email', ''), _negated=True), name='core_user_email_lower_uniq'),
+        ),
+    ]
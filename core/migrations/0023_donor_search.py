@@ -0,0 +1,68 @@
+# Generated by Django 5.2.18 on 2026-10-19 01:41
+
+from django.db import migrations, models
+
+# The search index as first installed. Frozen here rather than imported from
+# core.donorsearch, which keeps it in step with the current schema.
+SQLITE_INSTALL = [
+    "CREATE VIRTUAL TABLE core_user_fts USING fts5(username, first_name, last_name, address, "
+    "content='core_user', content_rowid='id', tokenize='unicode61 remove_diacritics 2', prefix='2 3')",
+    "CREATE TRIGGER IF NOT EXISTS core_user_fts_insert AFTER INSERT ON core_user "
+    "WHEN new.role = 'donor' BEGIN "
+    "INSERT INTO core_user_fts(rowid, username, first_name, last_name, address) "
+    "VALUES (new.id, new.username, new.first_name, new.last_name, new.address); END",
+    "CREATE TRIGGER IF NOT EXISTS core_user_fts_delete AFTER DELETE ON core_user "
+    "WHEN old.role = 'donor' BEGIN "
+    "INSERT INTO core_user_fts(core_user_fts, rowid, username, first_name, last_name, address) "
+    "VALUES ('delete', old.id, old.username, old.first_name, old.last_name, old.address); END",
+    "CREATE TRIGGER IF NOT EXISTS core_user_fts_update "
+    "AFTER UPDATE OF role, username, first_name, last_name, address ON core_user BEGIN "
+    "INSERT INTO core_user_fts(core_user_fts, rowid, username, first_name, last_name, address) "
+    "SELECT 'delete', old.id, old.username, old.first_name, old.last_name, old.address WHERE old.role = 'donor'; "
+    "INSERT INTO core_user_fts(rowid, username, first_name, last_name, address) "
+    "SELECT new.id, new.username, new.first_name, new.last_name, new.address WHERE new.role = 'donor'; END",
+    "INSERT INTO core_user_fts(rowid, username, first_name, last_name, address) "
+    "SELECT id, username, first_name, last_name, address FROM core_user WHERE role = 'donor'",
+]
+SQLITE_UNINSTALL = [
+    "DROP TRIGGER IF EXISTS core_user_fts_insert",
+    "DROP TRIGGER IF EXISTS core_user_fts_delete",
+    "DROP TRIGGER IF EXISTS core_user_fts_update",
+    "DROP TABLE IF EXISTS core_user_fts",
+]
+POSTGRESQL_INSTALL = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    "CREATE INDEX IF NOT EXISTS core_user_donor_search_trgm ON core_user USING gin "
+    "((username || ' ' || first_name || ' ' || last_name || ' ' || coalesce(address, '')) gin_trgm_ops) "
+    "WHERE role = 'donor'",
+]
+POSTGRESQL_UNINSTALL = ["DROP INDEX IF EXISTS core_user_donor_search_trgm"]
+
+
+def _run(schema_editor, statements):
+    for sql in statements.get(schema_editor.connection.vendor, []):
+        schema_editor.execute(sql)
+
+
+def install_search_index(apps, schema_editor):
+    _run(schema_editor, {'sqlite': SQLITE_INSTALL, 'postgresql': POSTGRESQL_INSTALL})
+
+
+def uninstall_search_index(apps, schema_editor):
+    _run(schema_editor, {'sqlite': SQLITE_UNINSTALL, 'postgresql': POSTGRESQL_UNINSTALL})
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('core', '0022_backfillcheckpoint'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(fields=['role', 'first_name', 'username'], name='core_user_role_name_idx'),
+        ),
+        migrations.RunPython(install_search_index, uninstall_search_index),
+    ]
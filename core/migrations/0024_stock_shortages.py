@@ -0,0 +1,76 @@
+# Generated by Django 5.2.18 on 2026-10-19 01:44
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+BLOOD_TYPE_FIELDS = {
+    'A+': 'a_positive', 'A-': 'a_negative',
+    'B+': 'b_positive', 'B-': 'b_negative',
+    'AB+': 'ab_positive', 'AB-': 'ab_negative',
+    'O+': 'o_positive', 'O-': 'o_negative',
+}
+
+
+def record_current_shortages(apps, schema_editor):
+    # No minimums are set yet, so every hospital uses the default.
+    User = apps.get_model('core', 'User')
+    StockShortage = apps.get_model('core', 'StockShortage')
+    db = schema_editor.connection.alias
+    minimum = getattr(settings, 'LIFELINE_LOW_STOCK_UNITS', 2)
+    hospitals = User.objects.using(db).filter(role='hospital').values_list(
+        'id', *[f'inventory__{field}' for field in BLOOD_TYPE_FIELDS.values()]
+    )
+    shortages = []
+    for hospital_id, *stock in hospitals.iterator(chunk_size=2000):
+        for blood_type, units in zip(BLOOD_TYPE_FIELDS, stock):
+            if (units or 0) <= minimum:
+                shortages.append(StockShortage(
+                    hospital_id=hospital_id, blood_type=blood_type, units=units or 0, minimum_units=minimum,
+                ))
+    StockShortage.objects.using(db).bulk_create(shortages, batch_size=1000)
+
+
+def noop_reverse(apps, schema_editor):
+    pass
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0023_donor_search'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StockThreshold',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('a_positive', models.PositiveIntegerField(blank=True, null=True)),
+                ('a_negative', models.PositiveIntegerField(blank=True, null=True)),
+                ('b_positive', models.PositiveIntegerField(blank=True, null=True)),
+                ('b_negative', models.PositiveIntegerField(blank=True, null=True)),
+                ('ab_positive', models.PositiveIntegerField(blank=True, null=True)),
+                ('ab_negative', models.PositiveIntegerField(blank=True, null=True)),
+                ('o_positive', models.PositiveIntegerField(blank=True, null=True)),
+                ('o_negative', models.PositiveIntegerField(blank=True, null=True)),
+                ('hospital', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='stock_threshold', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='StockShortage',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('blood_type', models.CharField(choices=[('A+', 'A+'), ('A-', 'A-'), ('B+', 'B+'), ('B-', 'B-'), ('AB+', 'AB+'), ('AB-', 'AB-'), ('O+', 'O+'), ('O-', 'O-')], max_length=3)),
+                ('units', models.IntegerField()),
+                ('minimum_units', models.IntegerField()),
+                ('since', models.DateTimeField(default=django.utils.timezone.now)),
+                ('hospital', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='stock_shortages', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('hospital', 'blood_type'), name='core_stockshortage_unique_type')],
+            },
+        ),
+        migrations.RunPython(record_current_shortages, noop_reverse),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 5.2.18 on 2026-10-19 02:06
+
+import django.db.models.functions.text
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('core', '0024_stock_shortages'),
+    ]
+
+    operations = [
+        migrations.AlterConstraint(
+            model_name='user',
+            name='core_user_username_lower_uniq',
+            constraint=models.UniqueConstraint(django.db.models.functions.text.Lower('username'), name='core_user_username_lower_uniq', violation_error_message='This username is already taken.'),
+        ),
+        migrations.AlterConstraint(
+            model_name='user',
+            name='core_user_email_lower_uniq',
+            constraint=models.UniqueConstraint(django.db.models.functions.text.Lower('email'), condition=models.Q(('email', ''), _negated=True), name='core_user_email_lower_uniq', violation_error_message='An account with this email already exists.'),
+        ),
+    ]
@@ -1,4 +1,6 @@
 from django.db import models
+from django.db.models import prefetch_related_objects
+from django.db.models.functions import Lower
 from django.contrib.auth.models import AbstractUser
 from django.utils import timezone
 
@@ -32,7 +34,37 @@ class User(AbstractUser):
     donor_availability = models.CharField(max_length=10, choices=DONOR_AVAILABILITY_CHOICES, default='available')
     last_donation_date = models.DateField(blank=True, null=True)
 
+    class Meta:
+        indexes = [
+            # Bounding-box lookups of hospitals near a point (SOS routing).
+            models.Index(fields=['role', 'latitude', 'longitude'], name='core_user_role_geo_idx'),
+            # Donor directory order and its keyset pagination (core.donorsearch).
+            models.Index(fields=['role', 'first_name', 'username'], name='core_user_role_name_idx'),
+        ]
+        # Usernames and emails are unique ignoring case. Lookups must filter on
+        # Lower(...) (and exclude blank emails) to be answered from these.
+        constraints = [
+            models.UniqueConstraint(
+                Lower('username'),
+                name='core_user_username_lower_uniq',
+                violation_error_message="This username is already taken.",
+            ),
+            models.UniqueConstraint(
+                Lower('email'),
+                condition=~models.Q(email=''),
+                name='core_user_email_lower_uniq',
+                violation_error_message="An account with this email already exists.",
+            ),
+        ]
+
 class BloodInventory(models.Model):
+    FIELD_FOR_BLOOD_TYPE = {
+        'A+': 'a_positive', 'A-': 'a_negative',
+        'B+': 'b_positive', 'B-': 'b_negative',
+        'AB+': 'ab_positive', 'AB-': 'ab_negative',
+        'O+': 'o_positive', 'O-': 'o_negative',
+    }
+
     hospital = models.OneToOneField(User, on_delete=models.CASCADE, related_name='inventory')
     a_positive = models.IntegerField(default=0)
     a_negative = models.IntegerField(default=0)
@@ -44,11 +76,69 @@ class BloodInventory(models.Model):
     o_negative = models.IntegerField(default=0)
     updated_at = models.DateTimeField(auto_now=True)
 
+class StockThreshold(models.Model):
+    """Per-hospital minimum units per blood type for the low-stock watch.
+
+    A blank field falls back to ``LIFELINE_LOW_STOCK_UNITS``; see
+    ``core.shortages``.
+    """
+    hospital = models.OneToOneField(User, on_delete=models.CASCADE, related_name='stock_threshold')
+    a_positive = models.PositiveIntegerField(null=True, blank=True)
+    a_negative = models.PositiveIntegerField(null=True, blank=True)
+    b_positive = models.PositiveIntegerField(null=True, blank=True)
+    b_negative = models.PositiveIntegerField(null=True, blank=True)
+    ab_positive = models.PositiveIntegerField(null=True, blank=True)
+    ab_negative = models.PositiveIntegerField(null=True, blank=True)
+    o_positive = models.PositiveIntegerField(null=True, blank=True)
+    o_negative = models.PositiveIntegerField(null=True, blank=True)
+
+
+class StockShortage(models.Model):
+    """A hospital's blood type at or below its minimum.
+
+    The set of current shortages, maintained incrementally by
+    ``core.shortages`` on every inventory write so dashboards never scan
+    BloodInventory; ``rebuild_stock_shortages`` recomputes it.
+    """
+    hospital = models.ForeignKey(User, on_delete=models.CASCADE, related_name='stock_shortages')
+    blood_type = models.CharField(max_length=3, choices=User.BLOOD_GROUP_CHOICES)
+    units = models.IntegerField()
+    minimum_units = models.IntegerField()
+    since = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['hospital', 'blood_type'], name='core_stockshortage_unique_type'),
+        ]
+
+    def __str__(self):
+        return f"{self.hospital} {self.blood_type}: {self.units}/{self.minimum_units}"
+
+class SOSAlertManager(models.Manager):
+    def with_history(self, **filters):
+        """Hot and archived alerts matching ``filters`` as a union of row dicts.
+
+        Only for views that explicitly ask for history; everything else should
+        stay on the hot table. Pass the (ordered/sliced) result to
+        ``materialize`` to get SOSAlert objects for templates.
+        """
+        columns = SOSAlertArchive.history_columns()
+        hot = self.get_queryset().filter(**filters).values(*columns)
+        archived = SOSAlertArchive.objects.filter(**filters).values(*columns)
+        return hot.union(archived, all=True)
+
+    def materialize(self, rows, related=('requester', 'responder', 'donor_responder')):
+        alerts = [self.model(**row) for row in rows]
+        prefetch_related_objects(alerts, *related)
+        return alerts
+
+
 class SOSAlert(models.Model):
     STATUS_CHOICES = (
         ('pending', 'Pending'),
         ('accepted', 'Accepted'),
         ('declined', 'Declined'),
+        ('expired', 'Expired'),
     )
     DONOR_STATUS_CHOICES = (
         ('pending', 'Pending'),
@@ -81,3 +171,166 @@ class SOSAlert(models.Model):
     )
     donor_status = models.CharField(max_length=10, choices=DONOR_STATUS_CHOICES, default='pending')
     feedback = models.TextField(blank=True, default="")
+    escalated_at = models.DateTimeField(null=True, blank=True)
+    expired_at = models.DateTimeField(null=True, blank=True)
+    expiry_reason = models.CharField(max_length=255, blank=True, default="")
+    # While set and in the future, only the hospitals on the alert's routing
+    # shortlist (SOSRoute) see it; afterwards it is broadcast to all.
+    routed_until = models.DateTimeField(null=True, blank=True)
+    # Client-generated per SOS form, so a resubmitted form maps back to the
+    # alert it already created instead of raising a second one.
+    idempotency_key = models.CharField(max_length=64, null=True, blank=True)
+
+    objects = SOSAlertManager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'created_at'], name='core_sos_status_created_idx'),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=['requester', 'idempotency_key'],
+                name='core_sos_unique_idempotency_key',
+            ),
+        ]
+
+
+class SOSRoute(models.Model):
+    """One hospital on an alert's ranked routing shortlist (see ``core.routing``)."""
+    alert = models.ForeignKey(SOSAlert, on_delete=models.CASCADE, related_name='routes')
+    hospital = models.ForeignKey(User, on_delete=models.CASCADE, related_name='sos_routes')
+    rank = models.PositiveSmallIntegerField()
+    score = models.FloatField()
+    distance_km = models.FloatField()
+    created_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        ordering = ('alert', 'rank')
+        constraints = [
+            models.UniqueConstraint(fields=['alert', 'hospital'], name='core_sosroute_unique_hospital'),
+        ]
+        indexes = [
+            models.Index(fields=['hospital', 'alert'], name='core_sosroute_hospital_idx'),
+        ]
+
+
+class SOSAlertArchive(models.Model):
+    """Cold storage for resolved SOS alerts, filled by ``archive_sos_alerts``.
+
+    Mirrors SOSAlert's columns and keeps the original id so archived rows can
+    be unioned back into history views.
+    """
+    id = models.BigIntegerField(primary_key=True)
+    requester = models.ForeignKey(User, on_delete=models.CASCADE, related_name='+')
+    patient_name = models.CharField(max_length=100, default="Unknown")
+    blood_type = models.CharField(max_length=5)
+    note = models.TextField(blank=True)
+    status = models.CharField(max_length=10, choices=SOSAlert.STATUS_CHOICES)
+    created_at = models.DateTimeField()
+    responder = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    latitude = models.FloatField(null=True)
+    longitude = models.FloatField(null=True)
+    preferred_hospital = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    preferred_hospital_name = models.CharField(max_length=255, blank=True, default="")
+    donor_responder = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    donor_status = models.CharField(max_length=10, choices=SOSAlert.DONOR_STATUS_CHOICES, default='pending')
+    feedback = models.TextField(blank=True, default="")
+    escalated_at = models.DateTimeField(null=True, blank=True)
+    expired_at = models.DateTimeField(null=True, blank=True)
+    expiry_reason = models.CharField(max_length=255, blank=True, default="")
+    archived_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['requester', 'created_at'], name='core_sosarch_requester_idx'),
+            models.Index(fields=['created_at'], name='core_sosarch_created_idx'),
+        ]
+
+    @classmethod
+    def history_columns(cls):
+        """Attribute names shared by the hot and archive tables."""
+        return [f.attname for f in cls._meta.concrete_fields if f.name != 'archived_at']
+
+
+class SOSDemandRollup(models.Model):
+    """Alert counts per hour x blood type x geo cell x outcome.
+
+    Maintained incrementally by ``core.rollups`` so analytics never scan
+    SOSAlert; ``backfill_sos_rollups`` rebuilds it from history.
+    """
+    bucket = models.DateTimeField()
+    blood_type = models.CharField(max_length=5)
+    geo_cell = models.CharField(max_length=24, blank=True, default="")
+    outcome = models.CharField(max_length=10, choices=SOSAlert.STATUS_CHOICES)
+    count = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['bucket', 'blood_type', 'geo_cell', 'outcome'],
+                name='core_sosrollup_unique_key',
+            ),
+        ]
+
+
+class StockGridCell(models.Model):
+    """Hospital count and blood stock summed over one cell of a lat/lon grid.
+
+    Kept per zoom ``level`` (see ``core.stockgrid.GRID_LEVELS``) and maintained
+    incrementally on every inventory or hospital location change, so the
+    heatmap never reads BloodInventory; ``rebuild_stock_grid`` recomputes it.
+    """
+    level = models.PositiveSmallIntegerField()
+    row = models.IntegerField()
+    col = models.IntegerField()
+    hospitals = models.IntegerField(default=0)
+    a_positive = models.IntegerField(default=0)
+    a_negative = models.IntegerField(default=0)
+    b_positive = models.IntegerField(default=0)
+    b_negative = models.IntegerField(default=0)
+    ab_positive = models.IntegerField(default=0)
+    ab_negative = models.IntegerField(default=0)
+    o_positive = models.IntegerField(default=0)
+    o_negative = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['level', 'row', 'col'], name='core_stockgrid_unique_cell'),
+        ]
+
+
+class AlertClusterCell(models.Model):
+    """Pending SOS alerts counted per map grid cell at one precomputed zoom.
+
+    Coordinate sums let the cluster be drawn at the mean position of its
+    alerts. Maintained incrementally by ``core.alertclusters`` whenever an
+    alert enters or leaves the pending state.
+    """
+    zoom = models.PositiveSmallIntegerField()
+    row = models.IntegerField()
+    col = models.IntegerField()
+    count = models.IntegerField(default=0)
+    latitude_sum = models.FloatField(default=0)
+    longitude_sum = models.FloatField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['zoom', 'row', 'col'], name='core_alertcluster_unique_cell'),
+        ]
+
+
+class BackfillCheckpoint(models.Model):
+    """How far a ``core.backfill`` job has got, committed with each chunk.
+
+    ``last_pk`` is the highest primary key already processed, so an
+    interrupted run resumes just after it.
+    """
+    name = models.CharField(max_length=100, unique=True)
+    last_pk = models.BigIntegerField(default=0)
+    rows = models.BigIntegerField(default=0)
+    started_at = models.DateTimeField(default=timezone.now)
+    updated_at = models.DateTimeField(auto_now=True)
+    completed_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"{self.name} @ {self.last_pk}"
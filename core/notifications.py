@@ -0,0 +1,35 @@
+import logging
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.mail import send_mail
+
+logger = logging.getLogger(__name__)
+
+
+def email_failure_hint():
+    if getattr(settings, 'EMAIL_BACKEND', '').endswith('filebased.EmailBackend'):
+        return f" Check `sent_emails/` on the server: {getattr(settings, 'EMAIL_FILE_PATH', '')}."
+    return ""
+
+
+def send_notification(subject, message, recipient_list):
+    """Send a plain-text LifeLine email. Returns False (and logs) on failure."""
+    try:
+        send_mail(
+            subject=subject,
+            message=message,
+            from_email=getattr(settings, 'DEFAULT_FROM_EMAIL', None) or None,
+            recipient_list=recipient_list,
+            fail_silently=False,
+        )
+    except Exception:
+        logger.exception("Failed to send email %r (backend=%s).", subject, getattr(settings, 'EMAIL_BACKEND', ''))
+        return False
+    return True
+
+
+# SMTP is blocking socket I/O. Async views await this so a slow mail server
+# parks the request on a pool thread instead of holding the event loop or
+# the per-request thread-sensitive executor.
+asend_notification = sync_to_async(send_notification, thread_sensitive=False)
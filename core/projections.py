@@ -0,0 +1,107 @@
+"""Lightweight read-only rows for list views.
+
+List pages only print a handful of columns, but model instances load every
+column (password hashes included) and carry per-instance ``_state`` and
+``__dict__`` overhead. ``project`` fetches just a row type's columns with
+``.values()`` (related people through the same JOIN) and maps them onto
+``__slots__`` objects that templates read like model instances.
+"""
+
+
+class Row:
+    """Base for projection rows.
+
+    Subclasses list their columns in ``fields``, related rows in
+    ``related`` (``{fk_name: RowType}``, None when the key is null), and set
+    ``__slots__ = fields + tuple(related)``. Rows compare equal by ``id``.
+    """
+    __slots__ = ()
+    fields = ()
+    related = {}
+
+    def __init__(self, **values):
+        for name in self.__slots__:
+            setattr(self, name, values.get(name))
+
+    def __eq__(self, other):
+        if type(other) is not type(self):
+            return NotImplemented
+        return self.id == other.id
+
+    def __hash__(self):
+        return hash(self.id)
+
+    def __repr__(self):
+        return f'<{type(self).__name__} {self.id}>'
+
+    @classmethod
+    def columns(cls, prefix=''):
+        names = [prefix + name for name in cls.fields]
+        for name, row_type in cls.related.items():
+            names.extend(row_type.columns(f'{prefix}{name}__'))
+        return names
+
+    @classmethod
+    def from_values(cls, values, prefix=''):
+        row = cls(**{name: values[prefix + name] for name in cls.fields})
+        for name, row_type in cls.related.items():
+            nested = f'{prefix}{name}__'
+            if values[nested + 'id'] is not None:
+                setattr(row, name, row_type.from_values(values, nested))
+        return row
+
+
+def project(queryset, row_type):
+    """Evaluate ``queryset`` into a list of ``row_type`` rows in one query."""
+    return [row_type.from_values(values) for values in queryset.values(*row_type.columns())]
+
+
+class PersonRow(Row):
+    fields = ('id', 'username', 'first_name')
+    __slots__ = fields
+
+
+class HospitalRow(Row):
+    fields = ('id', 'username', 'first_name', 'address')
+    __slots__ = fields
+
+
+class DonorRow(Row):
+    fields = ('id', 'username', 'first_name', 'blood_group', 'donor_availability', 'last_donation_date')
+    __slots__ = fields
+
+
+class DonorSearchRow(Row):
+    # distance_km is annotated by donorsearch.search_donors.
+    fields = DonorRow.fields + ('address', 'distance_km')
+    __slots__ = fields
+
+
+class AdminAlertRow(Row):
+    fields = ('id', 'created_at', 'blood_type', 'status')
+    related = {'requester': PersonRow, 'responder': PersonRow}
+    __slots__ = fields + tuple(related)
+
+
+class PatientAlertRow(Row):
+    fields = (
+        'id', 'created_at', 'patient_name', 'blood_type', 'note', 'status',
+        'donor_status', 'feedback', 'expiry_reason',
+    )
+    related = {'donor_responder': PersonRow}
+    __slots__ = fields + tuple(related)
+
+
+class DonorAlertRow(Row):
+    fields = ('id', 'created_at', 'patient_name', 'blood_type', 'note', 'donor_status')
+    __slots__ = fields
+
+
+class HospitalAlertRow(Row):
+    # routed_to_me is annotated by views._hospital_alerts.
+    fields = (
+        'id', 'created_at', 'patient_name', 'blood_type', 'note', 'donor_status', 'escalated_at',
+        'latitude', 'longitude', 'preferred_hospital_name', 'routed_to_me',
+    )
+    related = {'donor_responder': PersonRow}
+    __slots__ = fields + tuple(related)
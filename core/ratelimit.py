@@ -0,0 +1,107 @@
+"""Per-view request throttling on the shared cache.
+
+Each client gets a bucket of ``burst`` tokens per view that refills
+continuously at ``per_minute``. The bucket is stored as ``(tokens, time of
+the last update)`` and topped up in proportion to the time since, so
+spending a token frees one again after ``60 / per_minute`` seconds. A short
+per-bucket lock taken with ``cache.add`` makes the read-modify-write atomic,
+so all workers share the same budget.
+"""
+import math
+import time
+from contextlib import contextmanager
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.http import JsonResponse
+from django.shortcuts import render
+
+# Tries (5 ms apart) to take a bucket's lock before counting without it.
+LOCK_ATTEMPTS = 20
+
+
+def _client_key(request, user):
+    if user is not None and user.is_authenticated:
+        return f'u{user.pk}'
+    return f'ip{request.META.get("REMOTE_ADDR", "")}'
+
+
+@contextmanager
+def _bucket_lock(key):
+    lock = f'{key}:lock'
+    for _ in range(LOCK_ATTEMPTS):
+        if cache.add(lock, 1, 2):
+            try:
+                yield
+            finally:
+                cache.delete(lock)
+            return
+        time.sleep(0.005)
+    # The holder stalled; count without the lock rather than hold up the request.
+    yield
+
+
+def consume(name, client):
+    """Take one token from ``client``'s bucket for ``name``.
+
+    Returns 0 if allowed, otherwise the seconds until a token is free.
+    """
+    per_minute, burst = settings.LIFELINE_RATE_LIMITS.get(name, (0, 0))
+    if not settings.LIFELINE_RATE_LIMIT_ENABLED or per_minute <= 0 or burst <= 0:
+        return 0
+    rate = per_minute / 60.0
+    key = f'lifeline:ratelimit:{name}:{client}'
+    with _bucket_lock(key):
+        now = time.time()
+        # A bucket left alone until its key expires is full again anyway.
+        tokens, updated_at = cache.get(key) or (burst, now)
+        tokens = min(burst, tokens + (now - updated_at) * rate)
+        if tokens >= 1:
+            cache.set(key, (tokens - 1, now), math.ceil(burst / rate) + 1)
+            return 0
+    return max(1, math.ceil((1 - tokens) / rate))
+
+
+aconsume = sync_to_async(consume)
+
+
+def _limited_response(request, retry_after, as_json):
+    if as_json:
+        response = JsonResponse(
+            {'ok': False, 'error': 'Too many requests.', 'retry_after': retry_after}, status=429,
+        )
+    else:
+        response = render(request, 'rate_limited.html', {'retry_after': retry_after}, status=429)
+    response['Retry-After'] = str(retry_after)
+    return response
+
+
+def ratelimit(name, methods=('POST',), as_json=False):
+    """Throttle a view with the ``LIFELINE_RATE_LIMITS[name]`` bucket.
+
+    Only requests using one of ``methods`` spend tokens. Works on sync and
+    async views; put it below ``login_required`` so clients are counted per
+    user rather than per IP.
+    """
+    def decorator(view_func):
+        if iscoroutinefunction(view_func):
+            @wraps(view_func)
+            async def async_view(request, *args, **kwargs):
+                if request.method in methods:
+                    retry_after = await aconsume(name, _client_key(request, await request.auser()))
+                    if retry_after:
+                        return _limited_response(request, retry_after, as_json)
+                return await view_func(request, *args, **kwargs)
+            return async_view
+
+        @wraps(view_func)
+        def sync_view(request, *args, **kwargs):
+            if request.method in methods:
+                retry_after = consume(name, _client_key(request, getattr(request, 'user', None)))
+                if retry_after:
+                    return _limited_response(request, retry_after, as_json)
+            return view_func(request, *args, **kwargs)
+        return sync_view
+    return decorator
@@ -0,0 +1,156 @@
+"""Optional read replica for read-heavy views.
+
+Set ``LIFELINE_REPLICA_DATABASE_URL`` to add a ``replica`` database alias.
+Nothing is read from it implicitly: only views wrapped in ``read_replica``
+(dashboards, map APIs, donor lists, exports) send their reads there, and
+every write still goes to ``default``.
+
+A browser that has just written something (any POST and friends, see
+``core.middleware.ReplicaPinMiddleware``) carries a short-lived cookie that
+keeps its reads on the primary, so users see their own changes while the
+replica catches up. If the replica can't be reached or a query on it fails,
+it is skipped for ``LIFELINE_REPLICA_RETRY_SECONDS`` and the view is
+answered from the primary.
+"""
+import logging
+import time
+from contextvars import ContextVar
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction
+from django.conf import settings
+from django.db import DatabaseError, connections
+
+logger = logging.getLogger(__name__)
+
+PRIMARY = 'default'
+REPLICA = 'replica'
+PIN_COOKIE = 'lifeline_primary'
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+
+class _Scope:
+    """Marks reads in the current request as replica-eligible."""
+    __slots__ = ('used',)
+
+    def __init__(self):
+        self.used = False
+
+
+_scope = ContextVar('lifeline_replica_scope', default=None)
+# Per process: monotonic time until which the replica is skipped.
+_down_until = 0.0
+
+
+def replica_configured():
+    return REPLICA in settings.DATABASES
+
+
+def mark_replica_down():
+    global _down_until
+    _down_until = time.monotonic() + settings.LIFELINE_REPLICA_RETRY_SECONDS
+    # Drop the broken connection so the next attempt reconnects.
+    connections[REPLICA].close()
+
+
+def _replica_available():
+    if time.monotonic() < _down_until:
+        return False
+    connection = connections[REPLICA]
+    if connection.connection is None:
+        try:
+            connection.ensure_connection()
+        except DatabaseError:
+            logger.warning("Read replica unavailable; reading from the primary.", exc_info=True)
+            mark_replica_down()
+            return False
+    return True
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        scope = _scope.get()
+        if scope is not None and replica_configured() and _replica_available():
+            scope.used = True
+            return REPLICA
+        return PRIMARY
+
+    def db_for_write(self, model, **hints):
+        return PRIMARY
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Both aliases hold the same data.
+        return True
+
+
+def _wants_replica(request):
+    return (
+        replica_configured()
+        and request.method in SAFE_METHODS
+        and PIN_COOKIE not in request.COOKIES
+    )
+
+
+def _stream_on_replica(chunks, scope):
+    # Streaming bodies are consumed after the view returns; keep their
+    # queries on the replica too.
+    iterator = iter(chunks)
+    while True:
+        token = _scope.set(scope)
+        try:
+            chunk = next(iterator)
+        except StopIteration:
+            return
+        finally:
+            _scope.reset(token)
+        yield chunk
+
+
+def _on_replica(response, scope):
+    if response.streaming and not response.is_async:
+        response.streaming_content = _stream_on_replica(response.streaming_content, scope)
+    return response
+
+
+def read_replica(view_func):
+    """Serve the view's reads from the replica when one is configured.
+
+    Only for views that don't write, since a failed replica read reruns the
+    whole view on the primary. Works on sync and async views.
+    """
+    if iscoroutinefunction(view_func):
+        @wraps(view_func)
+        async def async_view(request, *args, **kwargs):
+            if not _wants_replica(request):
+                return await view_func(request, *args, **kwargs)
+            scope = _Scope()
+            token = _scope.set(scope)
+            try:
+                return _on_replica(await view_func(request, *args, **kwargs), scope)
+            except DatabaseError:
+                if not scope.used:
+                    raise
+                logger.warning("Read replica query failed; retrying on the primary.", exc_info=True)
+                mark_replica_down()
+            finally:
+                _scope.reset(token)
+            return await view_func(request, *args, **kwargs)
+        return async_view
+
+    @wraps(view_func)
+    def sync_view(request, *args, **kwargs):
+        if not _wants_replica(request):
+            return view_func(request, *args, **kwargs)
+        scope = _Scope()
+        token = _scope.set(scope)
+        try:
+            return _on_replica(view_func(request, *args, **kwargs), scope)
+        except DatabaseError:
+            if not scope.used:
+                raise
+            logger.warning("Read replica query failed; retrying on the primary.", exc_info=True)
+            mark_replica_down()
+        finally:
+            _scope.reset(token)
+        return view_func(request, *args, **kwargs)
+    return sync_view
@@ -0,0 +1,76 @@
+import math
+from collections import Counter
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import F, Sum
+
+from .models import SOSDemandRollup
+
+
+ROLLUP_DIMENSIONS = ('bucket', 'blood_type', 'geo_cell', 'outcome')
+
+
+def hour_bucket(moment):
+    return moment.replace(minute=0, second=0, microsecond=0)
+
+
+def geo_cell(latitude, longitude):
+    """South-west corner of the grid cell containing the point, e.g. ``"28.50,77.00"``."""
+    if latitude is None or longitude is None:
+        return ""
+    size = settings.LIFELINE_ROLLUP_CELL_DEGREES
+    return f"{math.floor(latitude / size) * size:.2f},{math.floor(longitude / size) * size:.2f}"
+
+
+def rollup_key(created_at, blood_type, latitude, longitude, outcome):
+    return (hour_bucket(created_at), blood_type or "", geo_cell(latitude, longitude), outcome)
+
+
+def alert_key(alert, outcome):
+    return rollup_key(alert.created_at, alert.blood_type, alert.latitude, alert.longitude, outcome)
+
+
+def apply_deltas(deltas):
+    """Add each ``{key: delta}`` to its rollup row, creating rows as needed."""
+    for (bucket, blood_type, cell, outcome), delta in deltas.items():
+        if not delta:
+            continue
+        lookup = {'bucket': bucket, 'blood_type': blood_type, 'geo_cell': cell, 'outcome': outcome}
+        if SOSDemandRollup.objects.filter(**lookup).update(count=F('count') + delta):
+            continue
+        try:
+            with transaction.atomic():
+                SOSDemandRollup.objects.create(count=delta, **lookup)
+        except IntegrityError:
+            # Another request created the row first.
+            SOSDemandRollup.objects.filter(**lookup).update(count=F('count') + delta)
+
+
+def record_alert_created(alert):
+    apply_deltas({alert_key(alert, alert.status): 1})
+
+
+def record_status_change(alert, old_status):
+    if old_status == alert.status:
+        return
+    apply_deltas(Counter({alert_key(alert, old_status): -1, alert_key(alert, alert.status): 1}))
+
+
+arecord_status_change = sync_to_async(record_status_change)
+
+
+def demand(since, until=None, group_by=('blood_type', 'outcome'), blood_type=None):
+    """Summed rollup counts for ``[since, until)`` grouped by ``group_by``."""
+    rows = SOSDemandRollup.objects.filter(bucket__gte=hour_bucket(since))
+    if until is not None:
+        rows = rows.filter(bucket__lt=until)
+    if blood_type:
+        rows = rows.filter(blood_type=blood_type)
+    return (
+        rows.values(*group_by)
+        .annotate(total=Sum('count'))
+        .filter(total__gt=0)
+        .order_by(*group_by)
+    )
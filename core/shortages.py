@@ -0,0 +1,163 @@
+"""Low-stock watch.
+
+Each hospital has a minimum number of units per blood type
+(``StockThreshold``; blank types use ``LIFELINE_LOW_STOCK_UNITS``).
+``StockShortage`` holds one row per hospital and blood type at or below
+its minimum. Every inventory write re-checks only the hospital it wrote:
+edits through ``check_hospital``, SOS deductions through
+``record_stock_levels``, which looks only at the types whose count
+changed. Nothing ever scans other hospitals. Falling to the minimum emails
+the hospital and the admins, at most once per
+``LIFELINE_LOW_STOCK_ALERT_SECONDS`` for each hospital and type.
+"""
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from .conditional import STOCK, bump
+from .models import BloodInventory, StockShortage, StockThreshold, User
+from .notifications import asend_notification, send_notification
+
+ALERT_KEY = 'lifeline:low-stock:{}:{}'
+
+
+def stock_levels(inventory):
+    """``{blood_type: units}`` for ``inventory`` (every type 0 when it is None)."""
+    return {
+        blood_type: getattr(inventory, field, 0) if inventory else 0
+        for blood_type, field in BloodInventory.FIELD_FOR_BLOOD_TYPE.items()
+    }
+
+
+def minimums(hospital):
+    """``{blood_type: units}`` at or below which ``hospital`` is short of that type."""
+    threshold = StockThreshold.objects.filter(hospital=hospital).first()
+    default = settings.LIFELINE_LOW_STOCK_UNITS
+    result = {}
+    for blood_type, field in BloodInventory.FIELD_FOR_BLOOD_TYPE.items():
+        value = getattr(threshold, field, None) if threshold else None
+        result[blood_type] = default if value is None else value
+    return result
+
+
+def _alert_email(hospital, new_shortages):
+    """``(subject, message, recipients)`` about ``[(blood_type, units, minimum)]``, or None.
+
+    Types already alerted on within ``LIFELINE_LOW_STOCK_ALERT_SECONDS``
+    are left out.
+    """
+    recipients = [hospital.email] if hospital.email else []
+    recipients += list(
+        User.objects.filter(role='admin', is_active=True).exclude(email='').values_list('email', flat=True)
+    )
+    if not recipients:
+        # Nobody to tell; leave the alert window unclaimed.
+        return None
+    window = settings.LIFELINE_LOW_STOCK_ALERT_SECONDS
+    due = [row for row in new_shortages if cache.add(ALERT_KEY.format(hospital.pk, row[0]), 1, window)]
+    if not due:
+        return None
+    hospital_name = hospital.first_name or hospital.username
+    lines = '\n'.join(f"- {blood_type}: {units} unit(s) left (minimum {minimum})" for blood_type, units, minimum in due)
+    return (
+        f"LifeLine Low Stock: {', '.join(row[0] for row in due)} at {hospital_name}",
+        f"{hospital_name} is at or below its minimum stock for:\n{lines}\n\n"
+        f"SOS requests for these blood groups may not be accepted until it is restocked.\n\n- LifeLine",
+        recipients,
+    )
+
+
+def _evaluate(hospital, levels, blood_types):
+    """Bring ``hospital``'s shortage rows for ``blood_types`` in line with ``levels``.
+
+    Returns the alert email for the types that have just become short, or None.
+    """
+    minimum = minimums(hospital)
+    low = {blood_type for blood_type in blood_types if levels[blood_type] <= minimum[blood_type]}
+    existing = {
+        shortage.blood_type: shortage
+        for shortage in StockShortage.objects.filter(hospital=hospital, blood_type__in=blood_types)
+    }
+    recovered = [blood_type for blood_type in existing if blood_type not in low]
+    changed = [
+        shortage for blood_type, shortage in existing.items()
+        if blood_type in low
+        and (shortage.units, shortage.minimum_units) != (levels[blood_type], minimum[blood_type])
+    ]
+    new = sorted(low - set(existing))
+    if not (recovered or changed or new):
+        return None
+    with transaction.atomic():
+        if recovered:
+            StockShortage.objects.filter(hospital=hospital, blood_type__in=recovered).delete()
+        for shortage in changed:
+            StockShortage.objects.filter(pk=shortage.pk).update(
+                units=levels[shortage.blood_type], minimum_units=minimum[shortage.blood_type],
+            )
+        if new:
+            # A concurrent write may have recorded the same shortage first.
+            StockShortage.objects.bulk_create([
+                StockShortage(hospital=hospital, blood_type=blood_type,
+                              units=levels[blood_type], minimum_units=minimum[blood_type])
+                for blood_type in new
+            ], ignore_conflicts=True)
+        bump(STOCK)
+    if not new:
+        return None
+    return _alert_email(hospital, [(blood_type, levels[blood_type], minimum[blood_type]) for blood_type in new])
+
+
+def _record_stock_levels(hospital, before, after):
+    changed = [blood_type for blood_type in after if before.get(blood_type) != after[blood_type]]
+    if not changed:
+        return None
+    return _evaluate(hospital, after, changed)
+
+
+def record_stock_levels(hospital, before, after):
+    """Check the blood types whose count differs between two ``stock_levels`` results."""
+    email = _record_stock_levels(hospital, before, after)
+    if email:
+        send_notification(*email)
+
+
+async def arecord_stock_levels(hospital, before, after):
+    email = await sync_to_async(_record_stock_levels)(hospital, before, after)
+    if email:
+        await asend_notification(*email)
+
+
+def check_hospital(hospital, inventory=None):
+    """Re-check every blood type of ``hospital``, after an inventory edit or new minimums."""
+    if inventory is None:
+        inventory = BloodInventory.objects.filter(hospital=hospital).first()
+    levels = stock_levels(inventory)
+    email = _evaluate(hospital, levels, list(levels))
+    if email:
+        send_notification(*email)
+
+
+def rebuild():
+    """Recompute every shortage without sending alerts. Returns the number of shortages."""
+    default = settings.LIFELINE_LOW_STOCK_UNITS
+    fields = BloodInventory.FIELD_FOR_BLOOD_TYPE
+    hospitals = User.objects.filter(role='hospital').values_list(
+        'id', *[f'inventory__{field}' for field in fields.values()],
+        *[f'stock_threshold__{field}' for field in fields.values()],
+    )
+    shortages = []
+    for hospital_id, *values in hospitals.iterator(chunk_size=2000):
+        stock, threshold = values[:len(fields)], values[len(fields):]
+        for blood_type, units, minimum in zip(fields, stock, threshold):
+            units = units or 0
+            minimum = default if minimum is None else minimum
+            if units <= minimum:
+                shortages.append(StockShortage(
+                    hospital_id=hospital_id, blood_type=blood_type, units=units, minimum_units=minimum,
+                ))
+    with transaction.atomic():
+        StockShortage.objects.all().delete()
+        StockShortage.objects.bulk_create(shortages, batch_size=1000)
+        bump(STOCK)
+    return len(shortages)
@@ -0,0 +1,164 @@
+import math
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+
+from asgiref.sync import sync_to_async
+from django.db import IntegrityError, transaction
+from django.db.models import F
+
+from .conditional import STOCK, bump
+from .models import BloodInventory, StockGridCell, User
+
+# (level, cell size in degrees, lowest map zoom that uses it), coarsest first.
+GRID_LEVELS = (
+    (0, 4.0, 0),
+    (1, 1.0, 6),
+    (2, 0.25, 9),
+)
+STOCK_FIELDS = tuple(BloodInventory.FIELD_FOR_BLOOD_TYPE.values())
+GRID_FIELDS = ('hospitals',) + STOCK_FIELDS
+
+
+def level_for_zoom(zoom):
+    chosen = GRID_LEVELS[0]
+    for level in GRID_LEVELS:
+        if zoom >= level[2]:
+            chosen = level
+    return chosen
+
+
+def cell_index(latitude, longitude, size):
+    return math.floor(latitude / size), math.floor(longitude / size)
+
+
+def stock_snapshot(hospital, inventory):
+    """What ``hospital`` currently contributes to the grid: ``(lat, lon, counts)``.
+
+    ``inventory`` may be None (counted as empty). Returns None when the
+    user is not a hospital or has no location, since it cannot be placed on
+    a cell. Take one before and one after a change and pass both to
+    ``record_stock_change``.
+    """
+    if hospital is None or hospital.role != 'hospital':
+        return None
+    if hospital.latitude is None or hospital.longitude is None:
+        return None
+    counts = {field: getattr(inventory, field, 0) if inventory else 0 for field in STOCK_FIELDS}
+    counts['hospitals'] = 1
+    return hospital.latitude, hospital.longitude, counts
+
+
+def _contribution(snapshot, sign, deltas):
+    if snapshot is None:
+        return
+    latitude, longitude, counts = snapshot
+    for level, size, _ in GRID_LEVELS:
+        row, col = cell_index(latitude, longitude, size)
+        cell = deltas[(level, row, col)]
+        for field, value in counts.items():
+            cell[field] += sign * value
+
+
+def apply_deltas(deltas):
+    """Add each ``{(level, row, col): Counter(field=delta)}`` to its cell, creating cells as needed."""
+    for (level, row, col), changes in deltas.items():
+        changes = {field: delta for field, delta in changes.items() if delta}
+        if not changes:
+            continue
+        lookup = {'level': level, 'row': row, 'col': col}
+        updates = {field: F(field) + delta for field, delta in changes.items()}
+        if StockGridCell.objects.filter(**lookup).update(**updates):
+            continue
+        try:
+            with transaction.atomic():
+                StockGridCell.objects.create(**lookup, **changes)
+        except IntegrityError:
+            # Another request created the cell first.
+            StockGridCell.objects.filter(**lookup).update(**updates)
+
+
+def record_stock_change(before, after):
+    """Move a hospital's contribution from the ``before`` snapshot to ``after``.
+
+    Covers stock edits, relocations, hospitals gaining a location
+    (``before`` is None) and deletions (``after`` is None).
+    """
+    deltas = defaultdict(Counter)
+    _contribution(before, -1, deltas)
+    _contribution(after, 1, deltas)
+    apply_deltas(deltas)
+
+
+arecord_stock_change = sync_to_async(record_stock_change)
+
+
+def _stored_snapshots(hospital_ids, lock=False):
+    hospitals = User.objects.filter(pk__in=hospital_ids).order_by('pk')
+    inventories = BloodInventory.objects.filter(hospital_id__in=hospital_ids).order_by('pk')
+    if lock:
+        hospitals, inventories = hospitals.select_for_update(), inventories.select_for_update()
+    hospitals = {hospital.pk: hospital for hospital in hospitals}
+    inventories = {inventory.hospital_id: inventory for inventory in inventories}
+    return [stock_snapshot(hospitals.get(pk), inventories.get(pk)) for pk in hospital_ids]
+
+
+@contextmanager
+def stock_change(*hospital_ids):
+    """Move the grid by whatever the block writes to these hospitals or their inventory.
+
+    The rows are locked for the block and both sides of the change are read
+    from the database in the same transaction, so concurrent edits each
+    move the grid by exactly what they changed.
+    """
+    hospital_ids = sorted({pk for pk in hospital_ids if pk is not None})
+    with transaction.atomic():
+        before = _stored_snapshots(hospital_ids, lock=True)
+        yield
+        after = _stored_snapshots(hospital_ids)
+        for old, new in zip(before, after):
+            record_stock_change(old, new)
+
+
+def grid_cells(zoom, bounds=None, blood_type=None):
+    """Grid rows for the level matching ``zoom`` as ``(level, size, fields, rows)``.
+
+    ``bounds`` is ``(south, west, north, east)``; each row is
+    ``[south-west lat, south-west lon, *fields]``.
+    """
+    level, size, _ = level_for_zoom(zoom)
+    fields = GRID_FIELDS
+    if blood_type in BloodInventory.FIELD_FOR_BLOOD_TYPE:
+        fields = ('hospitals', BloodInventory.FIELD_FOR_BLOOD_TYPE[blood_type])
+    queryset = StockGridCell.objects.filter(level=level, hospitals__gt=0)
+    if bounds is not None:
+        south, west, north, east = bounds
+        min_row, min_col = cell_index(south, west, size)
+        max_row, max_col = cell_index(north, east, size)
+        queryset = queryset.filter(row__range=(min_row, max_row), col__range=(min_col, max_col))
+    rows = [
+        [row * size, col * size, *values]
+        for row, col, *values in queryset.order_by('row', 'col').values_list('row', 'col', *fields)
+    ]
+    return level, size, fields, rows
+
+
+def rebuild():
+    """Recompute every cell from hospitals and inventory. Returns the number of cells written."""
+    deltas = defaultdict(Counter)
+    hospitals = (
+        User.objects.filter(role='hospital', latitude__isnull=False, longitude__isnull=False)
+        .values_list('latitude', 'longitude', *[f'inventory__{field}' for field in STOCK_FIELDS])
+        .iterator(chunk_size=2000)
+    )
+    for latitude, longitude, *stock in hospitals:
+        counts = {field: value or 0 for field, value in zip(STOCK_FIELDS, stock)}
+        counts['hospitals'] = 1
+        _contribution((latitude, longitude, counts), 1, deltas)
+    with transaction.atomic():
+        StockGridCell.objects.all().delete()
+        StockGridCell.objects.bulk_create([
+            StockGridCell(level=level, row=row, col=col, **counts)
+            for (level, row, col), counts in deltas.items()
+        ], batch_size=1000)
+        bump(STOCK)
+    return len(deltas)
@@ -0,0 +1,43 @@
+import logging
+
+from django import template
+from django.conf import settings
+from django.contrib.staticfiles import finders
+from django.templatetags.static import static
+from django.utils.html import format_html_join
+
+from core.assets import BUNDLE_DIR, BUNDLES
+
+logger = logging.getLogger(__name__)
+register = template.Library()
+_missing = set()
+
+
+def _bundle_url(name):
+    """URL of the built bundle, or None if ``build_assets`` was not run before ``collectstatic``."""
+    path = f'{BUNDLE_DIR}/{name}'
+    try:
+        url = static(path)
+    except ValueError:
+        # Not in the staticfiles manifest.
+        url = None
+    if url is not None and settings.DEBUG and not finders.find(path):
+        url = None
+    if url is None and name not in _missing:
+        _missing.add(name)
+        logger.warning("Asset bundle %r has not been built; serving its source files.", name)
+    return url
+
+
+@register.simple_tag
+def bundle(name):
+    """``<link>``/``<script>`` tags for a bundle from ``core.assets.BUNDLES``.
+
+    Falls back to the individual source files if the bundle is missing.
+    """
+    if name not in BUNDLES:
+        raise template.TemplateSyntaxError(f"Unknown asset bundle {name!r}.")
+    url = _bundle_url(name) if settings.LIFELINE_ASSET_BUNDLES else None
+    urls = [url] if url else [static(path) for path in BUNDLES[name]]
+    markup = '<link rel="stylesheet" href="{}">' if name.endswith('.css') else '<script src="{}"></script>'
+    return format_html_join('\n', markup, ((url,) for url in urls))
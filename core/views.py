@@ -1,26 +1,58 @@
-from django.shortcuts import render, redirect, get_object_or_404
+from django.shortcuts import render, redirect, get_object_or_404, aget_object_or_404
 from django.contrib.auth.decorators import login_required
-from django.views.decorators.cache import never_cache
+from django.views.decorators.cache import cache_control, never_cache
 from django.contrib.auth import login
-from django.http import JsonResponse
-from django.views.decorators.http import require_POST
-from django.db.models import Q
-from django.core.mail import send_mail
+from django.http import Http404, HttpResponse, JsonResponse, StreamingHttpResponse
+from django.views.decorators.http import condition, require_POST
+from django.db.models import Exists, F, OuterRef, Q
 from django.conf import settings
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
 from django.contrib import messages
 from django.contrib.auth.tokens import default_token_generator
 from django.utils.http import urlsafe_base64_encode, urlsafe_base64_decode
 from django.utils.encoding import force_bytes, force_str
+from django.utils import timezone
+from django.utils.cache import get_conditional_response, patch_cache_control
+from datetime import timedelta
 import logging
-from .models import User, SOSAlert, BloodInventory
-from .forms import SignUpForm, HospitalCreationForm, InventoryForm, HospitalUpdateForm, DonorProfileForm
-import math
+from asgiref.sync import sync_to_async
+from .models import User, SOSAlert, SOSRoute, BloodInventory, StockShortage, StockThreshold
+from .forms import (
+    SignUpForm, HospitalCreationForm, InventoryForm, HospitalUpdateForm, DonorProfileForm, DonorImportForm,
+    StockThresholdForm,
+)
+from .alertclusters import pending_clusters, record_pending_change
+from .conditional import ALERTS, PEOPLE, STOCK, bump, payload_etag, versioned_etag
+from .clustering import cluster, in_bbox, parse_bbox, parse_zoom, should_cluster
+from .donorsearch import decode_cursor, search_donors
+from .exports import EXPORTS, WRITERS, export_stream, parse_day
+from .imports import DONOR_IMPORT_COLUMNS, import_donors
+from .locations import aflush_if_due, apply_pending_location, arecord_location
+from .notifications import asend_notification, email_failure_hint, send_notification
+from .projections import (
+    AdminAlertRow, DonorAlertRow, DonorRow, HospitalAlertRow, HospitalRow, PatientAlertRow, project,
+)
+from .ratelimit import ratelimit
+from .replicas import PRIMARY, read_replica
+from .rollups import ROLLUP_DIMENSIONS, demand, record_alert_created, record_status_change
+from .routing import route_alert
+from .shortages import arecord_stock_levels, check_hospital, stock_levels
+from .stockgrid import grid_cells, record_stock_change, stock_change, stock_snapshot
+import hashlib
+import io
 import json
-import urllib.parse
-import urllib.request
+import math
+import ssl
+import httpx
 
 logger = logging.getLogger(__name__)
 
+# Building a TLS context loads the CA bundle (~40 ms of CPU). Share one across
+# the per-request Overpass clients so that cost isn't paid on the event loop
+# for every lookup.
+OVERPASS_SSL_CONTEXT = ssl.create_default_context()
+
 # --- Helper: Haversine Distance Calculation ---
 def calculate_distance(lat1, lon1, lat2, lon2):
     R = 6371  # Earth radius in km
@@ -44,7 +76,8 @@ def signup(request):
                 form.add_error('username', 'This username is already taken.')
                 return render(request, 'signup.html', {'form': form})
             if user.role == 'hospital':
-                BloodInventory.objects.create(hospital=user)
+                inventory = BloodInventory.objects.create(hospital=user)
+                record_stock_change(None, stock_snapshot(user, inventory))
 
             # Require email verification before login
             user.is_active = False
@@ -64,23 +97,12 @@ def signup(request):
                 f"- LifeLine"
             )
 
-            try:
-                send_mail(
-                    subject=subject,
-                    message=message,
-                    from_email=getattr(settings, 'DEFAULT_FROM_EMAIL', None) or None,
-                    recipient_list=[user.email],
-                    fail_silently=False,
-                )
+            if send_notification(subject, message, [user.email]):
                 messages.success(request, "Account created. Please check your email to verify your account.")
-            except Exception:
-                logger.exception("Failed to send signup verification email (backend=%s).", getattr(settings, 'EMAIL_BACKEND', ''))
-                fallback_hint = ""
-                if getattr(settings, 'EMAIL_BACKEND', '').endswith('filebased.EmailBackend'):
-                    fallback_hint = f" Check `sent_emails/` on the server: {getattr(settings, 'EMAIL_FILE_PATH', '')}."
+            else:
                 messages.error(
                     request,
-                    "Account created, but we couldn't send the verification email." + fallback_hint,
+                    "Account created, but we couldn't send the verification email." + email_failure_hint(),
                 )
 
             return redirect('login')
@@ -108,72 +130,102 @@ def verify_email(request, uidb64, token):
 
 # --- Main Dashboard Controller ---
 
+def _hospital_alerts(hospital):
+    """Pending alerts ``hospital`` should see.
+
+    Those picked for it, plus broadcasts: alerts with no preferred hospital
+    whose routing shortlist (if any) has timed out.
+    """
+    return SOSAlert.objects.filter(status='pending').annotate(
+        routed_to_me=Exists(SOSRoute.objects.filter(alert=OuterRef('pk'), hospital=hospital))
+    ).filter(
+        Q(preferred_hospital=hospital)
+        | Q(routed_to_me=True)
+        | Q(preferred_hospital__isnull=True, routed_until__isnull=True)
+        | Q(preferred_hospital__isnull=True, routed_until__lte=timezone.now())
+    )
+
+
+def _routing_timeouts(request):
+    """Shortlists that have timed out, turning their alerts into broadcasts.
+
+    Time alone changes what a hospital sees, so this goes into its ETags.
+    """
+    if request.user.role != 'hospital':
+        return []
+    return [SOSAlert.objects.filter(status='pending', routed_until__lte=timezone.now()).count()]
+
+
+def _own_location(request):
+    # Buffered fix included, as the views themselves see it.
+    user = apply_pending_location(request.user)
+    return [user.latitude, user.longitude]
+
+
+def _dashboard_etag_vary(request):
+    # The user's own position is drawn on their map.
+    return [*_own_location(request), *_routing_timeouts(request)]
+
+
 @login_required
-@never_cache
+@read_replica
+@cache_control(private=True, no_cache=True)
+@condition(etag_func=versioned_etag(ALERTS, PEOPLE, STOCK, vary=_dashboard_etag_vary))
 def dashboard(request):
-    user = request.user
+    user = apply_pending_location(request.user)
     
     # 1. ADMIN DASHBOARD
     if user.role == 'admin':
-        hospitals = User.objects.filter(role='hospital')
-        all_requests = SOSAlert.objects.all().order_by('-created_at')
+        hospitals = project(User.objects.filter(role='hospital'), HospitalRow)
+        include_history = request.GET.get('history') == '1'
+        if include_history:
+            all_requests = SOSAlert.objects.materialize(
+                SOSAlert.objects.with_history().order_by('-created_at')
+            )
+        else:
+            all_requests = project(SOSAlert.objects.order_by('-created_at'), AdminAlertRow)
         hospital_form = HospitalCreationForm()
         
         context = {
             'hospitals': hospitals,
+            'shortages': StockShortage.objects.select_related('hospital').order_by('units', 'hospital__first_name'),
             'requests': all_requests,
-            'hospital_form': hospital_form
+            'hospital_form': hospital_form,
+            'include_history': include_history,
+            'blood_groups': User.BLOOD_GROUP_CHOICES,
         }
         return render(request, 'admin_dashboard.html', context)
 
     # 2. PATIENT DASHBOARD
     elif user.role == 'user':
-        my_alerts = SOSAlert.objects.filter(requester=user).order_by('-created_at')
-        hospitals = User.objects.filter(role='hospital')
-        nearby = []
-        for h in hospitals:
-            dist = calculate_distance(user.latitude, user.longitude, h.latitude, h.longitude)
-            nearby.append({
-                'name': h.first_name, 
-                'dist': round(dist, 1), 
-                'address': h.address
-            })
-        nearby.sort(key=lambda x: x['dist'])
-
-        registered_hospitals_for_map = [
-            {
-                'id': h.id,
-                'name': h.first_name or h.username,
-                'latitude': h.latitude,
-                'longitude': h.longitude,
-                'address': h.address or '',
-            }
-            for h in hospitals
-        ]
-
+        include_history = request.GET.get('history') == '1'
+        if include_history:
+            my_alerts = SOSAlert.objects.materialize(
+                SOSAlert.objects.with_history(requester=user).order_by('-created_at')
+            )
+        else:
+            my_alerts = project(SOSAlert.objects.filter(requester=user).order_by('-created_at'), PatientAlertRow)
+        # Registered hospitals are loaded by the map per viewport from hospital_map_api.
         return render(
             request,
             'patient_dashboard.html',
-            {'alerts': my_alerts, 'hospitals': nearby[:5], 'registered_hospitals_for_map': registered_hospitals_for_map},
+            {
+                'alerts': my_alerts,
+                'include_history': include_history,
+            },
         )
 
     # 3. DONOR DASHBOARD
     elif user.role == 'donor':
-        all_alerts = SOSAlert.objects.all().order_by('-created_at')
+        all_alerts = project(SOSAlert.objects.exclude(status='expired').order_by('-created_at'), DonorAlertRow)
         return render(request, 'donor_dashboard.html', {'alerts': all_alerts})
 
     # 4. HOSPITAL DASHBOARD
     elif user.role == 'hospital':
-        alerts = SOSAlert.objects.filter(status='pending').filter(
-            Q(preferred_hospital__isnull=True) | Q(preferred_hospital=user)
-        ).order_by('-created_at')
-        inventory, _ = BloodInventory.objects.get_or_create(hospital=user)
-        blood_map = {
-            'A+': 'a_positive', 'A-': 'a_negative',
-            'B+': 'b_positive', 'B-': 'b_negative',
-            'AB+': 'ab_positive', 'AB-': 'ab_negative',
-            'O+': 'o_positive', 'O-': 'o_negative',
-        }
+        alerts = project(_hospital_alerts(user).order_by('-created_at'), HospitalAlertRow)
+        # May write, so never look on a replica that hasn't seen the row yet.
+        inventory, _ = BloodInventory.objects.using(PRIMARY).get_or_create(hospital=user)
+        blood_map = BloodInventory.FIELD_FOR_BLOOD_TYPE
 
         alerts_with_stock = []
         for alert in alerts:
@@ -186,27 +238,14 @@ def dashboard(request):
                 'can_accept': can_accept,
             })
 
-        alerts_for_map = [
-            {
-                'id': a.id,
-                'patient_name': a.patient_name or 'Unknown',
-                'blood_type': a.blood_type,
-                'latitude': a.latitude,
-                'longitude': a.longitude,
-                'note': a.note or '',
-                'created_at': a.created_at.isoformat(),
-            }
-            for a in alerts
-            if a.latitude is not None and a.longitude is not None
-        ]
-
+        # The map loads its markers per viewport from alert_map_api.
         return render(
             request,
             'hospital_dashboard.html',
             {
                 'alerts': alerts_with_stock,
                 'inventory': inventory,
-                'alerts_for_map': alerts_for_map,
+                'shortages': StockShortage.objects.filter(hospital=user).order_by('blood_type'),
             },
         )
     
@@ -221,7 +260,8 @@ def add_hospital(request):
     if request.method == 'POST':
         form = HospitalCreationForm(request.POST)
         if form.is_valid():
-            form.save()
+            hospital = form.save()
+            record_stock_change(None, stock_snapshot(hospital, None))
     return redirect('dashboard')
 
 @login_required
@@ -233,7 +273,9 @@ def manage_inventory(request, hospital_id):
     if request.method == 'POST':
         form = InventoryForm(request.POST, instance=inventory)
         if form.is_valid():
-            form.save()
+            with stock_change(hospital.pk):
+                form.save()
+            check_hospital(hospital, inventory)
             return redirect('dashboard')
     else:
         form = InventoryForm(instance=inventory)
@@ -249,13 +291,44 @@ def manage_my_inventory(request):
     if request.method == 'POST':
         form = InventoryForm(request.POST, instance=inventory)
         if form.is_valid():
-            form.save()
+            with stock_change(hospital.pk):
+                form.save()
+            check_hospital(hospital, inventory)
             return redirect('dashboard')
     else:
         form = InventoryForm(instance=inventory)
     return render(request, 'manage_inventory.html', {'form': form, 'hospital': hospital})
 
 
+def _edit_thresholds(request, hospital):
+    threshold = StockThreshold.objects.filter(hospital=hospital).first() or StockThreshold(hospital=hospital)
+    if request.method == 'POST':
+        form = StockThresholdForm(request.POST, instance=threshold)
+        if form.is_valid():
+            form.save()
+            check_hospital(hospital)
+            return redirect('dashboard')
+    else:
+        form = StockThresholdForm(instance=threshold)
+    return render(request, 'manage_thresholds.html', {
+        'form': form, 'hospital': hospital, 'default_units': settings.LIFELINE_LOW_STOCK_UNITS,
+    })
+
+
+@login_required
+def manage_thresholds(request, hospital_id):
+    if request.user.role != 'admin':
+        return redirect('dashboard')
+    return _edit_thresholds(request, get_object_or_404(User, id=hospital_id, role='hospital'))
+
+
+@login_required
+def manage_my_thresholds(request):
+    if request.user.role != 'hospital':
+        return redirect('dashboard')
+    return _edit_thresholds(request, request.user)
+
+
 @login_required
 @never_cache
 def donor_profile(request):
@@ -281,7 +354,8 @@ def manage_hospital(request, hospital_id):
     if request.method == 'POST':
         form = HospitalUpdateForm(request.POST, instance=hospital)
         if form.is_valid():
-            form.save()
+            with stock_change(hospital.pk):
+                form.save()
             return redirect('dashboard')
     else:
         form = HospitalUpdateForm(instance=hospital)
@@ -295,14 +369,250 @@ def delete_hospital(request, hospital_id):
     if request.user.role != 'admin':
         return redirect('dashboard')
     hospital = get_object_or_404(User, id=hospital_id, role='hospital')
-    hospital.delete()
+    with stock_change(hospital.pk):
+        hospital.delete()
     return redirect('dashboard')
 
+
+def _analytics_window_hours(request, default):
+    try:
+        hours = int(request.GET.get('hours', default))
+    except ValueError:
+        hours = default
+    return max(1, min(hours, 24 * 90))
+
+
+@login_required
+@read_replica
+def sos_analytics(request):
+    if request.user.role != 'admin':
+        return redirect('dashboard')
+
+    hours = _analytics_window_hours(request, 24 * 7)
+    since = timezone.now() - timedelta(hours=hours)
+    outcomes = [value for value, _ in SOSAlert.STATUS_CHOICES]
+
+    by_type = {blood_type: dict.fromkeys(outcomes, 0) for blood_type, _ in User.BLOOD_GROUP_CHOICES}
+    for row in demand(since, group_by=('blood_type', 'outcome')):
+        by_type.setdefault(row['blood_type'], dict.fromkeys(outcomes, 0))[row['outcome']] = row['total']
+    blood_type_rows = [
+        {'blood_type': blood_type, 'counts': [counts[o] for o in outcomes], 'total': sum(counts.values())}
+        for blood_type, counts in by_type.items()
+    ]
+
+    regions = sorted(demand(since, group_by=('geo_cell',)), key=lambda row: row['total'], reverse=True)[:10]
+    hourly = list(demand(since, group_by=('bucket',)))
+
+    return render(
+        request,
+        'sos_analytics.html',
+        {
+            'hours': hours,
+            'outcomes': outcomes,
+            'blood_type_rows': blood_type_rows,
+            'regions': regions,
+            'hourly': hourly,
+            'cell_degrees': settings.LIFELINE_ROLLUP_CELL_DEGREES,
+        },
+    )
+
+
+@login_required
+@read_replica
+def sos_demand_api(request):
+    if request.user.role != 'admin':
+        return JsonResponse({'ok': False, 'error': 'Admins only.'}, status=403)
+
+    hours = _analytics_window_hours(request, 24)
+    group_by = tuple(
+        dim for dim in (request.GET.get('group_by') or 'blood_type,outcome').split(',')
+        if dim in ROLLUP_DIMENSIONS
+    ) or ('blood_type', 'outcome')
+    rows = demand(
+        timezone.now() - timedelta(hours=hours),
+        group_by=group_by,
+        blood_type=(request.GET.get('blood_type') or '').strip() or None,
+    )
+    return JsonResponse({
+        'ok': True,
+        'hours': hours,
+        'group_by': list(group_by),
+        'cell_degrees': settings.LIFELINE_ROLLUP_CELL_DEGREES,
+        'rows': [
+            {**row, 'bucket': row['bucket'].isoformat()} if 'bucket' in row else row
+            for row in rows
+        ],
+    })
+
+
+@login_required
+@read_replica
+@cache_control(private=True, no_cache=True)
+@condition(etag_func=versioned_etag(STOCK, PEOPLE))
+def stock_grid_api(request):
+    if request.user.role != 'admin':
+        return JsonResponse({'ok': False, 'error': 'Admins only.'}, status=403)
+
+    level, size, fields, rows = grid_cells(
+        parse_zoom(request.GET.get('zoom')),
+        parse_bbox(request.GET.get('bbox')),
+        blood_type=(request.GET.get('blood_type') or '').strip() or None,
+    )
+    # Rows are positional arrays keyed by ``fields`` to keep the payload small.
+    return JsonResponse({
+        'ok': True,
+        'level': level,
+        'cell_degrees': size,
+        'fields': ['lat', 'lon', *fields],
+        'cells': rows,
+    })
+
+
+@login_required
+@read_replica
+@cache_control(private=True, no_cache=True)
+@condition(etag_func=versioned_etag(PEOPLE))
+def hospital_map_api(request):
+    bounds = parse_bbox(request.GET.get('bbox'))
+    if bounds is None:
+        return JsonResponse({'ok': False, 'error': 'bbox=south,west,north,east is required.'}, status=400)
+    zoom = parse_zoom(request.GET.get('zoom'), default=12)
+
+    hospitals = in_bbox(User.objects.filter(role='hospital'), bounds)
+    if should_cluster(hospitals, zoom):
+        return JsonResponse({'ok': True, 'clustered': True, 'clusters': cluster(hospitals, zoom)})
+    return JsonResponse({
+        'ok': True,
+        'clustered': False,
+        'hospitals': [
+            {
+                'id': h['id'],
+                'name': h['first_name'] or h['username'],
+                'latitude': h['latitude'],
+                'longitude': h['longitude'],
+                'address': h['address'] or '',
+            }
+            for h in hospitals.values('id', 'first_name', 'username', 'latitude', 'longitude', 'address')
+        ],
+    })
+
+
+@login_required
+@read_replica
+@cache_control(private=True, no_cache=True)
+@condition(etag_func=versioned_etag(ALERTS, vary=_routing_timeouts))
+def alert_map_api(request):
+    if request.user.role != 'hospital':
+        return JsonResponse({'ok': False, 'error': 'Hospitals only.'}, status=403)
+    bounds = parse_bbox(request.GET.get('bbox'))
+    if bounds is None:
+        return JsonResponse({'ok': False, 'error': 'bbox=south,west,north,east is required.'}, status=400)
+    zoom = parse_zoom(request.GET.get('zoom'), default=12)
+
+    # Busy viewports get the precomputed clusters, which count every pending
+    # alert in the area; individual markers are limited to alerts this
+    # hospital can act on.
+    alerts = in_bbox(_hospital_alerts(request.user), bounds)
+    if should_cluster(alerts, zoom):
+        return JsonResponse({'ok': True, 'clustered': True, 'clusters': pending_clusters(zoom, bounds)})
+    return JsonResponse({
+        'ok': True,
+        'clustered': False,
+        'alerts': [
+            {
+                'id': a['id'],
+                'patient_name': a['patient_name'] or 'Unknown',
+                'blood_type': a['blood_type'],
+                'latitude': a['latitude'],
+                'longitude': a['longitude'],
+                'note': a['note'] or '',
+                'created_at': a['created_at'].isoformat(),
+            }
+            for a in alerts.values('id', 'patient_name', 'blood_type', 'latitude', 'longitude', 'note', 'created_at')
+        ],
+    })
+
+
+@login_required
+@read_replica
+def export_data(request, kind):
+    if request.user.role != 'admin':
+        return redirect('dashboard')
+    if kind not in EXPORTS:
+        raise Http404("Unknown export.")
+
+    fmt = request.GET.get('format', 'csv')
+    if fmt not in WRITERS:
+        fmt = 'csv'
+    filters = {
+        'start': parse_day(request.GET.get('start')),
+        'end': parse_day(request.GET.get('end'), end_of_day=True),
+    }
+    for name in ('start', 'end'):
+        if request.GET.get(name) and filters[name] is None:
+            return JsonResponse({'ok': False, 'error': f'{name} must be YYYY-MM-DD.'}, status=400)
+    if kind == 'sos':
+        filters['status'] = (request.GET.get('status') or '').strip() or None
+        filters['include_archived'] = request.GET.get('history') == '1'
+
+    chunks, content_type, extension = export_stream(
+        kind, fmt, compress=request.GET.get('gzip') == '1', **filters
+    )
+    response = StreamingHttpResponse(chunks, content_type=content_type)
+    response['Content-Disposition'] = f'attachment; filename="lifeline-{kind}-{timezone.now():%Y%m%d}.{extension}"'
+    return response
+
+
+@login_required
+def import_donors_upload(request):
+    if request.user.role != 'admin':
+        return redirect('dashboard')
+
+    report = None
+    if request.method == 'POST':
+        form = DonorImportForm(request.POST, request.FILES)
+        if form.is_valid():
+            stream = io.TextIOWrapper(form.cleaned_data['csv_file'].file, encoding='utf-8-sig', newline='')
+            report = import_donors(stream)
+            messages.success(request, f"Imported {report.created} donor(s) from {report.rows} row(s).")
+    else:
+        form = DonorImportForm()
+    return render(
+        request,
+        'import_donors.html',
+        {
+            'form': form, 'report': report, 'columns': DONOR_IMPORT_COLUMNS,
+            'max_rows': settings.LIFELINE_IMPORT_UPLOAD_MAX_ROWS,
+        },
+    )
+
 # --- SOS Operations ---
 
+def _idempotency_cache_key(user, key):
+    return f'lifeline:sos:idempotency:{user.pk}:{key}'
+
+
+def _find_idempotent_alert(user, key):
+    """Id of the alert ``user`` already raised with ``key``, or None.
+
+    Recent keys are answered from the cache; the unique constraint on
+    (requester, idempotency_key) backs it up once they fall out.
+    """
+    alert_id = cache.get(_idempotency_cache_key(user, key))
+    if alert_id is None:
+        alert_id = SOSAlert.objects.filter(requester=user, idempotency_key=key).values_list('id', flat=True).first()
+    return alert_id
+
+
 @login_required
+@ratelimit('submit_sos')
 def submit_sos(request):
     if request.method == 'POST':
+        idempotency_key = (request.POST.get('idempotency_key') or '').strip()[:64] or None
+        if idempotency_key and _find_idempotent_alert(request.user, idempotency_key):
+            messages.info(request, "Your SOS alert was already sent.")
+            return redirect('dashboard')
+
         # FIXED: Use 'or "Unknown"' to prevent None values causing IntegrityError
         patient_name = request.POST.get('patient_name') or "Unknown Patient"
         blood_type = request.POST.get('blood_type')
@@ -315,8 +625,9 @@ def submit_sos(request):
             latitude, longitude = None, None
 
         if latitude is None or longitude is None:
-            latitude = request.user.latitude
-            longitude = request.user.longitude
+            user = apply_pending_location(request.user)
+            latitude = user.latitude
+            longitude = user.longitude
 
         preferred_hospital = None
         preferred_hospital_name = ""
@@ -329,16 +640,35 @@ def submit_sos(request):
                     preferred_hospital = candidate
                     preferred_hospital_name = candidate.first_name or candidate.username
         
-        SOSAlert.objects.create(
-            requester=request.user,
-            patient_name=patient_name,
-            blood_type=blood_type,
-            note=note,
-            latitude=latitude,
-            longitude=longitude,
-            preferred_hospital=preferred_hospital,
-            preferred_hospital_name=preferred_hospital_name,
-        )
+        try:
+            with transaction.atomic():
+                alert = SOSAlert.objects.create(
+                    requester=request.user,
+                    patient_name=patient_name,
+                    blood_type=blood_type,
+                    note=note,
+                    latitude=latitude,
+                    longitude=longitude,
+                    preferred_hospital=preferred_hospital,
+                    preferred_hospital_name=preferred_hospital_name,
+                    idempotency_key=idempotency_key,
+                )
+        except IntegrityError:
+            # A concurrent retry with the same key won the insert.
+            if idempotency_key and _find_idempotent_alert(request.user, idempotency_key):
+                messages.info(request, "Your SOS alert was already sent.")
+                return redirect('dashboard')
+            raise
+        if idempotency_key:
+            cache.set(
+                _idempotency_cache_key(request.user, idempotency_key),
+                alert.pk,
+                settings.LIFELINE_SOS_IDEMPOTENCY_WINDOW_SECONDS,
+            )
+        record_alert_created(alert)
+        record_pending_change(alert, None)
+        if preferred_hospital is None:
+            route_alert(alert)
     return redirect('dashboard')
 
 
@@ -360,44 +690,69 @@ def save_sos_feedback(request, alert_id):
     return redirect('dashboard')
 
 
+def _answer_alert(alert, hospital, status):
+    """Move a pending ``alert`` to ``status`` ('accepted' or 'declined') for ``hospital``.
+
+    The UPDATEs re-check ``status='pending'`` and, on accept, that a unit is
+    left, so a concurrent answer or expiry is never counted twice. Returns
+    ``(outcome, before_levels, after_levels)``: outcome is ``status``,
+    'gone' (no longer pending) or 'no_stock'; the levels are set on accept.
+    """
+    changes = {'status': status}
+    if status == 'accepted':
+        changes['responder'] = hospital
+    with transaction.atomic():
+        if not SOSAlert.objects.filter(pk=alert.pk, status='pending').update(**changes):
+            return 'gone', None, None
+        before_levels = after_levels = None
+        if status == 'accepted':
+            field_name = BloodInventory.FIELD_FOR_BLOOD_TYPE.get(alert.blood_type)
+            with stock_change(hospital.pk):
+                inventory = BloodInventory.objects.select_for_update().filter(hospital=hospital).first()
+                deducted = field_name and inventory and BloodInventory.objects.filter(
+                    pk=inventory.pk, **{f'{field_name}__gt': 0}
+                ).update(**{field_name: F(field_name) - 1})
+            if not deducted:
+                transaction.set_rollback(True)
+                return 'no_stock', None, None
+            before_levels = stock_levels(inventory)
+            inventory.refresh_from_db(fields=[field_name])
+            after_levels = stock_levels(inventory)
+            bump(STOCK)
+        for field, value in changes.items():
+            setattr(alert, field, value)
+        record_status_change(alert, 'pending')
+        record_pending_change(alert, 'pending')
+        bump(ALERTS)
+    return status, before_levels, after_levels
+
+
 @login_required
-def respond_sos(request, alert_id, action):
-    if request.user.role != 'hospital':
+async def respond_sos(request, alert_id, action):
+    user = await request.auser()
+    if user.role != 'hospital':
         return redirect('dashboard')
 
     if request.method != 'POST':
         return redirect('dashboard')
         
-    alert = get_object_or_404(SOSAlert, id=alert_id)
+    alert = await aget_object_or_404(SOSAlert.objects.select_related('requester'), id=alert_id)
     
     if action == 'accept':
         if alert.status != 'pending':
             return redirect('dashboard')
-        inventory = get_object_or_404(BloodInventory, hospital=request.user)
-        blood_map = {
-            'A+': 'a_positive', 'A-': 'a_negative',
-            'B+': 'b_positive', 'B-': 'b_negative',
-            'AB+': 'ab_positive', 'AB-': 'ab_negative',
-            'O+': 'o_positive', 'O-': 'o_negative',
-        }
-        field_name = blood_map.get(alert.blood_type)
-        current_stock = getattr(inventory, field_name, 0) if field_name else 0
-        if current_stock <= 0:
+        outcome, before_levels, after_levels = await sync_to_async(_answer_alert)(alert, user, 'accepted')
+        if outcome == 'gone':
+            return redirect('dashboard')
+        if outcome == 'no_stock':
             messages.error(request, "No stock left for the requested blood group.")
             return redirect('dashboard')
-        alert.status = 'accepted'
-        alert.responder = request.user
-        alert.save()
-        
-        # Deduct Inventory
-        if field_name:
-            setattr(inventory, field_name, current_stock - 1)
-            inventory.save()
+        await arecord_stock_levels(user, before_levels, after_levels)
 
         # Notify requester
         recipient_email = (alert.requester.email or '').strip()
         if recipient_email:
-            hospital_name = request.user.first_name or request.user.username
+            hospital_name = user.first_name or user.username
             subject = 'LifeLine SOS Update: Request Accepted'
             message = (
                 f"Hello {alert.requester.first_name or alert.requester.username},\n\n"
@@ -408,30 +763,19 @@ def respond_sos(request, alert_id, action):
                 f"Please contact the hospital or proceed immediately.\n\n"
                 f"- LifeLine"
             )
-            try:
-                send_mail(
-                    subject=subject,
-                    message=message,
-                    from_email=getattr(settings, 'DEFAULT_FROM_EMAIL', None) or None,
-                    recipient_list=[recipient_email],
-                    fail_silently=False,
-                )
-            except Exception:
-                logger.exception("Failed to send SOS acceptance email (backend=%s).", getattr(settings, 'EMAIL_BACKEND', ''))
-                fallback_hint = ""
-                if getattr(settings, 'EMAIL_BACKEND', '').endswith('filebased.EmailBackend'):
-                    fallback_hint = f" Check `sent_emails/` on the server: {getattr(settings, 'EMAIL_FILE_PATH', '')}."
-                messages.error(request, "Accepted the request, but failed to send email notification." + fallback_hint)
+            if not await asend_notification(subject, message, [recipient_email]):
+                messages.error(request, "Accepted the request, but failed to send email notification." + email_failure_hint())
             
     elif action == 'decline':
         if alert.status != 'pending':
             return redirect('dashboard')
-        alert.status = 'declined' 
-        alert.save()
+        outcome, _, _ = await sync_to_async(_answer_alert)(alert, user, 'declined')
+        if outcome == 'gone':
+            return redirect('dashboard')
 
         recipient_email = (alert.requester.email or '').strip()
         if recipient_email:
-            hospital_name = request.user.first_name or request.user.username
+            hospital_name = user.first_name or user.username
             subject = 'LifeLine SOS Update: Request Declined'
             message = (
                 f"Hello {alert.requester.first_name or alert.requester.username},\n\n"
@@ -442,55 +786,46 @@ def respond_sos(request, alert_id, action):
                 f"Please try another hospital or resend the request.\n\n"
                 f"- LifeLine"
             )
-            try:
-                send_mail(
-                    subject=subject,
-                    message=message,
-                    from_email=getattr(settings, 'DEFAULT_FROM_EMAIL', None) or None,
-                    recipient_list=[recipient_email],
-                    fail_silently=False,
-                )
-            except Exception:
-                logger.exception("Failed to send SOS decline email (backend=%s).", getattr(settings, 'EMAIL_BACKEND', ''))
-                fallback_hint = ""
-                if getattr(settings, 'EMAIL_BACKEND', '').endswith('filebased.EmailBackend'):
-                    fallback_hint = f" Check `sent_emails/` on the server: {getattr(settings, 'EMAIL_FILE_PATH', '')}."
-                messages.error(request, "Declined the request, but failed to send email notification." + fallback_hint)
+            if not await asend_notification(subject, message, [recipient_email]):
+                messages.error(request, "Declined the request, but failed to send email notification." + email_failure_hint())
         
     return redirect('dashboard')
 
 
 @login_required
-def respond_sos_donor(request, alert_id, action):
-    if request.user.role != 'donor':
+async def respond_sos_donor(request, alert_id, action):
+    user = await request.auser()
+    if user.role != 'donor':
         return redirect('dashboard')
     if request.method != 'POST':
         return redirect('dashboard')
 
-    alert = get_object_or_404(SOSAlert, id=alert_id)
-    if alert.donor_status != 'pending':
+    alert = await aget_object_or_404(SOSAlert.objects.select_related('requester'), id=alert_id)
+    if alert.donor_status != 'pending' or alert.status == 'expired':
         return redirect('dashboard')
 
     if action == 'accept':
-        alert.donor_status = 'accepted'
-        alert.donor_responder = request.user
-        alert.save()
-        request.user.donor_availability = 'pending'
-        request.user.save(update_fields=['donor_availability'])
-        action_text = 'accepted'
+        donor_status, availability, action_text = 'accepted', 'pending', 'accepted'
     elif action == 'decline':
-        alert.donor_status = 'declined'
-        alert.donor_responder = request.user
-        alert.save()
-        request.user.donor_availability = 'available'
-        request.user.save(update_fields=['donor_availability'])
-        action_text = 'declined'
+        donor_status, availability, action_text = 'declined', 'available', 'declined'
     else:
         return redirect('dashboard')
+    # Only the donor columns, and only if no other donor answered first and
+    # the alert hasn't expired since it was loaded: saving the whole stale
+    # copy would undo a hospital's answer or expiry.
+    answered = await SOSAlert.objects.filter(pk=alert.pk, donor_status='pending').exclude(
+        status='expired',
+    ).aupdate(donor_status=donor_status, donor_responder=user)
+    if not answered:
+        return redirect('dashboard')
+    await sync_to_async(bump)(ALERTS)
+    alert.donor_status, alert.donor_responder = donor_status, user
+    user.donor_availability = availability
+    await user.asave(update_fields=['donor_availability'])
 
     recipient_email = (alert.requester.email or '').strip()
     if recipient_email:
-        donor_name = request.user.first_name or request.user.username
+        donor_name = user.first_name or user.username
         subject = f'LifeLine Update: Donor {action_text.capitalize()}'
         message = (
             f"Hello {alert.requester.first_name or alert.requester.username},\n\n"
@@ -501,78 +836,172 @@ def respond_sos_donor(request, alert_id, action):
             f"Reason: {alert.note or '-'}\n\n"
             f"- LifeLine"
         )
-        try:
-            send_mail(
-                subject=subject,
-                message=message,
-                from_email=getattr(settings, 'DEFAULT_FROM_EMAIL', None) or None,
-                recipient_list=[recipient_email],
-                fail_silently=False,
-            )
-        except Exception:
-            logger.exception("Failed to send donor response email (backend=%s).", getattr(settings, 'EMAIL_BACKEND', ''))
-            fallback_hint = ""
-            if getattr(settings, 'EMAIL_BACKEND', '').endswith('filebased.EmailBackend'):
-                fallback_hint = f" Check `sent_emails/` on the server: {getattr(settings, 'EMAIL_FILE_PATH', '')}."
-            messages.error(request, "Donor response recorded, but failed to send email." + fallback_hint)
+        if not await asend_notification(subject, message, [recipient_email]):
+            messages.error(request, "Donor response recorded, but failed to send email." + email_failure_hint())
 
     return redirect('dashboard')
 
 
 @login_required
+@read_replica
+@cache_control(private=True, no_cache=True)
+@condition(etag_func=versioned_etag(ALERTS, PEOPLE))
 def patient_donors(request, alert_id):
     if request.user.role != 'user':
         return redirect('dashboard')
-    alert = get_object_or_404(SOSAlert, id=alert_id, requester=request.user)
-    donors = list(
+    alerts = project(SOSAlert.objects.filter(id=alert_id, requester=request.user), PatientAlertRow)
+    if not alerts:
+        raise Http404("No SOSAlert matches the given query.")
+    alert = alerts[0]
+    donors = project(
         User.objects.filter(
             role='donor',
             blood_group=alert.blood_type,
             donor_availability='available',
-        ).order_by('first_name', 'username')
+        ).order_by('first_name', 'username'),
+        DonorRow,
     )
 
     # Always include the donor who accepted/declined this request (if any),
     # even if they are no longer "available".
-    if alert.donor_responder and alert.donor_responder not in donors:
-        donors.insert(0, alert.donor_responder)
+    if alert.donor_responder and all(donor.id != alert.donor_responder.id for donor in donors):
+        donors[:0] = project(User.objects.filter(pk=alert.donor_responder.id), DonorRow)
 
     return render(request, 'patient_donors.html', {'alert': alert, 'donors': donors})
 
 
+def _donor_search(request, limit=None):
+    """Run the donor directory search from the query string.
+
+    Returns ``(filters, rows, next_cursor)``; distances are from the
+    searcher's own position.
+    """
+    params = request.GET
+    try:
+        within_km = max(float(params.get('within_km') or 0), 0) or None
+    except ValueError:
+        within_km = None
+    filters = {
+        'text': (params.get('q') or '').strip(),
+        'blood_group': (params.get('blood_group') or '').strip(),
+        'availability': (params.get('availability') or '').strip(),
+        'eligible': params.get('eligible') == '1',
+        'within_km': within_km,
+    }
+    user = apply_pending_location(request.user)
+    after = decode_cursor(params['after']) if params.get('after') else None
+    rows, next_cursor = search_donors(
+        **filters, origin=(user.latitude, user.longitude), after=after, limit=limit,
+    )
+    return filters, rows, next_cursor
+
+
+def _donor_search_etag_vary(request):
+    # Distances depend on where the searcher is, eligibility on the date.
+    return [*_own_location(request), timezone.localdate()]
+
+
 @login_required
+@read_replica
+@cache_control(private=True, no_cache=True)
+@condition(etag_func=versioned_etag(PEOPLE, vary=_donor_search_etag_vary))
 def donor_list(request):
-    blood_group = (request.GET.get('blood_group') or '').strip()
-    donors = User.objects.filter(role='donor')
-    if blood_group:
-        donors = donors.filter(blood_group=blood_group)
-    donors = donors.order_by('first_name', 'username')
-    return render(request, 'donor_list.html', {'donors': donors, 'blood_group': blood_group, 'blood_groups': User.BLOOD_GROUP_CHOICES})
+    filters, donors, next_cursor = _donor_search(request)
+    next_query = None
+    if next_cursor:
+        query = request.GET.copy()
+        query['after'] = next_cursor
+        next_query = query.urlencode()
+    return render(request, 'donor_list.html', {
+        **filters,
+        'donors': donors,
+        'next_query': next_query,
+        'paged': bool(request.GET.get('after')),
+        'blood_groups': User.BLOOD_GROUP_CHOICES,
+        'availability_choices': User.DONOR_AVAILABILITY_CHOICES,
+    })
 
 
 @login_required
+@read_replica
+@cache_control(private=True, no_cache=True)
+@condition(etag_func=versioned_etag(PEOPLE, vary=_donor_search_etag_vary))
+def donor_search_api(request):
+    if request.GET.get('after') and decode_cursor(request.GET['after']) is None:
+        return JsonResponse({'ok': False, 'error': 'Invalid cursor.'}, status=400)
+    try:
+        limit = max(1, min(int(request.GET.get('limit') or settings.LIFELINE_DONOR_PAGE_SIZE), 200))
+    except ValueError:
+        return JsonResponse({'ok': False, 'error': 'Invalid limit.'}, status=400)
+    _, donors, next_cursor = _donor_search(request, limit=limit)
+    return JsonResponse({
+        'ok': True,
+        'donors': [
+            {
+                'id': d.id,
+                'name': d.first_name or d.username,
+                'username': d.username,
+                'blood_group': d.blood_group,
+                'availability': d.donor_availability,
+                'last_donation_date': d.last_donation_date.isoformat() if d.last_donation_date else None,
+                'address': d.address or '',
+                'distance_km': round(d.distance_km, 1),
+            }
+            for d in donors
+        ],
+        'next': next_cursor,
+    })
+
+
+@login_required
+@read_replica
+@cache_control(private=True, no_cache=True)
+@condition(etag_func=versioned_etag(PEOPLE))
 def donor_detail(request, donor_id):
     donor = get_object_or_404(User, id=donor_id, role='donor')
     return render(request, 'donor_detail.html', {'donor': donor})
 
 
+def _move_hospital(hospital, latitude, longitude):
+    with stock_change(hospital.pk):
+        hospital.latitude, hospital.longitude = latitude, longitude
+        hospital.save(update_fields=['latitude', 'longitude'])
+
+
 @login_required
 @require_POST
-def update_location(request):
+async def update_location(request):
+    # Either one fix as form fields, or a JSON batch
+    # {"fixes": [{"latitude": .., "longitude": ..}, ...]} oldest first, of
+    # which only the newest matters.
     try:
-        latitude = float(request.POST.get('latitude'))
-        longitude = float(request.POST.get('longitude'))
-    except (TypeError, ValueError):
+        if request.content_type == 'application/json':
+            fixes = json.loads(request.body).get('fixes') or []
+            fix = fixes[-1]
+        else:
+            fix = request.POST
+        latitude = float(fix.get('latitude'))
+        longitude = float(fix.get('longitude'))
+    except (TypeError, ValueError, AttributeError, IndexError):
+        return JsonResponse({'ok': False, 'error': 'Invalid latitude/longitude.'}, status=400)
+    if not (-90 <= latitude <= 90 and -180 <= longitude <= 180):
         return JsonResponse({'ok': False, 'error': 'Invalid latitude/longitude.'}, status=400)
 
-    request.user.latitude = latitude
-    request.user.longitude = longitude
-    request.user.save(update_fields=['latitude', 'longitude'])
-    return JsonResponse({'ok': True, 'latitude': latitude, 'longitude': longitude})
+    user = await request.auser()
+    if user.role == 'hospital':
+        # Hospitals rarely move and routing and the stock grid read their
+        # position from the database, so write it straight through.
+        await sync_to_async(_move_hospital)(user, latitude, longitude)
+        return JsonResponse({'ok': True, 'latitude': latitude, 'longitude': longitude, 'stored': True})
+
+    stored = await arecord_location(user, latitude, longitude)
+    await aflush_if_due()
+    return JsonResponse({'ok': True, 'latitude': latitude, 'longitude': longitude, 'stored': stored})
 
 
 @login_required
-def osm_nearby_hospitals(request):
+@ratelimit('osm_nearby_hospitals', methods=('GET',), as_json=True)
+async def osm_nearby_hospitals(request):
     try:
         latitude = float(request.GET.get('latitude'))
         longitude = float(request.GET.get('longitude'))
@@ -595,44 +1024,53 @@ def osm_nearby_hospitals(request):
 out center tags;
 """.strip()
 
-    data = urllib.parse.urlencode({'data': query}).encode('utf-8')
-    req = urllib.request.Request(
-        'https://overpass-api.de/api/interpreter',
-        data=data,
-        headers={'Content-Type': 'application/x-www-form-urlencoded; charset=UTF-8'},
-        method='POST',
-    )
-
-    try:
-        with urllib.request.urlopen(req, timeout=20) as resp:
-            payload = json.loads(resp.read().decode('utf-8'))
-    except Exception:
-        return JsonResponse({'ok': False, 'error': 'Overpass request failed.'}, status=502)
+    # Everyone asking about the same spot shares one Overpass answer for
+    # LIFELINE_OSM_CACHE_SECONDS, tagged with an ETag of its body.
+    cache_seconds = settings.LIFELINE_OSM_CACHE_SECONDS
+    cache_key = 'lifeline:osm:' + hashlib.blake2b(query.encode(), digest_size=16).hexdigest()
+    cached = await cache.aget(cache_key) if cache_seconds else None
+    if cached is None:
+        try:
+            async with httpx.AsyncClient(timeout=settings.LIFELINE_OVERPASS_TIMEOUT, verify=OVERPASS_SSL_CONTEXT) as client:
+                resp = await client.post(settings.LIFELINE_OVERPASS_URL, data={'data': query})
+                resp.raise_for_status()
+                payload = resp.json()
+        except Exception:
+            return JsonResponse({'ok': False, 'error': 'Overpass request failed.'}, status=502)
+
+        hospitals = []
+        for el in payload.get('elements', []):
+            if el.get('type') == 'node':
+                lat = el.get('lat')
+                lon = el.get('lon')
+            else:
+                center = el.get('center') or {}
+                lat = center.get('lat')
+                lon = center.get('lon')
+            if lat is None or lon is None:
+                continue
+
+            tags = el.get('tags') or {}
+            hospitals.append(
+                {
+                    'id': f"{el.get('type')}/{el.get('id')}",
+                    'name': tags.get('name') or tags.get('name:en') or 'Hospital',
+                    'latitude': lat,
+                    'longitude': lon,
+                    'address': tags.get('addr:full')
+                    or tags.get('addr:street')
+                    or tags.get('addr:city')
+                    or '',
+                }
+            )
 
-    hospitals = []
-    for el in payload.get('elements', []):
-        if el.get('type') == 'node':
-            lat = el.get('lat')
-            lon = el.get('lon')
-        else:
-            center = el.get('center') or {}
-            lat = center.get('lat')
-            lon = center.get('lon')
-        if lat is None or lon is None:
-            continue
-
-        tags = el.get('tags') or {}
-        hospitals.append(
-            {
-                'id': f"{el.get('type')}/{el.get('id')}",
-                'name': tags.get('name') or tags.get('name:en') or 'Hospital',
-                'latitude': lat,
-                'longitude': lon,
-                'address': tags.get('addr:full')
-                or tags.get('addr:street')
-                or tags.get('addr:city')
-                or '',
-            }
-        )
+        content = JsonResponse({'ok': True, 'hospitals': hospitals}).content
+        cached = (payload_etag(content), content)
+        if cache_seconds:
+            await cache.aset(cache_key, cached, cache_seconds)
 
-    return JsonResponse({'ok': True, 'hospitals': hospitals})
+    etag, content = cached
+    response = get_conditional_response(request, etag=etag) or HttpResponse(content, content_type='application/json')
+    response.headers.setdefault('ETag', etag)
+    patch_cache_control(response, private=True, max_age=cache_seconds)
+    return response
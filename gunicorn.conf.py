@@ -0,0 +1,61 @@
+"""Gunicorn serving profile for LifeLine.
+
+Gunicorn reads this file automatically when started from the repo root:
+
+    gunicorn                          # WSGI, threaded workers (default)
+    LIFELINE_SERVE_MODE=asgi gunicorn # ASGI, uvicorn workers
+
+Threaded WSGI workers keep a slow Overpass call or SMTP send from blocking
+the whole process; ASGI workers additionally run the async views
+(`osm_nearby_hospitals`, `update_location`, SOS responses) on the event loop
+so one worker can hold many in-flight upstream requests.
+"""
+import multiprocessing
+import os
+
+
+def env_int(name, default):
+    value = os.getenv(name)
+    if value is None:
+        return default
+    try:
+        return int(value)
+    except ValueError:
+        return default
+
+
+serve_mode = os.getenv('LIFELINE_SERVE_MODE', 'wsgi').strip().lower()
+cpu_count = multiprocessing.cpu_count()
+
+bind = f"0.0.0.0:{os.getenv('PORT', '8000')}"
+
+if serve_mode == 'asgi':
+    wsgi_app = 'lifeline_project.asgi:application'
+    worker_class = 'uvicorn_worker.UvicornWorker'
+    # One event loop per core is enough; concurrency comes from the loop.
+    workers = env_int('WEB_CONCURRENCY', cpu_count)
+else:
+    wsgi_app = 'lifeline_project.wsgi:application'
+    worker_class = 'gthread'
+    # Views mostly wait on the database, Overpass or SMTP, so favour threads
+    # over processes to keep memory flat on small instances.
+    workers = env_int('WEB_CONCURRENCY', min(cpu_count * 2 + 1, 4))
+    threads = env_int('GUNICORN_THREADS', 8)
+
+# Overpass lookups may take up to LIFELINE_OVERPASS_TIMEOUT (20s by default).
+timeout = env_int('GUNICORN_TIMEOUT', 30)
+graceful_timeout = env_int('GUNICORN_GRACEFUL_TIMEOUT', 30)
+keepalive = env_int('GUNICORN_KEEPALIVE', 5)
+
+# Recycle workers periodically to cap slow memory growth.
+max_requests = env_int('GUNICORN_MAX_REQUESTS', 1000)
+max_requests_jitter = env_int('GUNICORN_MAX_REQUESTS_JITTER', 100)
+
+preload_app = True
+if os.path.isdir('/dev/shm'):
+    # Heartbeat files on a tmpfs so a slow disk can't get workers killed.
+    worker_tmp_dir = '/dev/shm'
+
+accesslog = os.getenv('GUNICORN_ACCESS_LOG', '-') or None
+errorlog = '-'
+loglevel = os.getenv('GUNICORN_LOG_LEVEL', 'info')
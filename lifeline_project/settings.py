@@ -22,9 +22,13 @@ def env_int(name, default):
     except ValueError:
         return default
 
+# Production profile: LIFELINE_PRODUCTION=1 turns DEBUG off and enables the
+# cached template loader and template fragment caching (see TEMPLATES).
+LIFELINE_PRODUCTION = env_bool('LIFELINE_PRODUCTION', False)
+
 # Security
-SECRET_KEY = 'django-insecure-change-this-to-a-secure-random-key-in-production'
-DEBUG = True
+SECRET_KEY = os.getenv('DJANGO_SECRET_KEY', 'django-insecure-change-this-to-a-secure-random-key-in-production')
+DEBUG = env_bool('DJANGO_DEBUG', not LIFELINE_PRODUCTION)
 ALLOWED_HOSTS = ['*']
 
 # Applications
@@ -40,8 +44,9 @@ INSTALLED_APPS = [
     'core',
 ]
 
-# Middleware (WhiteNoise must be right after SecurityMiddleware)
+# Middleware (health probes short-circuit first; WhiteNoise must be right after SecurityMiddleware)
 MIDDLEWARE = [
+    'core.middleware.HealthCheckMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -50,6 +55,7 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'core.middleware.ReplicaPinMiddleware',
     'core.middleware.DisableClientCacheMiddleware',
 ]
 
@@ -66,10 +72,20 @@ TEMPLATES = [
                 'django.template.context_processors.request',
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
+                'core.context_processors.fragment_cache',
             ],
         },
     },
 ]
+if LIFELINE_PRODUCTION:
+    # Parse each template once per process; never re-read them from disk.
+    TEMPLATES[0]['APP_DIRS'] = False
+    TEMPLATES[0]['OPTIONS']['loaders'] = [
+        ('django.template.loaders.cached.Loader', [
+            'django.template.loaders.filesystem.Loader',
+            'django.template.loaders.app_directories.Loader',
+        ]),
+    ]
 
 WSGI_APPLICATION = 'lifeline_project.wsgi.application'
 
@@ -82,6 +98,22 @@ DATABASES = {
     )
 }
 
+# Cache shared by all workers: rate limits, buffered locations and other
+# cross-request state need a shared backend (e.g. Redis or the database
+# cache) once more than one process serves traffic.
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv('LIFELINE_CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.getenv('LIFELINE_CACHE_LOCATION', 'lifeline'),
+    }
+}
+# A per-process cache can't see other workers' writes, so features that
+# keep shared state in the cache default to off without a shared one
+LIFELINE_SHARED_CACHE = not CACHES['default']['BACKEND'].endswith(('.LocMemCache', '.DummyCache'))
+
+# Usernames are matched ignoring case, through a functional index
+AUTHENTICATION_BACKENDS = ['core.backends.CaseInsensitiveModelBackend']
+
 # Password validation
 AUTH_PASSWORD_VALIDATORS = []
 
@@ -94,7 +126,11 @@ USE_TZ = True
 # Static files
 STATIC_URL = '/static/'
 STATIC_ROOT = BASE_DIR / 'staticfiles'
-STATICFILES_STORAGE = 'whitenoise.storage.CompressedManifestStaticFilesStorage'
+# Content-hashed names (served immutable by WhiteNoise) plus .gz/.br copies
+STORAGES = {
+    'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+    'staticfiles': {'BACKEND': 'core.storage.StaticFilesStorage'},
+}
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
@@ -141,3 +177,107 @@ EMAIL_HOST_PASSWORD = os.getenv('DJANGO_EMAIL_HOST_PASSWORD', '')
 EMAIL_USE_TLS = env_bool('DJANGO_EMAIL_USE_TLS', True)
 EMAIL_USE_SSL = env_bool('DJANGO_EMAIL_USE_SSL', False)
 EMAIL_TIMEOUT = env_int('DJANGO_EMAIL_TIMEOUT', 10)
+
+# OpenStreetMap Overpass lookups (osm_nearby_hospitals)
+LIFELINE_OVERPASS_URL = os.getenv('LIFELINE_OVERPASS_URL', 'https://overpass-api.de/api/interpreter')
+LIFELINE_OVERPASS_TIMEOUT = env_int('LIFELINE_OVERPASS_TIMEOUT', 20)
+
+# Resolved SOS alerts older than this move to the archive table (archive_sos_alerts)
+LIFELINE_SOS_ARCHIVE_AFTER_DAYS = env_int('LIFELINE_SOS_ARCHIVE_AFTER_DAYS', 90)
+
+# Pending SOS alerts: broadcast to every hospital, then expire (expire_sos_alerts)
+LIFELINE_SOS_ESCALATE_AFTER_MINUTES = env_int('LIFELINE_SOS_ESCALATE_AFTER_MINUTES', 30)
+LIFELINE_SOS_EXPIRE_AFTER_HOURS = env_int('LIFELINE_SOS_EXPIRE_AFTER_HOURS', 24)
+
+# SOS demand analytics: grid cell size (degrees) for the hourly rollups
+LIFELINE_ROLLUP_CELL_DEGREES = float(os.getenv('LIFELINE_ROLLUP_CELL_DEGREES', '0.5'))
+
+# SOS routing: shortlist the best-placed hospitals before broadcasting to all
+LIFELINE_ROUTING_RADIUS_KM = env_int('LIFELINE_ROUTING_RADIUS_KM', 25)
+LIFELINE_ROUTING_SHORTLIST_SIZE = env_int('LIFELINE_ROUTING_SHORTLIST_SIZE', 3)
+LIFELINE_ROUTING_TIMEOUT_MINUTES = env_int('LIFELINE_ROUTING_TIMEOUT_MINUTES', 10)
+
+# Location updates: ignore small moves and buffer the rest for periodic bulk
+# writes (only with a shared cache; otherwise each fix is written through)
+LIFELINE_LOCATION_MIN_DISTANCE_M = env_int('LIFELINE_LOCATION_MIN_DISTANCE_M', 50)
+LIFELINE_LOCATION_FLUSH_SECONDS = env_int('LIFELINE_LOCATION_FLUSH_SECONDS', 60)
+LIFELINE_LOCATION_BUFFER = env_bool('LIFELINE_LOCATION_BUFFER', LIFELINE_SHARED_CACHE)
+
+# Rate limits per view: (requests per minute, burst). 0 disables a limit.
+LIFELINE_RATE_LIMIT_ENABLED = env_bool('LIFELINE_RATE_LIMIT_ENABLED', True)
+LIFELINE_RATE_LIMITS = {
+    'submit_sos': (
+        env_int('LIFELINE_SOS_RATE_PER_MINUTE', 6),
+        env_int('LIFELINE_SOS_RATE_BURST', 3),
+    ),
+    'osm_nearby_hospitals': (
+        env_int('LIFELINE_OSM_RATE_PER_MINUTE', 30),
+        env_int('LIFELINE_OSM_RATE_BURST', 10),
+    ),
+}
+
+# How long SOS idempotency keys are answered from the cache (the database
+# constraint keeps deduplicating afterwards)
+LIFELINE_SOS_IDEMPOTENCY_WINDOW_SECONDS = env_int('LIFELINE_SOS_IDEMPOTENCY_WINDOW_SECONDS', 600)
+
+# Optional read replica for dashboards, map APIs, donor lists and exports
+# (core.replicas). Writers stay on the primary for LIFELINE_REPLICA_PIN_SECONDS;
+# a failing replica is skipped for LIFELINE_REPLICA_RETRY_SECONDS.
+LIFELINE_REPLICA_DATABASE_URL = os.getenv('LIFELINE_REPLICA_DATABASE_URL', '')
+if LIFELINE_REPLICA_DATABASE_URL:
+    DATABASES['replica'] = dj_database_url.parse(LIFELINE_REPLICA_DATABASE_URL, conn_max_age=600)
+    DATABASES['replica']['TEST'] = {'MIRROR': 'default'}
+DATABASE_ROUTERS = ['core.replicas.ReplicaRouter']
+LIFELINE_REPLICA_PIN_SECONDS = env_int('LIFELINE_REPLICA_PIN_SECONDS', 15)
+LIFELINE_REPLICA_RETRY_SECONDS = env_int('LIFELINE_REPLICA_RETRY_SECONDS', 30)
+
+# Chunked data backfills (core.backfill, run_backfill): rows per committed
+# chunk and the pause between chunks
+LIFELINE_BACKFILL_BATCH_SIZE = env_int('LIFELINE_BACKFILL_BATCH_SIZE', 1000)
+LIFELINE_BACKFILL_SLEEP_SECONDS = float(os.getenv('LIFELINE_BACKFILL_SLEEP_SECONDS', '0'))
+
+# {% cache %} fragments for the static parts of base.html and the dashboards.
+# 0 renders them every time; LIFELINE_RELEASE (e.g. the deployed commit) is
+# part of every fragment key.
+LIFELINE_TEMPLATE_FRAGMENT_SECONDS = env_int('LIFELINE_TEMPLATE_FRAGMENT_SECONDS', 600 if LIFELINE_PRODUCTION else 0)
+LIFELINE_RELEASE = os.getenv('LIFELINE_RELEASE', '')
+
+# Serve the built bundles (build_assets, then collectstatic) instead of the
+# individual source files
+LIFELINE_ASSET_BUNDLES = env_bool('LIFELINE_ASSET_BUNDLES', LIFELINE_PRODUCTION)
+
+# ETags from data version stamps (core.conditional) on dashboards, donor
+# pages and map APIs, so unchanged data is answered with 304. Off by default
+# without a shared cache: another worker's writes would not restamp this
+# worker's versions. Overpass hospital lookups are kept for
+# LIFELINE_OSM_CACHE_SECONDS and may be reused by the browser that long.
+LIFELINE_CONDITIONAL_GET = env_bool('LIFELINE_CONDITIONAL_GET', LIFELINE_SHARED_CACHE)
+LIFELINE_OSM_CACHE_SECONDS = env_int('LIFELINE_OSM_CACHE_SECONDS', 300)
+
+# Session storage: db (default), cached_db (reads from the cache, writes
+# through to the table), cache or signed_cookies (no server-side state; a
+# copied cookie stays valid until it expires). cached_db and cache need a
+# shared cache with more than one worker.
+LIFELINE_SESSION_BACKEND = os.getenv('LIFELINE_SESSION_BACKEND', 'db')
+SESSION_ENGINE = f'django.contrib.sessions.backends.{LIFELINE_SESSION_BACKEND}'
+
+# Signed-in users are loaded from the cache (core.backends) and reloaded
+# whenever their row changes; 0 fetches the row on every request. Off by
+# default without a shared cache: a deactivation or password change in one
+# worker would not reach the copies held by the others
+LIFELINE_USER_CACHE_SECONDS = env_int('LIFELINE_USER_CACHE_SECONDS', 300 if LIFELINE_SHARED_CACHE else 0)
+
+# Donor directory (core.donorsearch): rows per page, and the minimum gap
+# between donations for a donor to count as eligible
+LIFELINE_DONOR_PAGE_SIZE = env_int('LIFELINE_DONOR_PAGE_SIZE', 50)
+LIFELINE_DONATION_INTERVAL_DAYS = env_int('LIFELINE_DONATION_INTERVAL_DAYS', 56)
+
+# Low-stock watch (core.shortages): a blood type is short at or below the
+# hospital's minimum, LIFELINE_LOW_STOCK_UNITS where none is set; alerts go
+# out at most once per LIFELINE_LOW_STOCK_ALERT_SECONDS per hospital and type
+LIFELINE_LOW_STOCK_UNITS = env_int('LIFELINE_LOW_STOCK_UNITS', 2)
+LIFELINE_LOW_STOCK_ALERT_SECONDS = env_int('LIFELINE_LOW_STOCK_ALERT_SECONDS', 6 * 3600)
+
+# Donor CSV uploads run inside the request and must finish well within the
+# gunicorn timeout; larger files go through `manage.py import_donors`
+LIFELINE_IMPORT_UPLOAD_MAX_ROWS = env_int('LIFELINE_IMPORT_UPLOAD_MAX_ROWS', 200)
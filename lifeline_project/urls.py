@@ -10,7 +10,12 @@ urlpatterns = [
     path('admin/inventory/<int:hospital_id>/', views.manage_inventory, name='manage_inventory'),
     path('admin/hospital/<int:hospital_id>/', views.manage_hospital, name='manage_hospital'),
     path('admin/hospital/<int:hospital_id>/delete/', views.delete_hospital, name='delete_hospital'),
+    path('admin/analytics/', views.sos_analytics, name='sos_analytics'),
+    path('admin/export/<str:kind>/', views.export_data, name='export_data'),
+    path('admin/import-donors/', views.import_donors_upload, name='import_donors'),
+    path('admin/thresholds/<int:hospital_id>/', views.manage_thresholds, name='manage_thresholds'),
     path('hospital/inventory/', views.manage_my_inventory, name='manage_my_inventory'),
+    path('hospital/thresholds/', views.manage_my_thresholds, name='manage_my_thresholds'),
 
     # --- Built-in Django Admin ---
     path('admin/', admin.site.urls),
@@ -37,4 +42,9 @@ urlpatterns = [
     # --- API ---
     path('api/location/update/', views.update_location, name='update_location'),
     path('api/osm/hospitals/', views.osm_nearby_hospitals, name='osm_nearby_hospitals'),
+    path('api/analytics/demand/', views.sos_demand_api, name='sos_demand_api'),
+    path('api/stock-grid/', views.stock_grid_api, name='stock_grid_api'),
+    path('api/donors/', views.donor_search_api, name='donor_search_api'),
+    path('api/hospitals/map/', views.hospital_map_api, name='hospital_map_api'),
+    path('api/alerts/map/', views.alert_map_api, name='alert_map_api'),
 ]